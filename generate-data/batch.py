@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+from main import (add_run_args, configure_run, get_commentary, get_innings_ids, get_match_artifact_path, get_match_data,
+    get_match_info, get_match_start_date, get_match_squads, get_player, get_series_match_ids, get_series_venue_ids, get_squad_player_ids, get_venue,
+    mark_match_complete)
+from utils.checkpoint import get_checkpoint
+from utils.file import get_file_data, set_file_records
+from utils.players import get_player_registry, get_player_resolver
+from utils.records import commentary_from_json
+from utils.scheduler import Task, TaskScheduler
+from utils.scorecard import get_scorecard_source
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_TYPES = ('venues', 'players', 'info', 'squads', 'scorecard', 'commentary')
+
+# lower runs first: finish the matches already started before opening new ones,
+# and leave the shared entities, which nothing waits on, for last
+TASK_PRIORITIES = {
+    'matches': 0,
+    'info': 1,
+    'squads': 2,
+    'commentary': 3,
+    'scorecard': 4,
+    'complete': 5,
+    'venue_list': 6,
+    'venue': 7,
+    'player': 8,
+}
+
+# max tasks of each type in flight; request pacing is still up to the shared rate limiter
+DEFAULT_TASK_CONCURRENCY = {
+    'matches': 1,
+    'info': 4,
+    'squads': 2,
+    'commentary': 4,
+    'scorecard': 2,
+    'complete': 1,
+    'venue_list': 1,
+    'venue': 2,
+    'player': 4,
+}
+
+def load_manifest(file_path):
+    """
+    Reads a batch manifest:
+
+    {"series": [{"id": "7607", "matches": ["89654"], "artifacts": ["info", "commentary"]}],
+     "concurrency": {"player": 8}}
+
+    `matches` defaults to every match of the series and `artifacts` to all of
+    ARTIFACT_TYPES. Returns (series entries, concurrency overrides).
+    """
+    with open(file_path) as fd:
+        manifest = json.load(fd)
+
+    entries = []
+    for entry in manifest.get('series', []):
+        artifacts = set(entry.get('artifacts', ARTIFACT_TYPES))
+        unknown = artifacts - set(ARTIFACT_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown artifacts {sorted(unknown)} for series {entry['id']}, expected any of {', '.join(ARTIFACT_TYPES)}")
+
+        match_ids = entry.get('matches')
+        entries.append({
+            'id': str(entry['id']),
+            'matches': {str(match_id) for match_id in match_ids} if match_ids is not None else None,
+            'artifacts': artifacts,
+        })
+
+    return entries, manifest.get('concurrency', {})
+
+def require(result, what):
+    # the scraping helpers log and return None on failure; the scheduler needs an exception
+    if result is None:
+        raise Exception(f"No {what}")
+
+    return result
+
+def fetch_venue(venue_id, date=None):
+    venue_data = require(get_venue(id=venue_id, date=date), f"venue {venue_id}")
+    set_file_records(file_path='venues/index.json', records={venue_data['id']: venue_data})
+
+    return venue_data
+
+def fetch_player(player_id):
+    # through the resolver, so a player the pipeline or another task is already fetching isn't fetched twice
+    get_player_resolver().resolve([player_id], lambda player_id: get_player(id=player_id))
+
+    return require(get_player_registry().get(player_id), f"player {player_id}")
+
+def load_commentary_lists(match_info):
+    commentary_lists = {}
+    for innings_id in get_innings_ids(match_info):
+        commentary_list = get_file_data(file_path=get_match_artifact_path(match_info['series'], match_info['id'], f'commentary/{innings_id}.json'), default_data=None)
+        commentary_lists[innings_id] = commentary_from_json(commentary_list) if commentary_list is not None else None
+
+    return commentary_lists
+
+class BatchPlanner:
+    """
+    Turns manifest entries into scheduler tasks. Match-level tasks are only
+    known once the series match list and each match's info are in, so they are
+    added from `expand` hooks as those tasks finish. Task keys are shared
+    across the whole batch, which is what dedupes players and venues.
+    """
+
+    def __init__(self, scheduler, resume=False):
+        self.scheduler = scheduler
+        self.resume = resume
+        # venue id -> start of its earliest planned match, the day its timezone is resolved for
+        self.venue_dates = {}
+
+    def task(self, key, fn, *args, deps=(), expand=None):
+        return Task(key, key[0], fn, args=args, deps=deps, priority=TASK_PRIORITIES[key[0]], expand=expand)
+
+    def add_series(self, entry):
+        series_id = entry['id']
+        if 'venues' in entry['artifacts']:
+            self.scheduler.add(self.task(
+                ('venue_list', series_id), get_series_venue_ids, series_id,
+                expand=lambda venue_ids: [self.venue_task(venue_id) for venue_id in venue_ids],
+            ))
+
+        if entry['artifacts'] - {'venues'}:
+            self.scheduler.add(self.task(
+                ('matches', series_id), get_series_match_ids, series_id,
+                expand=lambda matches: self.plan_matches(entry, matches),
+            ))
+
+    def venue_task(self, venue_id):
+        # the date is read when the task runs: venues run last, once most match infos are in
+        venue_id = str(venue_id)
+        return self.task(('venue', venue_id), lambda: fetch_venue(venue_id, self.venue_dates.get(venue_id)))
+
+    def player_tasks(self, squads):
+        player_registry = get_player_registry()
+        max_age = get_player_resolver().max_age
+        return [
+            self.task(('player', str(player_id)), fetch_player, player_id)
+            for player_id in get_squad_player_ids(squads)
+            if player_registry.needs_fetch(player_id, max_age)
+        ]
+
+    def plan_matches(self, entry, matches):
+        checkpoint = get_checkpoint(entry['id']) if self.resume else None
+        tasks = []
+        for match_id, match_number in matches:
+            if entry['matches'] is not None and match_id not in entry['matches']:
+                continue
+            if checkpoint and checkpoint.is_match_complete(match_id):
+                logger.info("Skipping match %s, already complete", match_id)
+                continue
+
+            tasks.append(self.task(
+                ('info', match_id), lambda match_id=match_id, match_number=match_number: require(get_match_info(match_id, match_number), f"info for match {match_id}"),
+                expand=lambda match_info, artifacts=entry['artifacts']: self.plan_match(match_info, artifacts),
+            ))
+
+        return tasks
+
+    def plan_match(self, match_info, artifacts):
+        match_id = match_info['id']
+        match_number = match_info['matchNumber']
+        checkpoint = get_checkpoint(match_info['series']) if self.resume else None
+        info_key = ('info', match_id)
+        tasks = []
+
+        def is_done(name):
+            return checkpoint and checkpoint.is_complete(get_match_artifact_path(match_info['series'], match_id, name))
+
+        if 'venues' in artifacts:
+            venue_id = str(match_info['venue'])
+            start_date = get_match_start_date(match_info)
+            if venue_id not in self.venue_dates or start_date < self.venue_dates[venue_id]:
+                self.venue_dates[venue_id] = start_date
+            tasks.append(self.venue_task(venue_id))
+
+        # the scraped scorecard resolves dismissal names against squads.json
+        needs_squads = 'squads' in artifacts or 'players' in artifacts or ('scorecard' in artifacts and get_scorecard_source() != 'commentary')
+        squads_key = None
+        if needs_squads and is_done('squads.json'):
+            if 'players' in artifacts:
+                tasks.extend(self.player_tasks(get_file_data(file_path=get_match_artifact_path(match_info['series'], match_id, 'squads.json'))))
+        elif needs_squads:
+            squads_key = ('squads', match_id)
+            tasks.append(self.task(
+                squads_key,
+                lambda: require(get_match_squads(match_id, match_number, match_info=match_info, fetch_players=False), f"squads for match {match_id}"),
+                deps=[info_key],
+                expand=self.player_tasks if 'players' in artifacts else None,
+            ))
+
+        # the scorecard is built from the stored commentary, so every innings is fetched first
+        needs_commentary = 'commentary' in artifacts or 'scorecard' in artifacts
+        commentary_keys = []
+        for innings_id in get_innings_ids(match_info) if needs_commentary else ():
+            if is_done(f'commentary/{innings_id}.json'):
+                continue
+
+            commentary_keys.append(('commentary', match_id, innings_id))
+            tasks.append(self.task(
+                commentary_keys[-1],
+                lambda innings_id=innings_id: require(get_commentary(match_id, innings_id), f"commentary for match {match_id} innings {innings_id}"),
+                deps=[info_key],
+            ))
+
+        scorecard_key = None
+        if 'scorecard' in artifacts and not is_done('matchData.json'):
+            scorecard_key = ('scorecard', match_id)
+            tasks.append(self.task(
+                scorecard_key,
+                lambda: require(get_match_data(match_id, match_number, commentary_lists=load_commentary_lists(match_info), match_info=match_info), f"scorecard for match {match_id}"),
+                deps=[info_key, *([squads_key] if squads_key else []), *commentary_keys],
+            ))
+
+        match_keys = [key for key in (squads_key, scorecard_key) if key] + commentary_keys
+        tasks.append(self.task(('complete', match_id), mark_match_complete, match_info, deps=[info_key, *match_keys]))
+
+        return tasks
+
+def parse_task_concurrency(values):
+    concurrency = {}
+    for value in values:
+        task_type, _, limit = value.partition('=')
+        if task_type not in TASK_PRIORITIES or not limit.isdigit():
+            raise ValueError(f"Bad --task-concurrency {value!r}, expected <type>=<n> with type one of {', '.join(TASK_PRIORITIES)}")
+        concurrency[task_type] = int(limit)
+
+    return concurrency
+
+def run_batch(entries, concurrency=None, resume=False):
+    scheduler = TaskScheduler(concurrency={**DEFAULT_TASK_CONCURRENCY, **(concurrency or {})})
+    planner = BatchPlanner(scheduler, resume=resume)
+    for entry in entries:
+        planner.add_series(entry)
+
+    results, failures = scheduler.run()
+    get_player_registry().flush()
+
+    return results, failures
+
+def main():
+    parser = add_run_args(argparse.ArgumentParser(description='Scrape the series, matches and artifacts listed in a manifest as one deduplicated task graph.'))
+    parser.add_argument('manifest', help='JSON manifest, see load_manifest')
+    parser.add_argument('--task-concurrency', action='append', default=[], metavar='TYPE=N', help=f"max running tasks of one type, types: {', '.join(TASK_PRIORITIES)}")
+    args = parser.parse_args()
+    if args.archive_mode and not args.archive:
+        parser.error('--archive-mode needs --archive')
+
+    try:
+        entries, manifest_concurrency = load_manifest(args.manifest)
+        concurrency = {**manifest_concurrency, **parse_task_concurrency(args.task_concurrency)}
+    except ValueError as e:
+        parser.error(str(e))
+
+    configure_run(args)
+    results, failures = run_batch(entries, concurrency=concurrency, resume=args.resume)
+
+    counts = {}
+    for key in results:
+        counts[key[0]] = counts.get(key[0], 0) + 1
+    print(f"Finished {len(results)} tasks ({', '.join(f'{count} {task_type}' for task_type, count in sorted(counts.items()))}), {len(failures)} failed")
+    for key, error in failures.items():
+        print(f"  {key}: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1012 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from datetime import date, datetime, timedelta, timezone
+import pytz
+from bs4 import BeautifulSoup
+from main import KNOWN_BALL_EVENTS, parse_ball_events, transform_commentary, transform_match_data
+from utils import ball_num_to_overs, format_comm_text, slugify
+from utils.columnar import concat_columns, flatten_commentary, load_balls, numpy, write_match_columns
+from utils.commentary import build_commentary_index
+from utils.dismissals import classify_dismissal
+from utils.file import set_file_data
+from utils.html import HTML_PARSER, get_scorecard_innings
+from utils.jsonstream import write_json_array
+from utils.names import SquadNameIndex
+from utils.players import PlayerRegistry, PlayerResolver
+from utils.records import commentary_from_json, commentary_to_json
+from utils.schemas import ARTIFACT_SCHEMAS
+from utils.scorecard import INNINGS_ID_MAP, reconstruct_innings
+from utils.storage import configure_storage
+from utils.timezones import get_offset_index, get_offset_zones, get_timezone_from_offset
+
+SEED_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../server/src/db/seeds/data/')
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark-history.jsonl')
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+BOLD_TEXT = re.compile(r'<b>(.*?)</b>')
+HTML_ESCAPE_CHARS = re.compile(r'[&<>]')
+
+# what get_player feeds slugify, next to the ball events get_commentary does
+PLAYER_STYLES = [
+    'Right Handed Bat', 'Left Handed Bat', 'Right-arm fast', 'Right-arm fast-medium', 'Right-arm medium',
+    'Left-arm fast', 'Left-arm fast-medium', 'Left-arm medium', 'Right-arm offbreak', 'Right-arm legbreak',
+    'Left-arm orthodox', 'Left-arm wrist-spin',
+]
+
+# format_comm_text items by their number of format ids: most have one, previews and reports dozens
+# how many times smaller an innings held as records should be than as dicts
+RECORDS_MEMORY_TARGET = 3.0
+FORMAT_ID_BUCKETS = [('1 id', 1, 1), ('2-3 ids', 2, 3), ('4+ ids', 4, None)]
+
+VENUE_OFFSETS = ['+05:30', '+00:00', '+01:00', '+10:00', '+11:00', '+06:00', '+04:30', '+05:00', '+02:00', '-04:00', '+13:00', '+12:00']
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+
+    return (time.perf_counter() - start) / repeat
+
+def peak_memory(fn):
+    # peak traced bytes while fn runs; the benches discard results, so this is the largest single op's working set
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# every report() of the current run, written to the history file at the end
+results = []
+current_benchmark = None
+
+def report(name, seconds, baseline=None, peak=None):
+    line = f"{name:<40} {seconds * 1e6:>12.2f} us/op"
+    if baseline:
+        line += f"  (speedup {baseline / seconds:.1f}x)"
+    if peak is not None:
+        line += f"  peak {peak / 1024:.0f} KiB"
+    print(line)
+
+    result = {'benchmark': current_benchmark, 'case': name, 'secondsPerOp': seconds}
+    if baseline:
+        result['speedup'] = round(baseline / seconds, 3)
+    if peak is not None:
+        result['peakBytes'] = peak
+    results.append(result)
+
+def load_seed_commentary():
+    innings = []
+    for path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/commentary/[1-9].json')):
+        with open(path) as fd:
+            innings.append(json.load(fd))
+
+    return innings
+
+def load_seed_matches():
+    """
+    Every seeded match with its info, squads, matchData and commentary per innings id.
+    """
+    matches = []
+    for match_path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/')):
+        try:
+            match = {'seriesId': match_path.rstrip('/').split('/')[-3]}
+            for name in ('info', 'squads', 'matchData'):
+                with open(f"{match_path}{name}.json") as fd:
+                    match[name] = json.load(fd)
+        except FileNotFoundError:
+            continue
+
+        match['commentary'] = {}
+        for path in sorted(glob.glob(match_path + 'commentary/*.json')):
+            with open(path) as fd:
+                match['commentary'][int(os.path.basename(path)[:-5])] = json.load(fd)
+        matches.append(match)
+
+    return matches
+
+def build_raw_commentary_item(item):
+    # the full-commentary API shape transform_commentary_item reads, bold text back behind format ids
+    format_ids = []
+    format_values = []
+    def to_format_id(match):
+        format_ids.append(f"B{len(format_ids)}$")
+        format_values.append(match.group(1))
+        return format_ids[-1]
+
+    comm_text = BOLD_TEXT.sub(to_format_id, item['commText'][len('<p>'):-len('</p>')])
+    batter = item['batsmanStriker']
+    bowler = item['bowlerStriker']
+
+    return {
+        'timestamp': item['timestamp'],
+        'commText': comm_text,
+        'commentaryFormats': {'bold': {'formatId': format_ids, 'formatValue': format_values}} if format_ids else {},
+        'ballNbr': item['ballNbr'],
+        'event': ','.join(item['events']) or 'NONE',
+        'batsmanStriker': {
+            'batId': batter['id'], 'batRuns': batter['batRuns'], 'batBalls': batter['ballsPlayed'], 'batDots': batter['dotBalls'],
+            'batFours': batter['batFours'], 'batSixes': batter['batSixes'],
+        },
+        'bowlerStriker': {
+            'bowlId': bowler['id'], 'bowlOvs': bowler['bowlOvers'], 'bowlMaidens': bowler['bowlMaidens'], 'bowlRuns': bowler['bowlRuns'],
+            'bowlWkts': bowler['bowlWickets'], 'bowlWides': bowler['bowlWides'], 'bowlNoballs': bowler['bowlNoBalls'],
+        },
+        'batTeamScore': item['batTeamScore'],
+    }
+
+def build_commentary_payload(series_id, commentary_list):
+    # the API lists the newest ball first
+    return {
+        'matchDetails': {'matchHeader': {'seriesId': series_id}},
+        'commentary': [{'commentaryList': [build_raw_commentary_item(item) for item in reversed(commentary_list)]}],
+    }
+
+def build_scorecard_page(match):
+    """
+    A scorecard page laid out the way transform_match_data reads it, rebuilt
+    from a seeded match: batters with their dismissal text, extras, fall of
+    wickets and bowlers per innings, inside the usual page chrome.
+    """
+    names = get_squad_names(match['squads'])
+
+    def player_link(player_id):
+        return f'<a href="/profiles/{player_id}/player-slug" class="cb-text-link">{names.get(player_id, "Player")}</a>'
+
+    def row(cells):
+        return '<div class="cb-col cb-col-100 cb-scrd-itms">' + ''.join(f'<div class="cb-col cb-col-8">{cell}</div>' for cell in cells) + '</div>'
+
+    innings_html = ''
+    for current_innings in match['info']['inningsScoreList']:
+        innings = match['matchData']['innings'].get(INNINGS_ID_MAP.get(current_innings['inningsId']))
+        if not innings:
+            continue
+
+        batter_rows = ''.join(
+            row([
+                player_link(batter['id']),
+                f"<span>{get_dismissal_string(batter['fallOfWicket'], names) if 'fallOfWicket' in batter else 'not out'}</span>",
+                batter['batRuns'], batter['ballsPlayed'], batter['batFours'], batter['batSixes'], '100.00',
+            ])
+            for batter in innings['batters']
+        )
+        extras = innings['extras']
+        extras_text = f"(b {extras['byes']}, lb {extras['legByes']}, w {extras['wides']}, nb {extras['nos']}, p {extras['penalties']})"
+        batter_rows += row(['Extras', sum(extras.values()), extras_text])
+        batter_rows += row(['Total', f"{innings['score']} ({innings['wickets']} wkts, {innings['oversBowled']} Ov)"])
+        batter_rows += row(['Did not Bat', ''])
+
+        fall_of_wickets = ''.join(
+            f"<span>{batter['fallOfWicket']['teamScore']}-{batter['fallOfWicket']['teamWickets']} ({player_link(batter['id'])}, {batter['fallOfWicket']['overs']}), </span>"
+            for batter in innings['batters'] if 'fallOfWicket' in batter
+        )
+        bowler_rows = ''.join(
+            row([player_link(bowler['id']), bowler['bowlOvers'], bowler['bowlMaidens'], bowler['bowlRuns'], bowler['bowlWickets'], bowler['bowlNoBalls'], bowler['bowlWides'], '8.00'])
+            for bowler in innings['bowlers']
+        )
+
+        innings_html += (
+            f'<div id="innings_{current_innings["inningsId"]}">'
+            f'<div class="cb-col cb-col-100 cb-ltst-wgt-hdr"><div class="cb-col cb-col-100 cb-scrd-hdr-rw">Batter</div>{batter_rows}</div>'
+            f'<div class="cb-col cb-col-100 cb-scrd-sub-hdr">Fall of Wickets</div>'
+            f'<div class="cb-col cb-col-100 cb-col-rt cb-font-13">{fall_of_wickets}</div>'
+            f'<div class="cb-col cb-col-100 cb-ltst-wgt-hdr"><div class="cb-col cb-col-100 cb-scrd-sub-hdr">Bowler</div>{bowler_rows}</div>'
+            f'<div class="cb-col cb-col-100 cb-ltst-wgt-hdr">Powerplays</div>'
+            '</div>'
+        )
+
+    chrome = ''.join(f'<div class="cb-nav-item"><a href="/news/{i}">Story {i}</a><span>teaser {i}</span></div>' for i in range(1500))
+    return f'<html><body><div id="page">{chrome}<div class="cb-col cb-col-67">{innings_html}</div>{chrome}</div></body></html>'.encode()
+
+def legacy_index_lookups(commentary_list):
+    # the reverse scans get_match_data used to do: once for the bowlers, once per batter
+    last_commentary_ball = None
+    last_bowler_ids = []
+    for i in range(len(commentary_list) - 1, -1, -1):
+        commentary = commentary_list[i]
+        if not last_commentary_ball and commentary['ballNbr'] != 0:
+            last_commentary_ball = commentary
+
+        bowler_id = commentary['bowlerStriker']['id']
+        if bowler_id > 0 and bowler_id not in last_bowler_ids:
+            last_bowler_ids.append(bowler_id)
+            if len(last_bowler_ids) == 2:
+                break
+
+    dot_balls = {}
+    batter_ids = {commentary['batsmanStriker']['id'] for commentary in commentary_list}
+    for batter_id in batter_ids:
+        for i in range(len(commentary_list) - 1, -1, -1):
+            commentary = commentary_list[i]
+            if batter_id == commentary['batsmanStriker']['id']:
+                dot_balls[batter_id] = commentary['batsmanStriker']['dotBalls']
+                break
+
+    return dot_balls, last_bowler_ids
+
+def indexed_lookups(commentary_list):
+    commentary_index = build_commentary_index(commentary_list)
+    dot_balls = {batter_id: batter.dot_balls for batter_id, batter in commentary_index['batters'].items()}
+
+    return dot_balls, commentary_index['current_bowler_ids']
+
+def bench_commentary_index(args):
+    repeat = args.repeat
+    innings = load_seed_commentary()
+    if not innings:
+        print(f"commentary_index: no seeded commentary under {SEED_DATA_PATH}")
+        return
+
+    records = [commentary_from_json(innings_commentary) for innings_commentary in innings]
+    for innings_commentary, innings_records in zip(innings, records):
+        assert legacy_index_lookups(innings_commentary) == indexed_lookups(innings_records)
+
+    # the seeds are T20s; chaining innings approximates a long Test innings
+    long_innings = [item for innings_commentary in innings[:10] for item in innings_commentary]
+    long_records = [item for innings_records in records[:10] for item in innings_records]
+    runs = max(1, repeat // 100)
+
+    for label, sample, record_sample in (('seeded innings', innings, records), ('long innings', [long_innings], [long_records])):
+        legacy = timeit(lambda: [legacy_index_lookups(c) for c in sample], runs) / len(sample)
+        indexed = timeit(lambda: [indexed_lookups(c) for c in record_sample], runs) / len(sample)
+
+        report(f'commentary lookups, {label} (scans)', legacy)
+        report(f'commentary lookups, {label} (index)', indexed, legacy)
+
+def build_scorecard_fixture(match_data):
+    # stand-in for a saved scorecard page: the innings tables plus the page chrome around them
+    chrome = ''.join(f'<div class="cb-nav-item"><a href="/news/{i}">Story {i}</a><span>teaser {i}</span></div>' for i in range(1500))
+    scripts = ''.join(f'<script>var widget{i} = {{"id": {i}}};</script>' for i in range(100))
+    innings_html = ''
+    for innings_number, innings in enumerate(match_data['innings'].values(), 1):
+        rows = ''.join(
+            f'<div class="cb-col cb-col-100 cb-scrd-itms"><div class="cb-col cb-col-25"><a href="/profiles/{batter["id"]}/p">Player</a></div>'
+            f'<div class="cb-col cb-col-33">not out</div><div class="cb-col cb-col-8">{batter["batRuns"]}</div>'
+            f'<div class="cb-col cb-col-8">{batter["ballsPlayed"]}</div><div class="cb-col cb-col-8">{batter["batFours"]}</div>'
+            f'<div class="cb-col cb-col-8">{batter["batSixes"]}</div></div>'
+            for batter in innings['batters']
+        )
+        innings_html += f'<div id="innings_{innings_number}"><div class="cb-col cb-col-100 cb-ltst-wgt-hdr">{rows}</div></div>'
+
+    return f'<html><head>{scripts}</head><body><div id="page">{chrome}<div class="cb-col cb-col-67">{innings_html}</div>{chrome}</div></body></html>'.encode()
+
+def load_scorecard_fixtures(fixtures_dir):
+    if fixtures_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+            with open(path, 'rb') as fd:
+                pages.append(fd.read())
+        return pages
+
+    pages = []
+    for path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/matchData.json'))[:5]:
+        with open(path) as fd:
+            pages.append(build_scorecard_fixture(json.load(fd)))
+
+    return pages
+
+def bench_html_parsing(args):
+    repeat = args.repeat
+    pages = load_scorecard_fixtures(args.fixtures)
+    if not pages:
+        print('html_parsing: no fixture pages')
+        return
+
+    def parse_full():
+        for page in pages:
+            soup = BeautifulSoup(page, 'html.parser')
+            soup.find_all('div', id=lambda value: value and value.startswith('innings_'))
+
+    def parse_scoped():
+        for page in pages:
+            get_scorecard_innings(page)
+
+    runs = max(1, repeat // 100)
+    full = timeit(parse_full, runs) / len(pages)
+    scoped = timeit(parse_scoped, runs) / len(pages)
+
+    report('scorecard parse (html.parser, full tree)', full, peak=peak_memory(parse_full))
+    report(f'scorecard parse ({HTML_PARSER}, innings only)', scoped, full, peak=peak_memory(parse_scoped))
+
+def get_squad_names(squads):
+    return {int(player['id']): player['name'].title() for team in squads.values() for player in team['players']}
+
+def get_dismissal_string(fall_of_wicket, names):
+    bowler = names.get(fall_of_wicket.get('bowlerId'), '')
+    helpers = [names.get(helper, '') for helper in fall_of_wicket.get('helpers', [])]
+    dismissal_type = fall_of_wicket['dismissalType']
+
+    if dismissal_type == 'caught' and not helpers:
+        return f"c and b {bowler}"
+    if dismissal_type == 'caught':
+        return f"c {helpers[0]} b {bowler}"
+    if dismissal_type == 'run-out':
+        return f"run out ({'/'.join(helpers)})"
+    if dismissal_type == 'stumped':
+        return f"st {helpers[0]} b {bowler}"
+    if dismissal_type == 'lbw':
+        return f"lbw b {bowler}"
+    if dismissal_type == 'hit-wicket':
+        return f"hit wicket b {bowler}"
+    if dismissal_type == 'bowled':
+        return f"b {bowler}"
+
+    return dismissal_type.replace('-', ' ')
+
+def build_dismissal_strings():
+    # scorecard-style dismissal text rebuilt from the seeded fallOfWicket records
+    dismissal_strings = []
+    for match_path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/')):
+        try:
+            with open(match_path + 'matchData.json') as fd:
+                match_data = json.load(fd)
+            with open(match_path + 'squads.json') as fd:
+                squads = json.load(fd)
+        except FileNotFoundError:
+            continue
+
+        names = get_squad_names(squads)
+        for innings in match_data['innings'].values():
+            for batter in innings['batters']:
+                fall_of_wicket = batter.get('fallOfWicket')
+                if fall_of_wicket:
+                    dismissal_strings.append(get_dismissal_string(fall_of_wicket, names))
+
+    return dismissal_strings + ['not out', 'retired hurt', 'timed out', 'obstructing the field', 'handled the ball']
+
+def legacy_get_dismissal_data(dismissal_string):
+    # the sequential, uncompiled matching get_dismissal_data used to do
+    patterns = {
+        'caught_and_bowled': r'c (?:and|&) b (?P<bowler>.+)',
+        'caught': r'c (?P<catcher>.+) b (?P<bowler>.+)',
+        'bowled': r'b (?P<bowler>.+)',
+        'run_out_dual': r'run out \((?P<player1>.+)/(?P<player2>.+)\)',
+        'run_out_single': r'run out \((?P<player>.+)\)',
+        'stumped': r'st (?P<keeper>.+) b (?P<bowler>.+)',
+        'lbw': r'lbw b (?P<bowler>.+)',
+        'hit_wicket': r'hit (?:wicket|wkt) b (?P<bowler>.+)',
+        'timed_out': r'timed out',
+        'obstructed': r'obs',
+        'retired_out': r'(?:retired|retd) out',
+        'retired_hurt': r'retired hurt',
+        'handled': r'handled'
+    }
+    simple_types = {'timed_out': 'timed-out', 'obstructed': 'obstruct-field', 'retired_out': 'retired', 'retired_hurt': 'retired', 'handled': 'handled-ball'}
+
+    for key, pattern in patterns.items():
+        match = re.match(pattern, dismissal_string)
+        if not match:
+            continue
+
+        if key == 'caught_and_bowled':
+            return {'dismissalType': 'caught', 'bowler': match.group('bowler')}
+        elif key == 'caught':
+            return {'dismissalType': 'caught', 'bowler': match.group('bowler'), 'helpers': [match.group('catcher').replace("(sub)", "")]}
+        elif key == 'bowled':
+            return {'dismissalType': 'bowled', 'bowler': match.group('bowler')}
+        elif key == 'run_out_single':
+            return {'dismissalType': 'run-out', 'helpers': [match.group('player').replace("(sub)", "").strip()]}
+        elif key == 'run_out_dual':
+            return {'dismissalType': 'run-out', 'helpers': [match.group(group).replace("(sub)", "").strip() for group in ('player1', 'player2')]}
+        elif key == 'stumped':
+            return {'dismissalType': 'stumped', 'bowler': match.group('bowler'), 'helpers': [match.group('keeper')]}
+        elif key == 'lbw':
+            return {'dismissalType': 'lbw', 'bowler': match.group('bowler')}
+        elif key == 'hit_wicket':
+            return {'dismissalType': 'hit-wicket', 'bowler': match.group('bowler')}
+
+        return {'dismissalType': simple_types[key]}
+
+    return None
+
+def bench_dismissals(args):
+    dismissal_strings = build_dismissal_strings()
+
+    for dismissal_string in dismissal_strings:
+        dismissal = classify_dismissal(dismissal_string)
+        assert legacy_get_dismissal_data(dismissal_string) == (dismissal.to_dict() if dismissal else None), dismissal_string
+
+    runs = max(1, args.repeat // 10)
+    legacy = timeit(lambda: [legacy_get_dismissal_data(d) for d in dismissal_strings], runs) / len(dismissal_strings)
+    compiled = timeit(lambda: [classify_dismissal(d) for d in dismissal_strings], runs) / len(dismissal_strings)
+
+    print(f"{len(dismissal_strings)} dismissal strings")
+    report('get_dismissal_data (sequential regexes)', legacy)
+    report('classify_dismissal (compiled)', compiled, legacy, peak=peak_memory(lambda: [classify_dismissal(d) for d in dismissal_strings]))
+
+def load_seed_squads():
+    squads = []
+    for file_path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/squads.json')):
+        with open(file_path) as fd:
+            match_squads = json.load(fd)
+        squads.extend(match_squads[team]['players'] for team in ('homeTeam', 'awayTeam'))
+
+    return squads
+
+def legacy_get_player_id_by_name(name, lookup_data):
+    # linear substring scan, as get_player_id_by_name used to do
+    _name = name.lower()
+    for item in lookup_data:
+        if _name in item['name']:
+            return int(item['id'])
+        elif _name.split(' ')[-1] in item['name']:
+            return int(item['id'])
+
+def bench_player_names(args):
+    squads = load_seed_squads()
+    # scorecards name a player by full name or surname, e.g. 'c Ravindra Jadeja b Chahar'
+    queries = [
+        (players, [player['name'].title() for player in players] + [player['name'].split(' ')[-1].title() for player in players])
+        for players in squads
+    ]
+    lookups = sum(len(names) for _, names in queries)
+
+    def run_legacy():
+        for players, names in queries:
+            for name in names:
+                legacy_get_player_id_by_name(name, players)
+
+    def run_indexed(name_indexes):
+        for name_index, (_, names) in zip(name_indexes, queries):
+            for name in names:
+                try:
+                    name_index.lookup(name)
+                except LookupError:
+                    pass
+
+    def build_indexes():
+        return [SquadNameIndex(players) for players, _ in queries]
+
+    runs = max(1, args.repeat // 100)
+    name_indexes = build_indexes()
+    legacy = timeit(run_legacy, runs) / lookups
+    build = timeit(build_indexes, runs) / len(squads)
+    indexed = timeit(lambda: run_indexed(name_indexes), runs) / lookups
+
+    print(f"{len(squads)} squads, {lookups} name lookups")
+    report('get_player_id_by_name (linear scan)', legacy)
+    report('SquadNameIndex build (per squad)', build)
+    report('SquadNameIndex.lookup', indexed, legacy)
+
+def bench_player_resolver(args):
+    squads = load_seed_squads()
+    player_ids = [player['id'] for players in squads for player in players]
+    # a profile page round trip, shortened so the run stays quick
+    latency = 0.002
+
+    def fetch(player_id):
+        time.sleep(latency)
+        return {'id': player_id}
+
+    def run_legacy(player_registry):
+        # fetch_missing_players before: one squad at a time, one player at a time
+        for players in squads:
+            for player in players:
+                if player['id'] not in player_registry:
+                    player_registry.add(fetch(player['id']))
+
+    with tempfile.TemporaryDirectory() as base_path:
+        configure_storage(f'json:{base_path}/')
+        legacy = timeit(lambda: run_legacy(PlayerRegistry(file_path='legacy.json', flush_every=0)), 1)
+        resolved = timeit(lambda: PlayerResolver(player_registry=PlayerRegistry(file_path='resolved.json', flush_every=0)).resolve(player_ids, fetch), 1)
+
+    print(f"{len(player_ids)} squad entries, {len(set(player_ids))} distinct players, {latency * 1000:.0f} ms per fetch")
+    report('fetch_missing_players (sequential)', legacy)
+    report('PlayerResolver.resolve', resolved, legacy)
+
+def bench_commentary_writer(args):
+    innings = load_seed_commentary()
+    if not innings:
+        print(f"commentary_writer: no seeded commentary under {SEED_DATA_PATH}")
+        return
+
+    # a long Test innings: ~6 T20 innings worth of balls, produced one item at a time
+    serialized = [json.dumps(item) for commentary_list in innings[:6] for item in commentary_list]
+    def produce_items():
+        for content in serialized:
+            yield json.loads(content)
+
+    runs = max(1, args.repeat // 100)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def run_legacy():
+            commentary_data = list(produce_items())
+            with open(os.path.join(tmp_dir, 'legacy.json'), 'w') as fd:
+                json.dump(commentary_data, fd, indent=2)
+
+        writers = {
+            'JsonArrayWriter (indent=2)': ('indented.json', {}),
+            'JsonArrayWriter (compact)': ('compact.json', {'compact': True}),
+            'JsonArrayWriter (compact, gzip)': ('compact.json.gz', {'compact': True, 'compression': 'gzip'}),
+        }
+
+        print(f"{len(serialized)} commentary items")
+        legacy = timeit(run_legacy, runs)
+        report('json.dump(indent=2)', legacy, peak=peak_memory(run_legacy))
+        print(f"{'':<40} {os.path.getsize(os.path.join(tmp_dir, 'legacy.json')):>12} bytes")
+
+        for name, (file_name, options) in writers.items():
+            full_path = os.path.join(tmp_dir, file_name)
+            run = lambda: write_json_array(full_path, produce_items(), **options)
+            report(name, timeit(run, runs), legacy, peak=peak_memory(run))
+            print(f"{'':<40} {os.path.getsize(full_path):>12} bytes")
+
+def bench_columnar(args):
+    match_paths = sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/'))
+    if not match_paths:
+        print(f"columnar: no seeded matches under {SEED_DATA_PATH}")
+        return
+
+    def runs_by_batter_json():
+        # what analytics jobs do today: re-read every innings as nested dicts
+        totals = {}
+        for path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/commentary/*.json')):
+            with open(path) as fd:
+                batters = {}
+                for commentary in json.load(fd):
+                    if commentary['ballNbr'] != 0:
+                        batter = commentary['batsmanStriker']
+                        batters[batter['id']] = batter['batRuns']
+            for batter_id, runs in batters.items():
+                totals[batter_id] = totals.get(batter_id, 0) + runs
+
+        return totals
+
+    with tempfile.TemporaryDirectory() as export_path:
+        for match_path in match_paths:
+            series_id, match_id = match_path.rstrip('/').split('/')[-3], match_path.rstrip('/').split('/')[-1]
+            innings = []
+            for path in sorted(glob.glob(match_path + 'commentary/*.json')):
+                with open(path) as fd:
+                    innings.append(flatten_commentary(int(os.path.basename(path)[:-5]), commentary_from_json(json.load(fd))))
+            write_match_columns(export_path, series_id, match_id, concat_columns(innings))
+
+        def runs_by_batter_columnar():
+            balls = load_balls(export_path, columns=['batterId', 'batterRuns'])
+            if numpy is not None:
+                batter_ids, positions = numpy.unique(balls['batterId'], return_inverse=True)
+                return dict(zip(batter_ids.tolist(), numpy.bincount(positions, weights=balls['batterRuns']).astype(int).tolist()))
+
+            totals = {}
+            for batter_id, runs in zip(balls['batterId'], balls['batterRuns']):
+                totals[batter_id] = totals.get(batter_id, 0) + runs
+            return totals
+
+        assert runs_by_batter_json() == runs_by_batter_columnar()
+
+        runs = max(1, args.repeat // 100)
+        legacy = timeit(runs_by_batter_json, runs)
+        columnar = timeit(runs_by_batter_columnar, runs)
+
+    print(f"{len(match_paths)} matches, season runs by batter ({'numpy' if numpy is not None else 'array fallback'})")
+    report('commentary JSON scan', legacy)
+    report('columnar .npy scan', columnar, legacy)
+
+def bench_scorecard(args):
+    match_paths = sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/'))[:10]
+    if not match_paths:
+        print(f"scorecard: no seeded matches under {SEED_DATA_PATH}")
+        return
+
+    matches = []
+    for match_path in match_paths:
+        with open(match_path + 'matchData.json') as fd:
+            match_data = json.load(fd)
+        commentary_lists = []
+        for path in sorted(glob.glob(match_path + 'commentary/[1-9].json')):
+            with open(path) as fd:
+                commentary_lists.append((int(os.path.basename(path)[:-5]), commentary_from_json(json.load(fd))))
+        matches.append((build_scorecard_fixture(match_data), commentary_lists))
+
+    def parse_scorecards():
+        for page, _ in matches:
+            get_scorecard_innings(page)
+
+    def reconstruct_scorecards():
+        for _, commentary_lists in matches:
+            for innings_id, commentary_list in commentary_lists:
+                reconstruct_innings(flatten_commentary(innings_id, commentary_list))
+
+    runs = max(1, args.repeat // 100)
+    parse = timeit(parse_scorecards, runs) / len(matches)
+    reconstruct = timeit(reconstruct_scorecards, runs) / len(matches)
+
+    print(f"{len(matches)} matches ({'numpy' if numpy is not None else 'array fallback'}), per match")
+    report('scorecard page parse (innings only)', parse)
+    report('reconstruct from commentary', reconstruct, parse)
+
+def bench_commentary_transform(args):
+    matches = load_seed_matches()
+    payloads = [build_commentary_payload(match['seriesId'], commentary_list) for match in matches for commentary_list in match['commentary'].values()]
+    items = sum(len(payload['commentary'][0]['commentaryList']) for payload in payloads)
+
+    def run():
+        for payload in payloads:
+            transform_commentary(payload)
+
+    runs = max(1, args.repeat // 500)
+    print(f"{len(payloads)} innings payloads, {items} commentary items")
+    report('transform_commentary (per innings)', timeit(run, runs) / len(payloads), peak=peak_memory(run))
+    report('transform_commentary (per item)', timeit(run, runs) / items)
+
+def bench_match_data(args):
+    matches = load_seed_matches()[:20]
+    pages = [build_scorecard_page(match) for match in matches]
+    commentary_lists = [{innings_id: commentary_from_json(commentary_list) for innings_id, commentary_list in match['commentary'].items()} for match in matches]
+
+    def run():
+        for match, page, match_commentary in zip(matches, pages, commentary_lists):
+            transform_match_data(page, match['info'], match_commentary, match['squads'])
+
+    runs = max(1, args.repeat // 500)
+    print(f"{len(matches)} seeded matches as scorecard pages, per match")
+    report('transform_match_data', timeit(run, runs) / len(matches), peak=peak_memory(run))
+
+def retained_memory(fn):
+    # traced bytes still held by what fn returns
+    tracemalloc.start()
+    try:
+        result = fn()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+def bench_records(args):
+    contents = []
+    for path in sorted(glob.glob(SEED_DATA_PATH + 'series/*/matches/*/commentary/[1-9].json')):
+        with open(path) as fd:
+            contents.append(fd.read())
+
+    innings = [json.loads(content) for content in contents]
+    records = [commentary_from_json(commentary_list) for commentary_list in innings]
+    for commentary_list, innings_records in zip(innings, records):
+        # key for key and in the stored order, so rewritten files stay byte-identical
+        assert json.dumps(commentary_to_json(innings_records)) == json.dumps(commentary_list)
+
+    items = sum(len(commentary_list) for commentary_list in innings)
+    dicts_size, _ = retained_memory(lambda: [json.loads(content) for content in contents])
+    records_size, _ = retained_memory(lambda: [commentary_from_json(json.loads(content)) for content in contents])
+    # the containers alone, sharing the texts and numbers with `innings`
+    dict_containers_size, _ = retained_memory(lambda: [
+        [{**item, 'events': list(item['events']), 'batsmanStriker': dict(item['batsmanStriker']), 'bowlerStriker': dict(item['bowlerStriker'])} for item in commentary_list]
+        for commentary_list in innings
+    ])
+    record_containers_size, _ = retained_memory(lambda: [commentary_from_json(commentary_list) for commentary_list in innings])
+    texts_size = sum(sys.getsizeof(item['commText']) for commentary_list in innings for item in commentary_list)
+
+    print(f"{len(innings)} innings, {items} commentary items")
+    print(f"{'in-memory innings (dicts)':<40} {dicts_size / len(innings) / 1024:>12.1f} KiB/innings")
+    print(f"{'in-memory innings (records)':<40} {records_size / len(innings) / 1024:>12.1f} KiB/innings  ({dicts_size / records_size:.1f}x smaller)")
+    print(f"{'commentary texts, either way':<40} {texts_size / len(innings) / 1024:>12.1f} KiB/innings")
+    print(f"{'per-item containers (dicts)':<40} {dict_containers_size / items:>12.0f} B/item")
+    print(f"{'per-item containers (records)':<40} {record_containers_size / items:>12.0f} B/item  ({dict_containers_size / record_containers_size:.1f}x smaller)")
+    reduction = dicts_size / records_size
+    if reduction < RECORDS_MEMORY_TARGET:
+        print(f"MISSED the {RECORDS_MEMORY_TARGET:.0f}x per-innings memory target: {reduction:.1f}x")
+    else:
+        print(f"met the {RECORDS_MEMORY_TARGET:.0f}x per-innings memory target: {reduction:.1f}x")
+
+    runs = max(1, args.repeat // 500)
+    report('CommentaryItem.from_json', timeit(lambda: [commentary_from_json(commentary_list) for commentary_list in innings], runs) / items)
+    report('CommentaryItem.to_json', timeit(lambda: [commentary_to_json(innings_records) for innings_records in records], runs) / items)
+
+def bench_schemas(args):
+    artifacts = {name: [] for name in ARTIFACT_SCHEMAS}
+    for match in load_seed_matches():
+        artifacts['info.json'].append(match['info'])
+        artifacts['squads.json'].append(match['squads'])
+        artifacts['matchData.json'].append(match['matchData'])
+        artifacts['commentary'].extend(match['commentary'].values())
+
+    runs = max(1, args.repeat // 500)
+    total_bytes = 0
+    total_seconds = 0
+    print(f"{sum(len(items) for items in artifacts.values())} seeded artifacts")
+    for name, items in artifacts.items():
+        schema = ARTIFACT_SCHEMAS[name]
+        assert not any(schema(data) for data in items), name
+
+        size = sum(len(json.dumps(data)) for data in items)
+        seconds = timeit(lambda: [schema(data) for data in items], runs)
+        total_bytes += size
+        total_seconds += seconds
+        report(f'validate {name}', seconds / len(items))
+        print(f"{'':<40} {size / seconds / 1e6:>12.1f} MB/s")
+
+    print(f"{'validate all':<40} {total_seconds:>12.3f} s for {total_bytes / 1e6:.1f} MB of JSON")
+
+def load_raw_commentary_items():
+    return [
+        build_raw_commentary_item(item)
+        for match in load_seed_matches() for commentary_list in match['commentary'].values() for item in commentary_list
+    ]
+
+def legacy_format_comm_text(comm_text, formats):
+    # a str.replace per bold format id, unescaped, as format_comm_text used to do
+    for format_type in formats:
+        _format = formats[format_type]
+        if format_type == 'bold':
+            format_ids = _format['formatId']
+            format_values = _format['formatValue']
+            for i in range(len(format_ids)):
+                comm_text = comm_text.replace(format_ids[i], f"<b>{format_values[i]}</b>")
+
+    return f"<p>{comm_text}</p>"
+
+def bench_format_comm_text(args):
+    items = [(item['commText'], item['commentaryFormats']) for item in load_raw_commentary_items()]
+    for comm_text, formats in items:
+        # the two only differ where the new one escapes &, < and >, and where the old one
+        # replaced B1$ inside B10$ (previews and reports with ten or more bold runs)
+        values = ''.join(value for _format in formats.values() for value in _format['formatValue'])
+        if not HTML_ESCAPE_CHARS.search(comm_text + values) and len(formats.get('bold', {}).get('formatId', ())) < 10:
+            assert format_comm_text(comm_text, formats) == legacy_format_comm_text(comm_text, formats), comm_text
+
+    def run_legacy(items=items):
+        for comm_text, formats in items:
+            legacy_format_comm_text(comm_text, formats)
+
+    def run(items=items):
+        for comm_text, formats in items:
+            format_comm_text(comm_text, formats)
+
+    runs = max(1, args.repeat // 500)
+    characters = sum(len(comm_text) for comm_text, _ in items)
+    legacy = timeit(run_legacy, runs)
+    formatted = timeit(run, runs)
+
+    print(f"{len(items)} commentary texts, {sum(1 for _, formats in items if formats)} with formats")
+    report('format_comm_text (str.replace per id)', legacy / len(items))
+    report('format_comm_text (escaped, all types)', formatted / len(items), legacy / len(items), peak=peak_memory(run))
+    print(f"{'':<40} {characters / formatted / 1e6:>12.1f} M chars/s, {len(items) / formatted:,.0f} items/s")
+
+    # the single pass escapes every text and looks its scanner up per item, which the unescaped
+    # loop never did: it only wins once a text has several ids, so say so where it loses
+    for bucket, low, high in FORMAT_ID_BUCKETS:
+        bucket_items = [
+            (comm_text, formats) for comm_text, formats in items
+            if low <= sum(len(_format['formatId']) for _format in formats.values()) <= (high or float('inf'))
+        ]
+        legacy = timeit(lambda: run_legacy(bucket_items), runs) / len(bucket_items)
+        formatted = timeit(lambda: run(bucket_items), runs) / len(bucket_items)
+        report(f'format_comm_text {bucket} (str.replace)', legacy)
+        report(f'format_comm_text {bucket} (single pass)', formatted, legacy)
+        if formatted > legacy:
+            print(f"{'':<40} {len(bucket_items)} texts, {formatted / legacy - 1:.0%} slower than the str.replace loop")
+
+def legacy_slugify(text, delimiter='-'):
+    # slugify before the memo cache and precompiled patterns
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    text = re.sub(r'[\s_-]+', delimiter, text)
+    text = re.sub(r'[^a-z0-9-_]', '', text)
+
+    return text.strip(delimiter)
+
+def legacy_parse_ball_events(event_string):
+    # a slugify per event on every ball, as transform_commentary_item used to do
+    events = event_string.replace('NONE', '').strip()
+    if not events:
+        return []
+
+    return [_event for _event in (legacy_slugify(event, delimiter='_').upper() for event in events.split(',')) if _event in KNOWN_BALL_EVENTS]
+
+def bench_slugify(args):
+    events = [event for item in load_raw_commentary_items() for event in item['event'].replace('NONE', '').split(',') if event]
+    # a season's player profiles: a couple of styles each
+    styles = PLAYER_STYLES * 50
+    inputs = events + styles
+    for text in set(inputs) | {'Café Ñandú', ' Over_Break '}:
+        assert slugify(text) == legacy_slugify(text) and slugify(text, delimiter='_') == legacy_slugify(text, delimiter='_'), text
+
+    def run(slugify=slugify):
+        for event in events:
+            slugify(event, delimiter='_').upper()
+        for style in styles:
+            slugify(style)
+
+    runs = max(1, args.repeat // 500)
+    legacy = timeit(lambda: run(legacy_slugify), runs) / len(inputs)
+    print(f"{len(events)} ball events, {len(styles)} player styles, {len(set(inputs))} distinct inputs")
+    report('slugify (uncached)', legacy)
+    report('slugify', timeit(run, runs) / len(inputs), legacy, peak=peak_memory(run))
+
+def bench_ball_events(args):
+    event_strings = [item['event'] for item in load_raw_commentary_items()]
+    for event_string in set(event_strings):
+        assert list(parse_ball_events(event_string)[0]) == legacy_parse_ball_events(event_string), event_string
+
+    def run(parse=parse_ball_events):
+        for event_string in event_strings:
+            parse(event_string)
+
+    runs = max(1, args.repeat // 500)
+    legacy = timeit(lambda: run(legacy_parse_ball_events), runs) / len(event_strings)
+    print(f"{len(event_strings)} balls, {len(set(event_strings))} distinct event strings")
+    report('ball events (slugify per event)', legacy)
+    report('ball events (lookup)', timeit(run, runs) / len(event_strings), legacy, peak=peak_memory(run))
+
+def bench_ball_num_to_overs(args):
+    ball_nbrs = [item['ballNbr'] for commentary_list in load_seed_commentary() for item in commentary_list]
+
+    def run():
+        for ball_nbr in ball_nbrs:
+            ball_num_to_overs(ball_nbr)
+
+    runs = max(1, args.repeat // 100)
+    print(f"{len(ball_nbrs)} balls")
+    report('ball_num_to_overs', timeit(run, runs) / len(ball_nbrs), peak=peak_memory(run))
+
+def bench_set_file_data(args):
+    matches = load_seed_matches()[:10]
+    artifacts = []
+    for match in matches:
+        match_path = f"series/{match['seriesId']}/matches/{match['info']['id']}/"
+        artifacts.append((match_path + 'matchData.json', match['matchData']))
+        artifacts.extend((f"{match_path}commentary/{innings_id}.json", commentary_list) for innings_id, commentary_list in match['commentary'].items())
+
+    runs = max(1, args.repeat // 500)
+    print(f"{len(artifacts)} artifacts from {len(matches)} matches, per artifact")
+    with tempfile.TemporaryDirectory() as base_path:
+        for name, options in (('set_file_data (indent=2)', {}), ('set_file_data (compact)', {'compact': True})):
+            configure_storage(f'json:{base_path}/', **options)
+            def run():
+                for file_path, data in artifacts:
+                    set_file_data(file_path, data)
+
+            report(name, timeit(run, runs) / len(artifacts), peak=peak_memory(run))
+
+def legacy_get_timezone_from_offset(offset):
+    # linear scan over every timezone, as get_timezone_from_offset used to do
+    sign = 1 if offset[0] == '+' else -1
+    hours, minutes = map(int, offset[1:].split(':'))
+    total_offset = timedelta(hours=sign * hours, minutes=sign * minutes)
+
+    now_utc = datetime.now(timezone.utc)
+    for tz_name in pytz.all_timezones:
+        tz = pytz.timezone(tz_name)
+        if now_utc.astimezone(tz).utcoffset() == total_offset:
+            return tz_name
+
+    return "Asia/Calcutta"
+
+def bench_timezones(args):
+    repeat = args.repeat
+    def run_legacy():
+        for offset in VENUE_OFFSETS:
+            legacy_get_timezone_from_offset(offset)
+
+    def run_indexed():
+        for offset in VENUE_OFFSETS:
+            get_timezone_from_offset(offset)
+
+    # a different match day per call: only the offset's candidates are checked for DST
+    match_days = iter(date(2000, 1, 1) + timedelta(days=i) for i in range(1_000_000))
+    def run_new_day():
+        day = next(match_days)
+        for offset in VENUE_OFFSETS:
+            get_timezone_from_offset(offset, at=day)
+
+    get_offset_index.cache_clear()
+    get_offset_zones.cache_clear()
+    cold = timeit(run_indexed, 1) / len(VENUE_OFFSETS)
+    legacy = timeit(run_legacy, max(1, repeat // 100)) / len(VENUE_OFFSETS)
+    new_day = timeit(run_new_day, max(1, repeat // 100)) / len(VENUE_OFFSETS)
+    indexed = timeit(run_indexed, repeat) / len(VENUE_OFFSETS)
+
+    report('get_timezone_from_offset (linear scan)', legacy)
+    report('get_timezone_from_offset (cold index)', cold, legacy)
+    report('get_timezone_from_offset (new match day)', new_day, legacy)
+    report('get_timezone_from_offset (warm index)', indexed, legacy, peak=peak_memory(run_indexed))
+
+BENCHMARKS = {
+    'timezones': bench_timezones,
+    'ball_num_to_overs': bench_ball_num_to_overs,
+    'slugify': bench_slugify,
+    'ball_events': bench_ball_events,
+    'format_comm_text': bench_format_comm_text,
+    'commentary_transform': bench_commentary_transform,
+    'records': bench_records,
+    'schemas': bench_schemas,
+    'match_data': bench_match_data,
+    'set_file_data': bench_set_file_data,
+    'commentary_index': bench_commentary_index,
+    'html_parsing': bench_html_parsing,
+    'dismissals': bench_dismissals,
+    'player_names': bench_player_names,
+    'player_resolver': bench_player_resolver,
+    'commentary_writer': bench_commentary_writer,
+    'columnar': bench_columnar,
+    'scorecard': bench_scorecard,
+}
+
+def get_git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def read_last_run(history_path):
+    try:
+        with open(history_path) as fd:
+            lines = [line for line in fd if line.strip()]
+    except FileNotFoundError:
+        return None
+
+    return json.loads(lines[-1]) if lines else None
+
+def compare_runs(previous, current, threshold):
+    """
+    (benchmark, case, previous s/op, current s/op) for every case at least
+    `threshold` slower than in the previous run.
+    """
+    previous_results = {(result['benchmark'], result['case']): result['secondsPerOp'] for result in previous['results']}
+    regressions = []
+    for result in current:
+        before = previous_results.get((result['benchmark'], result['case']))
+        if before and result['secondsPerOp'] > before * (1 + threshold):
+            regressions.append((result['benchmark'], result['case'], before, result['secondsPerOp']))
+
+    return regressions
+
+def append_history(history_path, args):
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'revision': get_git_revision(),
+        'label': args.label,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'numpy': numpy is not None,
+        'results': results,
+    }
+    with open(history_path, 'a') as fd:
+        fd.write(json.dumps(run) + '\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for the data generation hot paths, run offline over the seeded series.')
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run, any of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--fixtures', default=None, help='directory of saved scorecard .html pages (default: synthetic pages)')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_PATH, help='JSON lines file each run is appended to')
+    parser.add_argument('--no-history', action='store_true', help="don't record this run")
+    parser.add_argument('--label', default=None, help='free-form note stored with the run, e.g. the change being measured')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD, help='flag cases this much slower than the last recorded run (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    # the transforms log every unknown ball event in the seeds
+    logging.basicConfig(level=logging.ERROR)
+
+    global current_benchmark
+    for name in args.names or BENCHMARKS:
+        current_benchmark = name
+        BENCHMARKS[name](args)
+
+    previous = read_last_run(args.history)
+    if previous:
+        regressions = compare_runs(previous, results, args.threshold)
+        print(f"\n{len(regressions)} cases slower than run {previous.get('revision') or previous['timestamp']} by more than {args.threshold:.0%}")
+        for benchmark, case, before, after in regressions:
+            print(f"  {benchmark}: {case} {before * 1e6:.2f} -> {after * 1e6:.2f} us/op")
+
+    if not args.no_history:
+        append_history(args.history, args)
+
+if __name__ == "__main__":
+    main()
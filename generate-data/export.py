@@ -0,0 +1,61 @@
+import argparse
+import logging
+import os
+from utils.columnar import COMMENTARY_PATH_PATTERN, EXPORT_FORMATS, concat_columns, flatten_commentary, write_match_columns
+from utils.records import commentary_from_json
+from utils.storage import BASE_DATA_PATH, configure_storage, get_storage
+
+DEFAULT_EXPORT_PATH = os.path.join(BASE_DATA_PATH, 'columnar')
+
+logger = logging.getLogger(__name__)
+
+def get_commentary_paths(series_ids=None):
+    """
+    Groups the stored commentary artifacts by match: {(series_id, match_id): {innings_id: path}}.
+    """
+    matches = {}
+    for path in get_storage().list_paths():
+        match = COMMENTARY_PATH_PATTERN.match(path)
+        if not match:
+            continue
+
+        series_id, match_id, innings_id = match.groups()
+        if series_ids and series_id not in series_ids:
+            continue
+
+        matches.setdefault((series_id, match_id), {})[int(innings_id)] = path
+
+    return matches
+
+def export_match(base_path, series_id, match_id, innings_paths, export_format='npy'):
+    storage = get_storage()
+    columns = concat_columns(
+        flatten_commentary(innings_id, commentary_from_json(storage.read(path)))
+        for innings_id, path in sorted(innings_paths.items())
+    )
+    write_match_columns(base_path, series_id, match_id, columns, export_format=export_format)
+
+    return len(columns['ballNbr'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Export stored commentary as one row per ball, in columnar files partitioned by series and match.')
+    parser.add_argument('--storage', default=f'json:{BASE_DATA_PATH}', help='where the scraped artifacts are, json:<dir> or sqlite:<file>')
+    parser.add_argument('--series', nargs='*', default=None, help='only these series ids')
+    parser.add_argument('--out', default=DEFAULT_EXPORT_PATH, help='export root, laid out as series=<id>/match=<id>/')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='npy', help='a .npy file per column, or balls.parquet (needs pyarrow)')
+    args = parser.parse_args()
+
+    configure_storage(args.storage)
+    matches = get_commentary_paths(set(args.series) if args.series else None)
+
+    balls = 0
+    for (series_id, match_id), innings_paths in sorted(matches.items()):
+        try:
+            balls += export_match(args.out, series_id, match_id, innings_paths, export_format=args.format)
+        except Exception as e:
+            logger.error("ERROR in export_match for match %s ==> %s", match_id, e.args)
+
+    print(f"Exported {balls} balls from {len(matches)} matches to {args.out}")
+
+if __name__ == "__main__":
+    main()
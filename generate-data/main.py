@@ -1,9 +1,37 @@
-import re
-from bs4 import BeautifulSoup
-from utils import (BALLS_IN_OVER, ball_num_to_overs, extract_number, format_comm_text, format_date, get_json_content, get_timezone_from_offset, sleep, get_param_from_url, get_html_content, slugify)
-from utils.file import (get_file_data, set_file_data)
+import argparse
+import asyncio
+import atexit
+import logging
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from utils import (BALLS_IN_OVER, ball_num_to_overs, extract_number, format_comm_text, format_date, get_json_content, get_json_if_changed, get_timezone_from_offset, get_param_from_url, get_html_content, slugify)
+from utils.archive import (ARCHIVE_MODES, configure_archive)
+from utils.cache import (DEFAULT_MAX_SIZE, DEFAULT_TTL, configure_cache, get_response_cache)
+from utils.checkpoint import (ArrayChecksum, flush_checkpoints, get_checkpoint)
+from utils.columnar import BALL_EVENTS, flatten_commentary
+from utils.commentary import build_commentary_index
+from utils.dismissals import classify_dismissal
+from utils.file import (get_file_data, set_file_data, set_file_items, set_file_records)
+from utils.html import (MATCH_SQUADS, PLAYER_PROFILE, SERIES_MATCHES_LIST, SERIES_VENUES_LIST, TEAM_PLAYERS_LIST, VENUE_CARD, get_scorecard_innings, parse_html)
+from utils.http import (DEFAULT_MAX_PER_HOST, DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, configure_http)
+from utils.jsonstream import COMPRESSIONS
+from utils.logs import (LOG_FORMATS, LOG_LEVELS, configure_logging)
+from utils.metrics import (configure_metrics, get_metrics, timed_stage)
+from utils.names import (AmbiguousNameError, SquadNameIndex)
+from utils.players import (DEFAULT_PLAYER_WORKERS, configure_player_resolver, get_player_registry, get_player_resolver)
+from utils.ratelimit import (DEFAULT_BURST, DEFAULT_HOST_RATE, DEFAULT_RATE, configure_rate_limit)
+from utils.records import (BatterState, BowlerState, CommentaryItem, FallOfWicket, InningsScore, commentary_from_json, iter_commentary_json)
+from utils.schemas import (VALIDATION_MODES, check_artifact, check_artifact_items, check_match_references, configure_validation)
+from utils.scorecard import (INNINGS_ID_MAP, SCORECARD_SOURCES, compare_innings, configure_scorecard, format_mismatches, get_scorecard_source, reconstruct_innings)
+from utils.storage import (BASE_DATA_PATH, configure_storage, get_storage)
+
+logger = logging.getLogger(__name__)
 
 BASE_URL = 'https://www.cricbuzz.com'
+DEFAULT_CONCURRENCY = 4
+# get_team_players refreshes stored profiles fetched longer ago than this
+TEAM_PLAYERS_MAX_AGE = 7 * 24 * 60 * 60
 
 EXTRAS_KEYS_MAP = {
     'b': 'byes',
@@ -13,28 +41,17 @@ EXTRAS_KEYS_MAP = {
     'p': 'penalties',
 }
 
-INNINGS_ID_MAP = {
-    1: 'first', 
-    2: 'second', 
-    3: 'third', 
-    4: 'fourth', 
+OVERS_MAP = {
+    "t20": 20,
+    "odi": 50,
+    "test": 0
 }
 
-KNOWN_BALL_EVENTS = { "WICKET",
-  "MAIDEN_OVER",
-  "FOUR",
-  "SIX",
-  "FIFTY",
-  "HUNDRED",
-  "UDRS",
-  "PARTNERSHIP",
-  "INJURY",
-  "TEAM_FIFTY",
-  "TEAM_HUNDRED",
-  "DROPPED",
-  "RUNOUT_MISS",
-  "HIGHSCORING_OVER",
-  "OVER_BREAK",}
+KNOWN_BALL_EVENTS = set(BALL_EVENTS)
+# raw upstream event -> canonical event, seeded with the ones that already are; slugify is only the fallback
+BALL_EVENT_LOOKUP = {event: event for event in BALL_EVENTS}
+# distinct raw event strings ('OVER_BREAK,FOUR', ...) are a few hundred at most
+BALL_EVENTS_CACHE_SIZE = 1024
 
 TIMEZONES = {
   "Europe/London",
@@ -51,35 +68,94 @@ TIMEZONES = {
   "Africa/Harare",
 }
 
+def get_match_artifact_path(series_id, match_id, name):
+    return f"series/{series_id}/matches/{match_id}/{name}"
+
+def save_match_artifact(series_id, match_id, name, data):
+    file_path = get_match_artifact_path(series_id, match_id, name)
+    check_artifact(file_path, data)
+    set_file_data(file_path=file_path, data=data)
+    get_checkpoint(series_id).mark_complete(file_path, data)
+
+def save_match_items(series_id, match_id, name, items):
+    """
+    save_match_artifact for the array artifacts (commentary), from an iterable:
+    each item is validated, checksummed and written in turn, so the list, its
+    serialized copy and the checksum input are never built whole.
+    """
+    file_path = get_match_artifact_path(series_id, match_id, name)
+    checksum = ArrayChecksum()
+    set_file_items(file_path=file_path, items=checksum.feed(check_artifact_items(file_path, items)))
+    get_checkpoint(series_id).mark_items_complete(file_path, checksum)
+
+def get_series_venue_ids(series_id):
+    html_content = get_html_content(url=BASE_URL + f'/cricket-series/{series_id}/series-slug/venues') 
+    soup = parse_html(html_content, only=SERIES_VENUES_LIST)
+    venues_list = soup.find('div', class_='cb-list-group')
+
+    venue_ids = []
+    for venue in venues_list.contents:
+        if not venue.name:
+            continue
+        
+        a_tag = venue.find('a')
+        venue_url = BASE_URL + a_tag.attrs['href']
+        venue_ids.append(get_param_from_url(venue_url, 5))
+
+    return venue_ids
+
+def get_match_start_date(match_info):
+    return datetime.fromtimestamp(match_info['startTime'] / 1000, timezone.utc)
+
+def get_series_venue_dates(series_id):
+    """
+    venue id -> start of the series' first stored match there, the day a
+    venue's UTC offset is resolved for.
+    """
+    prefix = f"series/{series_id}/matches/"
+    venue_dates = {}
+    for path in get_storage().list_paths():
+        if not (path.startswith(prefix) and path.endswith('/info.json')):
+            continue
+
+        match_info = get_file_data(file_path=path, default_data=None)
+        if not match_info:
+            continue
+
+        venue_id = str(match_info['venue'])
+        start_date = get_match_start_date(match_info)
+        if venue_id not in venue_dates or start_date < venue_dates[venue_id]:
+            venue_dates[venue_id] = start_date
+
+    return venue_dates
+
+@timed_stage()
 def get_series_venues(series_id):
+    """
+    Fetches every venue of a series into venues/index.json. Timezones are
+    resolved for the date of the first stored match at each venue, so fetch
+    the matches first; venues without one fall back to today.
+    """
     try:
         venues_file_path = 'venues/index.json'
-        existing_venues = get_file_data(file_path=venues_file_path)
-        html_content = get_html_content(url=BASE_URL + f'/cricket-series/{series_id}/series-slug/venues') 
-        soup = BeautifulSoup(html_content, 'html.parser')
-        venues_list = soup.find('div', class_='cb-list-group')
+        venues = {}
+        venue_dates = get_series_venue_dates(series_id)
 
-        for venue in venues_list.contents:
-            if not venue.name:
-                continue
-            
-            a_tag = venue.find('a')
-            venue_url = BASE_URL + a_tag.attrs['href']
-            id = get_param_from_url(venue_url, 5)
-            venue_data = get_venue(id=id)
+        for id in get_series_venue_ids(series_id):
+            venue_data = get_venue(id=id, date=venue_dates.get(str(id)))
 
             if venue_data:
-                existing_venues[venue_data['id']] = venue_data
-                
-            sleep(1)
-        set_file_data(file_path=venues_file_path, data=existing_venues)
+                venues[venue_data['id']] = venue_data
+
+        set_file_records(file_path=venues_file_path, records=venues)
     except Exception as e:
-        print("ERROR in get_series_venues ==> ", e.args)
+        logger.error("ERROR in get_series_venues ==> %s", e.args)
 
-def get_venue(id):
+@timed_stage()
+def get_venue(id, date=None):
     try:
         url = BASE_URL + f'/cricket-venues/{id}/venue-slug'
-        print(f'Fetching venue data for {id=} and {url=}')
+        logger.info("Fetching venue %s", id, extra={'url': url})
         data = {
             'id': id,
             'name': '',
@@ -88,7 +164,7 @@ def get_venue(id):
             'timezone': ''
         }
         html_content = get_html_content(url=url)
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content, only=VENUE_CARD)
         venue_card = soup.find('div', class_='cb-left cb-col-67 cb-col')
         data['name'] = next(venue_card.find('h1').stripped_strings)
         details_table = venue_card.css.select('table tr')
@@ -100,19 +176,20 @@ def get_venue(id):
                 data['country'] = location[1].strip().capitalize()
             elif tds[0].string == 'Time Zone':
                 offset = tds[1].string.replace("UTC", "").strip()
-                timezone = get_timezone_from_offset(offset=offset)
-                if timezone not in TIMEZONES:
-                    print(f"************** PLEASE ADD {timezone} TO TIMEZONES **************")
-                print("Time Zone ", offset, timezone)
-                data['timezone'] = timezone
+                tz_name = get_timezone_from_offset(offset=offset, at=date, preferred=TIMEZONES)
+                if tz_name not in TIMEZONES:
+                    logger.warning("PLEASE ADD %s TO TIMEZONES", tz_name)
+                logger.debug("Time zone %s resolved to %s", offset, tz_name)
+                data['timezone'] = tz_name
 
         return data
     except Exception as e:
-        print("ERROR in get_venue ", e.args)
+        logger.error("ERROR in get_venue ==> %s", e.args)
 
+@timed_stage()
 def get_player(id):
     try: 
-        print(f'Fetching player {id}...')
+        logger.info("Fetching player %s", id)
         ROLES_MAP = {
             'batsman': 'batter',
             'bowler': 'bowler',
@@ -138,7 +215,7 @@ def get_player(id):
         }
 
         html_content = get_html_content(url=url)
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content, only=PLAYER_PROFILE)
         name_el = soup.find('h1')
         team_el = soup.find('h3')
         data['name'] = name_el.string.strip()
@@ -170,40 +247,43 @@ def get_player(id):
 
         return data
     except Exception as e:
-        print("ERROR in get_player ", e.args)
+        logger.error("ERROR in get_player ==> %s", e.args)
 
-def get_team_players(team_ids):
+def get_team_player_ids(team_id):
+    html_content = get_html_content(url=BASE_URL + f'/cricket-team/team-slug/{team_id}/players') 
+    soup = parse_html(html_content, only=TEAM_PLAYERS_LIST)
+    container = soup.find('div', class_='cb-col-67 cb-col cb-left cb-top-zero')
+
+    player_ids = []
+    for item in container.find_all('a', class_='cb-col cb-col-50'):
+        if not item.name:
+            continue
+        
+        url = BASE_URL + item.attrs['href']
+        player_ids.append(get_param_from_url(url=url, pos=2))
+
+    return player_ids
+
+@timed_stage()
+def get_team_players(team_ids, max_age=TEAM_PLAYERS_MAX_AGE):
+    """
+    Fetches the profiles of every player of `team_ids`: unknown ones, and
+    stored ones whose meta.json fetchedAt is older than `max_age` seconds or
+    missing. max_age=None only fetches the unknown ones.
+    """
     try:
-        data_file_path = 'players/index.json'
-        existing_data = get_file_data(file_path=data_file_path)
+        # collect every team's list first so a player in several teams is fetched once
+        player_ids = []
         for team_id in team_ids:
-            html_content = get_html_content(url=BASE_URL + f'/cricket-team/team-slug/{team_id}/players') 
-            soup = BeautifulSoup(html_content, 'html.parser')
-            container = soup.find('div', class_='cb-col-67 cb-col cb-left cb-top-zero')
-
-            for item in container.find_all('a', class_='cb-col cb-col-50'):
-                if not item.name:
-                    continue
-                
-                url = BASE_URL + item.attrs['href']
-                id = get_param_from_url(url=url, pos=2)
-                data = get_player(id=id)
-
-                if data:
-                    existing_data[data['id']] = data
-                sleep(2)
-
-            sleep(5)
-        
-        set_file_data(file_path=data_file_path, data=existing_data)
+            player_ids.extend(get_team_player_ids(team_id))
+
+        fetch_missing_players(player_ids, max_age=max_age)
+        get_player_registry().flush()
     except Exception as e:
-        print("ERROR in get_team_players ==> ", e.args)
+        logger.error("ERROR in get_team_players ==> %s", e.args)
 
 def get_team_squad_players(team_player_els, attrs, team_type='homeTeam'):
     try: 
-        data_file_path = 'players/index.json'
-        existing_data = get_file_data(file_path=data_file_path)
-
         players = []
         for player in team_player_els.find_all('a'):
             if not player.name:
@@ -215,11 +295,6 @@ def get_team_squad_players(team_player_els, attrs, team_type='homeTeam'):
                 'id': player_id,
             } 
 
-            if player_id not in existing_data:
-                _player_data = get_player(id=player_id)
-                existing_data[_player_data['id']] = _player_data
-                sleep(1.5)
-
             class_ = 'cb-player-name-left' if team_type == 'homeTeam' else 'cb-player-name-right'
             player_name = next(player.select_one(f'.{class_} div').stripped_strings).strip().lower()
             match_in_el = player.select_one('.cb-plus-match-change-icon.cb-bg-min')
@@ -249,455 +324,567 @@ def get_team_squad_players(team_player_els, attrs, team_type='homeTeam'):
 
             players.append(player_data)
             
-        
-        set_file_data(file_path=data_file_path, data=existing_data)
         return players
         
     except Exception as e:
-        print("ERROR in get_team_squad_players ==> ", e.args)
+        logger.error("ERROR in get_team_squad_players ==> %s", e.args)
+
+def fetch_missing_players(player_ids, max_age=None):
+    return get_player_resolver().resolve(player_ids, lambda player_id: get_player(id=player_id), max_age=max_age)
 
-def get_match_squads(match_id, match_number=None):
+def get_squad_player_ids(squads):
+    return [player['id'] for team in ('homeTeam', 'awayTeam') for player in squads[team]['players']]
+
+@timed_stage()
+def get_match_squads(match_id, match_number=None, match_info=None, fetch_players=True):
+    """
+    Builds squads.json. `match_info` skips re-reading the match info, and
+    `fetch_players=False` leaves unknown squad players to the caller.
+    """
     try:
-        match_info = get_match_info(match_id, match_number)
+        match_info = match_info or get_match_info(match_id, match_number)
 
         url = f"{BASE_URL}/cricket-match-squads/{match_id}/match-slug"
         html_content = get_html_content(url=url)
-        soup = BeautifulSoup(html_content, 'html.parser')
-        header_els = soup.css.select('.cb-col.cb-col-100.cb-pl11-hdr.text-bold.text-center.cb-font-16')
-        
-        home_team_players = []
-        away_team_players = []
-        for header_el in header_els:
-            if not header_el.name:
-                continue
-
-            section_title = header_el.string.strip().lower()
+        squads = transform_match_squads(html_content, match_info)
+        if fetch_players:
+            fetch_missing_players(get_squad_player_ids(squads))
 
-            attrs = {}
-            if section_title == 'playing xi':
-                attrs['isPlaying'] = True
-            elif section_title == 'substitutes':
-                attrs['isInSubs'] = True
-            elif section_title == 'support staff':
-                continue
-
-            home_team_player_els = header_el.find_next_sibling('div', class_=['cb-play11-lft-col'])
-            away_team_player_els = header_el.find_next_sibling('div', class_=['cb-play11-rt-col'])
-
-            _home_team_players = get_team_squad_players(home_team_player_els, attrs=attrs, team_type='homeTeam')
-            _away_team_players = get_team_squad_players(away_team_player_els, attrs=attrs, team_type='awayTeam')
-
-            home_team_players.extend(_home_team_players)
-            away_team_players.extend(_away_team_players)
-
-        squads = {
-            'homeTeam': {
-                'teamId': match_info['homeTeam'],
-                'players': home_team_players
-            },
-            'awayTeam': {
-                'teamId': match_info['awayTeam'],
-                'players': away_team_players
-            }
-        }
-
-        set_file_data(file_path=f"series/{match_info['series']}/matches/{match_id}/squads.json", data=squads)
+        save_match_artifact(match_info['series'], match_id, 'squads.json', squads)
 
         return squads
         
     except Exception as e:
-        print("ERROR in get_match_squads ==> ", e.args)
+        logger.error("ERROR in get_match_squads ==> %s", e.args)
 
-def get_match_info(match_id, match_number=None):
-    try:
-        TOSS_DECISION_MAP = {
-            'batting': 'bat',
-            'bowling': 'bowl',
+@timed_stage()
+def transform_match_squads(html_content, match_info):
+    soup = parse_html(html_content, only=MATCH_SQUADS)
+    header_els = soup.css.select('.cb-col.cb-col-100.cb-pl11-hdr.text-bold.text-center.cb-font-16')
+    
+    home_team_players = []
+    away_team_players = []
+    for header_el in header_els:
+        if not header_el.name:
+            continue
+
+        section_title = header_el.string.strip().lower()
+
+        attrs = {}
+        if section_title == 'playing xi':
+            attrs['isPlaying'] = True
+        elif section_title == 'substitutes':
+            attrs['isInSubs'] = True
+        elif section_title == 'support staff':
+            continue
+
+        home_team_player_els = header_el.find_next_sibling('div', class_=['cb-play11-lft-col'])
+        away_team_player_els = header_el.find_next_sibling('div', class_=['cb-play11-rt-col'])
+
+        _home_team_players = get_team_squad_players(home_team_player_els, attrs=attrs, team_type='homeTeam')
+        _away_team_players = get_team_squad_players(away_team_player_els, attrs=attrs, team_type='awayTeam')
+
+        home_team_players.extend(_home_team_players)
+        away_team_players.extend(_away_team_players)
+
+    return {
+        'homeTeam': {
+            'teamId': match_info['homeTeam'],
+            'players': home_team_players
+        },
+        'awayTeam': {
+            'teamId': match_info['awayTeam'],
+            'players': away_team_players
         }
+    }
 
-        url = f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/0"
-        json_content = get_json_content(url=url)
+@timed_stage()
+def transform_match_info(json_content, match_id, match_number=None):
+    TOSS_DECISION_MAP = {
+        'batting': 'bat',
+        'bowling': 'bowl',
+    }
 
-        if json_content:
-            match_details = json_content['matchDetails']['matchHeader']
-            match_mini_score = json_content['matchDetails']['miniscore']
-            match_score_details = match_mini_score['matchScoreDetails']
+    if json_content:
+        match_details = json_content['matchDetails']['matchHeader']
+        match_mini_score = json_content['matchDetails']['miniscore']
+        match_score_details = match_mini_score['matchScoreDetails']
 
-            match_info = {
-                'id': match_id,
-            }
+        match_info = {
+            'id': match_id,
+        }
+    
+        match_info['description'] = match_details['matchDescription']
+        match_info['matchFormat'] = match_details['matchFormat'].lower()
+        match_info['matchType'] = match_details['matchType'].lower()
+        match_info['matchNumber'] = extract_number(match_details['matchDescription']) if match_number == None else match_number
+        match_info['homeTeam'] = match_details['team1']['id']
+        match_info['awayTeam'] = match_details['team2']['id']
+        match_info['series'] = match_details['seriesId']
+        match_info['venue'] = match_details['venue']['id']
+        match_info['startTime'] = match_details['matchStartTimestamp']
+        match_info['completeTime'] = match_details['matchCompleteTimestamp']
+
+        toss_winner_id =  match_details['tossResults'].get('tossWinnerId')
+        toss_decision =  match_details['tossResults'].get('decision')
         
-            match_info['description'] = match_details['matchDescription']
-            match_info['matchFormat'] = match_details['matchFormat'].lower()
-            match_info['matchType'] = match_details['matchType'].lower()
-            match_info['matchNumber'] = extract_number(match_details['matchDescription']) if match_number == None else match_number
-            match_info['homeTeam'] = match_details['team1']['id']
-            match_info['awayTeam'] = match_details['team2']['id']
-            match_info['series'] = match_details['seriesId']
-            match_info['venue'] = match_details['venue']['id']
-            match_info['startTime'] = match_details['matchStartTimestamp']
-            match_info['completeTime'] = match_details['matchCompleteTimestamp']
-
-            toss_winner_id =  match_details['tossResults'].get('tossWinnerId')
-            toss_decision =  match_details['tossResults'].get('decision')
-            
-            if toss_decision and toss_winner_id:
-                match_info['tossResults'] = {}
-                match_info['tossResults']['decision'] = TOSS_DECISION_MAP[toss_decision.lower()]
-                match_info['tossResults']['tossWinnerId'] = toss_winner_id
+        if toss_decision and toss_winner_id:
+            match_info['tossResults'] = {}
+            match_info['tossResults']['decision'] = TOSS_DECISION_MAP[toss_decision.lower()]
+            match_info['tossResults']['tossWinnerId'] = toss_winner_id
 
-            match_info['results'] = {
-                'resultType':  slugify(match_details['result']['resultType']),
-            }
+        match_info['results'] = {
+            'resultType':  slugify(match_details['result']['resultType']),
+        }
 
-            if match_info['results']['resultType'] == 'win':
-                match_info['results']['winByRuns'] = match_details['result']['winByRuns']
-                match_info['results']['winByInnings'] = match_details['result']['winByInnings']
-                match_info['results']['winningMargin'] = match_details['result']['winningMargin']
-                match_info['results']['winningTeamId'] = match_details['result']['winningteamId']
+        if match_info['results']['resultType'] == 'win':
+            match_info['results']['winByRuns'] = match_details['result']['winByRuns']
+            match_info['results']['winByInnings'] = match_details['result']['winByInnings']
+            match_info['results']['winningMargin'] = match_details['result']['winningMargin']
+            match_info['results']['winningTeamId'] = match_details['result']['winningteamId']
  
-            match_info['inningsScoreList'] = sorted(match_score_details['inningsScoreList'], key=lambda a: a['inningsId'])
-            match_info['state'] = slugify(match_details['state'])
-            match_info['status'] = match_mini_score['status']
+        match_info['inningsScoreList'] = sorted(match_score_details['inningsScoreList'], key=lambda a: a['inningsId'])
+        match_info['state'] = slugify(match_details['state'])
+        match_info['status'] = match_mini_score['status']
+
+        return match_info
+
+@timed_stage()
+def get_match_info(match_id, match_number=None):
+    try:
+        url = f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/0"
+        json_content = get_json_content(url=url)
+        match_info = transform_match_info(json_content, match_id, match_number)
 
-            set_file_data(file_path=f"series/{match_info['series']}/matches/{match_id}/info.json", data=match_info)
+        if match_info:
+            save_match_artifact(match_info['series'], match_id, 'info.json', match_info)
 
             return match_info
     except Exception as e:
-        print("ERROR in get_match_info ==> ", e.args)
-
-def get_match_data(match_id, match_number=None):
+        logger.error("ERROR in get_match_info ==> %s", e.args)
+
+def get_squad_aliases(squads):
+    # the profile names in the registry often differ from the squads page ('MS Dhoni' vs 'ms dhoni (c & wk)')
+    player_registry = get_player_registry()
+    aliases = {}
+    for player_id in get_squad_player_ids(squads):
+        player = player_registry.get(player_id)
+        if player:
+            for name in (player.get('name'), player.get('shortName')):
+                if name:
+                    aliases[name] = player_id
+
+    return aliases
+
+@timed_stage()
+def get_match_data(match_id, match_number=None, innings_ids=None, commentary_lists=None, match_info=None):
+    """
+    Builds matchData.json from the scorecard page and the innings commentary,
+    or from the commentary alone, as the configured scorecard source says.
+    `innings_ids` limits the rebuild to those innings and keeps the stored ones,
+    `commentary_lists` supplies already fetched commentary per innings id and
+    `match_info` skips re-reading the match info.
+    """
     try:
-        OVERS_MAP = {
-            "t20": 20,
-            "odi": 50,
-            "test": 0
-        }
+        scorecard_source = get_scorecard_source()
+        html_content = None
+        if scorecard_source != 'commentary':
+            html_content = get_html_content(url=f"{BASE_URL}/live-cricket-scorecard/{match_id}/match-slug")
 
-        url = f"{BASE_URL}/live-cricket-scorecard/{match_id}/match-slug"
-        html_content = get_html_content(url=url)
-        soup = BeautifulSoup(html_content, 'html.parser')
+        match_info = match_info or get_match_info(match_id, match_number)
 
-        match_info = get_match_info(match_id, match_number)
-        innings_score_list = match_info['inningsScoreList']
-        innings_data = {}
+        stored_innings = None
+        if innings_ids is not None:
+            stored_match_data = get_file_data(file_path=get_match_artifact_path(match_info['series'], match_id, 'matchData.json'))
+            stored_innings = stored_match_data.get('innings', {})
 
-        for current_innings in innings_score_list:
+        commentary_lists = dict(commentary_lists or {})
+        for current_innings in match_info['inningsScoreList']:
             innings_id = current_innings['inningsId']
-            bat_team_id = current_innings['batTeamId']
-            bowl_team_id = match_info['awayTeam'] if bat_team_id == match_info['homeTeam'] else match_info['homeTeam']
+            if innings_ids is not None and innings_id not in innings_ids:
+                continue
+            if commentary_lists.get(innings_id) is None:
+                commentary_lists[innings_id] = get_commentary(match_id=match_id, innings_id=innings_id)
 
-            commentary_list = get_commentary(match_id=match_id, innings_id=innings_id)
-            
-            innings_el = soup.find('div', id=f"innings_{innings_id}")
-            innings_items = innings_el.find_all('div', class_='cb-col', recursive=False)
-
-            batters_el = innings_items[0]
-            batters_el = batters_el.select('.cb-col.cb-col-100.cb-scrd-itms')
-
-            fall_of_wickets_map = {}
-            if len(innings_items) == 5:
-                fall_of_wickets_el = innings_items[2]
-                
-                for item in fall_of_wickets_el.find_all('span'): 
-                    id = int(get_param_from_url(item.a.attrs['href'], 2))
-                    text = item.text.strip().strip(',')
-                    text_data = text.split(' ', 1)
-                    score, wickets = text_data[0].split('-')
-                    overs = text_data[1].split(',')[-1].strip().strip(')')
-
-                    fall_of_wickets_map[id] = {
-                        'overs': float(overs),
-                        'teamScore': int(score),
-                        'teamWickets': int(wickets),
-                    }
- 
-            batters_el.pop() # did not bat
-            batters_el.pop() # total
-            extras_el = batters_el.pop()
-
-            extras_data =   { 
-                'nos': 0,
-                'wides': 0,
-                'legByes': 0,
-                'byes': 0,
-                'penalties': 0,
-            }
+        if scorecard_source == 'commentary':
+            match_data = transform_match_data_from_commentary(match_info, commentary_lists, innings_ids=innings_ids, stored_innings=stored_innings)
+        else:
+            squads = get_file_data(file_path=get_match_artifact_path(match_info['series'], match_id, 'squads.json'))
+            aliases = get_squad_aliases(squads)
 
-            extras_text = extras_el.find_all('div', class_='cb-col')[-1].string.strip().strip('(').strip(')')
+            match_data = transform_match_data(html_content, match_info, commentary_lists, squads, innings_ids=innings_ids, stored_innings=stored_innings, aliases=aliases)
+            check_match_references(get_match_artifact_path(match_info['series'], match_id, 'matchData.json'), squads, match_data)
+            if scorecard_source == 'verify':
+                verify_match_data(match_data, commentary_lists, innings_ids=innings_ids)
 
-            for extra in extras_text.split(','):
-                extra_data = extra.strip().split(' ')
-                ball = extra_data[0]
-                runs = extra_data[1] 
+        save_match_artifact(match_info['series'], match_id, 'matchData.json', match_data)
 
-                extras_data[EXTRAS_KEYS_MAP[ball]] = int(runs)
-            
-            squads = get_file_data(file_path=f"series/{match_info['series']}/matches/{match_id}/squads.json")
+        return match_data
 
-            lookup_data = squads['homeTeam']['players']
-            if bowl_team_id == squads['awayTeam']['teamId']:
-                lookup_data = squads['awayTeam']['players'] 
-            
-            batters_data = []
-
-            last_commentary_ball = None  
-            last_bowler_ids = []      
-            for i in range(len(commentary_list) - 1, -1, -1):
-                commentary = commentary_list[i]
-                if not last_commentary_ball and commentary['ballNbr'] != 0:
-                    last_commentary_ball = commentary
-
-                bowler_id =  commentary['bowlerStriker']['id']
-                if bowler_id > 0 and bowler_id not in last_bowler_ids:
-                    last_bowler_ids.append(bowler_id)
-                    if len(last_bowler_ids) == 2:
-                        break
-            
-            for batter_el in batters_el:
-                player_el_items = batter_el.select('.cb-col')
-                batter_name_el = player_el_items[0]
-                batter_name_el = batter_name_el.find('a')
-                batter_id = int(get_param_from_url(url=batter_name_el.attrs['href'], pos=2))
-                
-                runs_el = player_el_items[2]
-                runs = runs_el.string.strip()
-
-                balls_el = player_el_items[3]
-                balls = balls_el.string.strip()
-
-                fours_el = player_el_items[4]
-                fours = fours_el.string.strip()
-
-                sixes_el = player_el_items[5] 
-                sixes = sixes_el.string.strip()
-
-                dotBalls = 0
-                for i in range(len(commentary_list) - 1, -1, -1):
-                    commentary = commentary_list[i]
-                    if batter_id == commentary['batsmanStriker']['id']:
-                        dotBalls = commentary['batsmanStriker']['dotBalls']
-                        break
-
-                data = {
-                    'id': batter_id,
-                    'batRuns': int(runs),
-                    'ballsPlayed': int(balls),
-                    'dotBalls': dotBalls,
-                    'batFours': int(fours),
-                    'batSixes': int(sixes)
-                }
-
-                fall_of_wickets_data = fall_of_wickets_map.get(batter_id)
-                if fall_of_wickets_data:
-                    fall_of_wicket_el = player_el_items[1]
-                    fall_of_wicket = next(fall_of_wicket_el.stripped_strings) 
-                    dismissal_data = get_dismissal_data(fall_of_wicket)
-
-                    fall_of_wickets_data['dismissalType'] = dismissal_data['dismissalType']
-                    
-                    bowler_name = dismissal_data.get('bowler')
-                    if bowler_name:
-                        fall_of_wickets_data['bowlerId'] = get_player_id_by_name(bowler_name, lookup_data)
-
-                    helpers = dismissal_data.get('helpers', []) 
-                    fall_of_wickets_data['helpers'] = list(map(lambda helper: get_player_id_by_name(helper, lookup_data), helpers))
-    
-                    data['fallOfWicket'] = fall_of_wickets_data
-                elif last_commentary_ball['batsmanStriker']['id'] == batter_id:
-                    is_last_over_ball = (last_commentary_ball['ballNbr'] % BALLS_IN_OVER) == 0
-                    data['isStriker'] = not is_last_over_ball
-
-                batters_data.append(data)
-
-            bowlers_el = innings_items[-2]
-            bowlers_el = bowlers_el.select('.cb-col.cb-col-100.cb-scrd-itms')
-
-            bowlers_data = []
-            for bowler_el in bowlers_el:
-                player_el_items = bowler_el.select('.cb-col')
-                player_name_el = player_el_items[0]
-                player_name_el = player_name_el.find('a')
-                bowler_id = int(get_param_from_url(url=player_name_el.attrs['href'], pos=2))
-
-                overs_el = player_el_items[1]
-                overs = overs_el.string.strip()
-
-                maidens_el = player_el_items[2]
-                maidens = maidens_el.string.strip()
-
-                runs_el = player_el_items[3]
-                runs = runs_el.string.strip()
-
-                wickets_el = player_el_items[4]
-                wickets = wickets_el.string.strip()
-
-                no_balls_el = player_el_items[5]
-                no_balls = no_balls_el.string.strip()
-
-                wides_el = player_el_items[6]
-                wides = wides_el.string.strip()
-
-                data = {
-                    'id': bowler_id,
-                    'bowlOvers': float(overs),
-                    'bowlMaidens': int(maidens),
-                    'bowlRuns': int(runs),
-                    'bowlWickets': int(wickets),
-                    'bowlNoBalls': int(no_balls),
-                    'bowlWides': int(wides),
-                }
-
-                if last_bowler_ids[0] == bowler_id:
-                    data['isStriker'] = True
-                elif last_bowler_ids[1] == bowler_id:
-                    data['isNonStriker'] = True
-
-                bowlers_data.append(data)
-
-            innings_data[INNINGS_ID_MAP[innings_id]] = {
-                'teamId': bat_team_id,
-                'oversBowled': current_innings['overs'],
-                'overs': OVERS_MAP[match_info['matchFormat']],
-                'score': current_innings['score'],
-                'wickets': current_innings['wickets'],
-                'isDeclared': current_innings['isDeclared'],
-                'isFollowOn': current_innings['isFollowOn'],
-                'batters': batters_data,
-                'bowlers': bowlers_data,
-                'extras': extras_data
-            }
+    except Exception as e:
+        logger.exception("ERROR in get_match_data ==> %s", e.args)
+
+@timed_stage()
+def transform_match_data(html_content, match_info, commentary_lists, squads, innings_ids=None, stored_innings=None, aliases=None):
+    """
+    Pure part of get_match_data: scorecard page + match info + commentary per
+    innings id + squads -> matchData. Innings outside `innings_ids` are taken
+    from `stored_innings` as they are. `aliases` maps extra player names to ids
+    for resolving dismissal names.
+    """
+    innings_els = get_scorecard_innings(html_content)
+    innings_score_list = match_info['inningsScoreList']
+    innings_data = dict(stored_innings or {})
+    # each side only gets its own players' aliases, so a fielder's name can't resolve to a batter
+    name_indexes = {}
+    for team in ('homeTeam', 'awayTeam'):
+        team_ids = {int(player['id']) for player in squads[team]['players']}
+        team_aliases = {name: player_id for name, player_id in (aliases or {}).items() if int(player_id) in team_ids}
+        name_indexes[team] = SquadNameIndex(squads[team]['players'], aliases=team_aliases)
+
+    for current_innings in innings_score_list:
+        innings_id = current_innings['inningsId']
+        if innings_ids is not None and innings_id not in innings_ids:
+            continue
+
+        bat_team_id = current_innings['batTeamId']
+        bowl_team_id = match_info['awayTeam'] if bat_team_id == match_info['homeTeam'] else match_info['homeTeam']
+
+        commentary_list = commentary_lists[innings_id]
         
-        match_data = {
-            'matchId': match_info['id'],
-            'innings': innings_data,
-            'state': match_info['state'],
-            'status': match_info['status'],
-            'results': match_info['results'],
-        }
+        innings_el = innings_els[innings_id]
+        innings_items = innings_el.find_all('div', class_='cb-col', recursive=False)
 
-        if 'tossResults' in match_info:
-            match_data['tossResults'] =  match_info['tossResults']
+        batters_el = innings_items[0]
+        batters_el = batters_el.select('.cb-col.cb-col-100.cb-scrd-itms')
+
+        fall_of_wickets_map = {}
+        if len(innings_items) == 5:
+            fall_of_wickets_el = innings_items[2]
+            
+            for item in fall_of_wickets_el.find_all('span'): 
+                id = int(get_param_from_url(item.a.attrs['href'], 2))
+                text = item.text.strip().strip(',')
+                text_data = text.split(' ', 1)
+                score, wickets = text_data[0].split('-')
+                overs = text_data[1].split(',')[-1].strip().strip(')')
+
+                fall_of_wickets_map[id] = (float(overs), int(score), int(wickets))
+ 
+        batters_el.pop() # did not bat
+        batters_el.pop() # total
+        extras_el = batters_el.pop()
+
+        extras_data =   { 
+            'nos': 0,
+            'wides': 0,
+            'legByes': 0,
+            'byes': 0,
+            'penalties': 0,
+        }
 
-        set_file_data(file_path=f"series/{match_info['series']}/matches/{match_id}/matchData.json", data=match_data)
+        extras_text = extras_el.find_all('div', class_='cb-col')[-1].string.strip().strip('(').strip(')')
 
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        print("ERROR in get_match_scorecard ==> ", e.args)
+        for extra in extras_text.split(','):
+            extra_data = extra.strip().split(' ')
+            ball = extra_data[0]
+            runs = extra_data[1] 
 
-def get_player_id_by_name(name, lookup_data):
-    try:
-        _name = name.lower()
-        for item in lookup_data:
-            if _name in item['name']:
-                return int(item['id'])
-            elif _name.split(' ')[-1] in item['name']: # prone to incorrect data
-                return int(item['id'])
+            extras_data[EXTRAS_KEYS_MAP[ball]] = int(runs)
         
-    except Exception as e:
-        print("ERROR in get_player_id_by_name", e.args)
+        bowl_team = 'awayTeam' if bowl_team_id == squads['awayTeam']['teamId'] else 'homeTeam'
+        name_index = name_indexes[bowl_team]
+
+        commentary_index = build_commentary_index(commentary_list)
+        last_commentary_ball = commentary_index['last_ball']
+        current_bowler_ids = commentary_index['current_bowler_ids']
+
+        bowlers_el = innings_items[-2]
+        bowlers_el = bowlers_el.select('.cb-col.cb-col-100.cb-scrd-itms')
+
+        bowlers_data = []
+        for bowler_el in bowlers_el:
+            player_el_items = bowler_el.select('.cb-col')
+            player_name_el = player_el_items[0]
+            player_name_el = player_name_el.find('a')
+            bowler_id = int(get_param_from_url(url=player_name_el.attrs['href'], pos=2))
+
+            overs_el = player_el_items[1]
+            overs = overs_el.string.strip()
+
+            maidens_el = player_el_items[2]
+            maidens = maidens_el.string.strip()
+
+            runs_el = player_el_items[3]
+            runs = runs_el.string.strip()
+
+            wickets_el = player_el_items[4]
+            wickets = wickets_el.string.strip()
+
+            no_balls_el = player_el_items[5]
+            no_balls = no_balls_el.string.strip()
+
+            wides_el = player_el_items[6]
+            wides = wides_el.string.strip()
+
+            data = BowlerState(
+                id=bowler_id,
+                bowl_overs=float(overs),
+                bowl_maidens=int(maidens),
+                bowl_runs=int(runs),
+                bowl_wickets=int(wickets),
+                bowl_no_balls=int(no_balls),
+                bowl_wides=int(wides),
+            )
+
+            if current_bowler_ids[:1] == [bowler_id]:
+                data.is_striker = True
+            elif current_bowler_ids[1:2] == [bowler_id]:
+                data.is_non_striker = True
+
+            bowlers_data.append(data)
+
+        # a name shared by several fielding-side players is narrowed to those who bowled, then to those on the field
+        on_field_ids = {int(player['id']) for player in squads[bowl_team]['players'] if player.get('isPlaying') or player.get('isSubstitute')}
+        bowler_scopes = ({bowler.id for bowler in bowlers_data}, on_field_ids)
+        helper_scopes = (on_field_ids,)
+
+        batters_data = []
+        for batter_el in batters_el:
+            player_el_items = batter_el.select('.cb-col')
+            batter_name_el = player_el_items[0]
+            batter_name_el = batter_name_el.find('a')
+            batter_id = int(get_param_from_url(url=batter_name_el.attrs['href'], pos=2))
+            
+            runs_el = player_el_items[2]
+            runs = runs_el.string.strip()
+
+            balls_el = player_el_items[3]
+            balls = balls_el.string.strip()
+
+            fours_el = player_el_items[4]
+            fours = fours_el.string.strip()
+
+            sixes_el = player_el_items[5] 
+            sixes = sixes_el.string.strip()
+
+            batter_state = commentary_index['batters'].get(batter_id)
+
+            data = BatterState(
+                id=batter_id,
+                bat_runs=int(runs),
+                balls_played=int(balls),
+                dot_balls=batter_state.dot_balls if batter_state else 0,
+                bat_fours=int(fours),
+                bat_sixes=int(sixes),
+            )
+
+            fall_of_wickets_data = fall_of_wickets_map.get(batter_id)
+            if fall_of_wickets_data:
+                fall_of_wicket_el = player_el_items[1]
+                fall_of_wicket = next(fall_of_wicket_el.stripped_strings) 
+                dismissal_data = get_dismissal_data(fall_of_wicket)
+
+                bowler_name = dismissal_data.get('bowler')
+                helper_ids = (resolve_dismissal_name(name_index, helper, helper_scopes) for helper in dismissal_data.get('helpers', []))
+                data.fall_of_wicket = FallOfWicket(
+                    *fall_of_wickets_data,
+                    dismissal_type=dismissal_data['dismissalType'],
+                    bowler_id=resolve_dismissal_name(name_index, bowler_name, bowler_scopes) if bowler_name else None,
+                    helpers=tuple(helper_id for helper_id in helper_ids if helper_id is not None),
+                )
+            elif last_commentary_ball and last_commentary_ball.batsman_striker.id == batter_id:
+                is_last_over_ball = (last_commentary_ball.ball_nbr % BALLS_IN_OVER) == 0
+                data.is_striker = not is_last_over_ball
+
+            batters_data.append(data)
+
+        innings_data[INNINGS_ID_MAP[innings_id]] = get_innings_entry(match_info, current_innings, batters_data, bowlers_data, extras_data)
+
+    return get_match_data_entry(match_info, innings_data)
+
+def resolve_dismissal_name(name_index, name, scopes):
+    """
+    Player id of a dismissal bowler or fielder name. A name several players
+    share is narrowed with each of `scopes` (sets of player ids, narrowest
+    first) in turn. An unresolved name is logged and counted as
+    'unresolved_names', and None is returned so the rest of the scorecard is
+    still built.
+    """
+    error = None
+    for among in (None, *scopes):
+        try:
+            return name_index.lookup(name, among=among)
+        except AmbiguousNameError as e:
+            error = e
+        except LookupError as e:
+            error = e
+            break
+
+    reason = 'ambiguous' if isinstance(error, AmbiguousNameError) else 'unknown'
+    logger.warning("Unresolved dismissal name %r (%s): %s", name, reason, error)
+    get_metrics().increment('unresolved_names', reason=reason)
 
-    raise Exception(f'No match found for {name}')
+    return None
 
-def get_dismissal_data(dismissal_string):
-    # Patterns for different types of dismissals
-    patterns = {
-        'caught_and_bowled': r'c (?:and|&) b (?P<bowler>.+)',
-        'caught': r'c (?P<catcher>.+) b (?P<bowler>.+)',
-        'bowled': r'b (?P<bowler>.+)',
-        'run_out_dual': r'run out \((?P<player1>.+)/(?P<player2>.+)\)',
-        'run_out_single': r'run out \((?P<player>.+)\)',
-        'stumped': r'st (?P<keeper>.+) b (?P<bowler>.+)',
-        'lbw': r'lbw b (?P<bowler>.+)',
-        'hit_wicket': r'hit (?:wicket|wkt) b (?P<bowler>.+)',
-        'timed_out': r'timed out',
-        'obstructed': r'obs',
-        'retired_out': r'(?:retired|retd) out',
-        'retired_hurt': r'retired hurt',
-        'handled': r'handled'
+def get_innings_entry(match_info, current_innings, batters_data, bowlers_data, extras_data):
+    return InningsScore(
+        team_id=current_innings['batTeamId'],
+        overs_bowled=current_innings['overs'],
+        overs=OVERS_MAP[match_info['matchFormat']],
+        score=current_innings['score'],
+        wickets=current_innings['wickets'],
+        is_declared=current_innings['isDeclared'],
+        is_follow_on=current_innings['isFollowOn'],
+        batters=batters_data,
+        bowlers=bowlers_data,
+        extras=extras_data,
+    ).to_json()
+
+def get_match_data_entry(match_info, innings_data):
+    match_data = {
+        'matchId': match_info['id'],
+        'innings': innings_data,
+        'state': match_info['state'],
+        'status': match_info['status'],
+        'results': match_info['results'],
     }
+
+    if 'tossResults' in match_info:
+        match_data['tossResults'] =  match_info['tossResults']
+
+    return match_data
+
+@timed_stage()
+def transform_match_data_from_commentary(match_info, commentary_lists, innings_ids=None, stored_innings=None):
+    """
+    matchData rebuilt from the innings commentary alone, for when the scorecard
+    page is slow or missing. Batters who never faced a ball are left out and
+    dismissals carry no fallOfWicket details.
+    """
+    innings_data = dict(stored_innings or {})
+
+    for current_innings in match_info['inningsScoreList']:
+        innings_id = current_innings['inningsId']
+        if innings_ids is not None and innings_id not in innings_ids:
+            continue
+
+        commentary_list = commentary_lists[innings_id]
+        innings = reconstruct_innings(flatten_commentary(innings_id, commentary_list))
+        batters = [BatterState.from_json(batter) for batter in innings['batters']]
+        bowlers = [BowlerState.from_json(bowler) for bowler in innings['bowlers']]
+
+        commentary_index = build_commentary_index(commentary_list)
+        last_commentary_ball = commentary_index['last_ball']
+        current_bowler_ids = commentary_index['current_bowler_ids']
+
+        if last_commentary_ball:
+            for batter in batters:
+                if batter.id == last_commentary_ball.batsman_striker.id:
+                    batter.is_striker = (last_commentary_ball.ball_nbr % BALLS_IN_OVER) != 0
+
+        for bowler in bowlers:
+            if current_bowler_ids[:1] == [bowler.id]:
+                bowler.is_striker = True
+            elif current_bowler_ids[1:2] == [bowler.id]:
+                bowler.is_non_striker = True
+
+        innings_data[INNINGS_ID_MAP[innings_id]] = get_innings_entry(match_info, current_innings, batters, bowlers, innings['extras'])
+
+    return get_match_data_entry(match_info, innings_data)
+
+@timed_stage()
+def verify_match_data(match_data, commentary_lists, innings_ids=None):
+    """
+    Cross-checks scraped matchData against the scorecard rebuilt from commentary
+    and prints every mismatch. Returns the number of mismatched fields.
+    """
+    count = 0
+    for innings_id, commentary_list in commentary_lists.items():
+        innings_key = INNINGS_ID_MAP.get(innings_id)
+        scraped = match_data['innings'].get(innings_key)
+        if not scraped or (innings_ids is not None and innings_id not in innings_ids):
+            continue
+
+        mismatches = compare_innings(scraped, reconstruct_innings(flatten_commentary(innings_id, commentary_list)))
+        if mismatches:
+            count += len(mismatches)
+            logger.warning(format_mismatches(match_data['matchId'], innings_id, mismatches))
+
+    return count
+
+def get_dismissal_data(dismissal_string):
+    dismissal = classify_dismissal(dismissal_string)
+
+    return dismissal.to_dict() if dismissal else None
+
+@lru_cache(maxsize=BALL_EVENTS_CACHE_SIZE)
+def parse_ball_events(event_string):
+    """
+    Splits a raw commentary event string, e.g. 'OVER_BREAK,FOUR', into
+    (canonical events, raw events that aren't KNOWN_BALL_EVENTS). Cached
+    per string, as a season has only a few hundred distinct ones.
+    """
+    events = []
+    unknown_events = []
+    for event in event_string.replace('NONE', '').strip().split(','):
+        if not event:
+            continue
+
+        _event = BALL_EVENT_LOOKUP.get(event)
+        if _event is None:
+            _event = slugify(event, delimiter='_').upper()
+        if _event in KNOWN_BALL_EVENTS:
+            events.append(_event)
+        else:
+            unknown_events.append(event)
+
+    return tuple(events), tuple(unknown_events)
+
+def transform_commentary_item(commentary):
+    batter = commentary['batsmanStriker']
+    bowler = commentary['bowlerStriker']
+    events, unknown_events = parse_ball_events(commentary['event'])
+    for event in unknown_events:
+        logger.warning("Unknown ball event %s", event)
+
+    # positional, in field order: this runs for every ball
+    return CommentaryItem(
+        commentary['timestamp'],
+        format_comm_text(commentary['commText'], formats=commentary['commentaryFormats']),
+        commentary['ballNbr'],
+        ball_num_to_overs(commentary['ballNbr']),
+        events,
+        BatterState(batter['batId'], batter['batRuns'], batter['batBalls'], batter.get('batDots', 0), batter['batFours'], batter['batSixes']),
+        BowlerState(bowler['bowlId'], bowler['bowlOvs'], bowler['bowlMaidens'], bowler['bowlRuns'], bowler['bowlWkts'], bowler['bowlNoballs'], bowler['bowlWides']),
+        commentary['batTeamScore'],
+    )
+
+@timed_stage()
+def transform_commentary(json_content, after_timestamp=None):
+    """
+    Turns a full-commentary API payload into (series_id, CommentaryItem records),
+    oldest ball first. With `after_timestamp` only items newer than it are transformed.
+    """
+    series_id = json_content['matchDetails']['matchHeader']['seriesId']
+    commentary_list = json_content['commentary']
     
-    for key, pattern in patterns.items():
-        match = re.match(pattern, dismissal_string)
-        if match:
-            if key == 'caught_and_bowled':
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'caught',
-                    'bowler': bowler
-                } 
-            elif key == 'caught':
-                catcher = match.group('catcher').replace("(sub)", "")
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'caught',
-                    'bowler': bowler,
-                    'helpers': [catcher],
-                } 
-            elif key == 'bowled':
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'bowled',
-                    'bowler': bowler,
-                } 
-            elif key == 'run_out_single':
-                print(f"{match.group('player')=}")
-                player = match.group('player').replace("(sub)", "").strip()
-                return {
-                    'dismissalType': 'run-out',
-                    'helpers': [player],
-                } 
-            elif key == 'run_out_dual':
-                player1 = match.group('player1').replace("(sub)", "").strip()
-                player2 = match.group('player2').replace("(sub)", "").strip()
-                return {
-                    'dismissalType': 'run-out',
-                    'helpers': [player1, player2],
-                } 
-            elif key == 'stumped':
-                keeper = match.group('keeper')
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'stumped',
-                    'bowler':bowler,
-                    'helpers': [keeper],
-                }         
-            elif key == 'lbw':
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'lbw',
-                    'bowler':bowler,
-                } 
-            elif key == 'hit_wicket':
-                bowler = match.group('bowler')
-                return {
-                    'dismissalType': 'hit-wicket',
-                    'bowler':bowler,
-                } 
-            elif key == 'timed_out':
-                return {
-                    'dismissalType': 'timed-out',
-                } 
-            elif key == 'obstructed':
-                return { 
-                    'dismissalType': 'obstruct-field',
-                } 
-            elif key == 'retired_out':
-                return { 
-                    'dismissalType': 'retired',
-                } 
-            elif key == 'retired_hurt':
-                return { 
-                    'dismissalType': 'retired',
-                } 
-            elif key == 'handled':
-                return { 
-                    'dismissalType': 'handled-ball',
-                } 
-    
-    return None
+    if len(commentary_list) == 0:
+        raise Exception("Commentary not found!")
+
+    commentary_list = commentary_list[0]['commentaryList']
+
+    commentary_data = []
+    for i in range(len(commentary_list) - 1, -1, -1):
+        commentary = commentary_list[i]
+        if after_timestamp is not None and commentary['timestamp'] <= after_timestamp:
+            continue
+
+        commentary_data.append(transform_commentary_item(commentary))
 
+    return series_id, commentary_data
+
+@timed_stage()
 def get_commentary(match_id, innings_id):
     try:
         json_content = get_json_content(url=f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/{innings_id}")
@@ -705,113 +892,340 @@ def get_commentary(match_id, innings_id):
         if not json_content:
             raise Exception("Commentary not found!")
 
-        series_id = json_content['matchDetails']['matchHeader']['seriesId']
-        commentary_list = json_content['commentary']
+        series_id, commentary_data = transform_commentary(json_content)
+        save_match_items(series_id, match_id, f'commentary/{innings_id}.json', iter_commentary_json(commentary_data))
         
-        if len(commentary_list) == 0:
-            raise Exception("Commentary not found!")
+        return commentary_data
+    except Exception as e:
+        logger.error("ERROR in get_commentary ==> %s", e.args)
+
+def get_stored_commentary(series_id, match_id, innings_id):
+    # an innings commentary a resumed run already wrote, None when it is missing
+    stored = get_file_data(file_path=get_match_artifact_path(series_id, match_id, f'commentary/{innings_id}.json'), default_data=None)
+
+    return commentary_from_json(stored) if stored is not None else None
+
+@timed_stage()
+def refresh_commentary(match_id, innings_id, series_id, json_content=None):
+    """
+    Brings a stored innings commentary up to date, merging only the balls newer
+    than the latest stored timestamp. Returns the merged list, or None when
+    nothing changed upstream. `json_content` skips the fetch when the caller
+    already holds a fresh payload.
+    """
+    try:
+        file_path = get_match_artifact_path(series_id, match_id, f'commentary/{innings_id}.json')
+        stored = commentary_from_json(get_file_data(file_path=file_path, default_data=[]))
 
-        commentary_list = commentary_list[0]['commentaryList']
-
-        commentary_data = []
-        for i in range(len(commentary_list) - 1, -1, -1):
-            commentary = commentary_list[i]
-            batsman_striker = {
-                'id': commentary['batsmanStriker']['batId'],
-                'batRuns': commentary['batsmanStriker']['batRuns'],
-                'ballsPlayed': commentary['batsmanStriker']['batBalls'],
-                'dotBalls': commentary['batsmanStriker'].get('batDots', 0),
-                'batFours': commentary['batsmanStriker']['batFours'],
-                'batSixes': commentary['batsmanStriker']['batSixes'],
-            } 
-            bowler_striker = {
-                'id': commentary['bowlerStriker']['bowlId'],
-                'bowlOvers': commentary['bowlerStriker']['bowlOvs'],
-                'bowlMaidens': commentary['bowlerStriker']['bowlMaidens'],
-                'bowlRuns': commentary['bowlerStriker']['bowlRuns'],
-                'bowlWickets': commentary['bowlerStriker']['bowlWkts'],
-                'bowlWides': commentary['bowlerStriker']['bowlWides'],
-                'bowlNoBalls': commentary['bowlerStriker']['bowlNoballs'],
-            }
-            events = commentary['event'].replace('NONE', '').strip()
-            if events:
-                _events = events.split(",")
-                events = []
-                for event in _events:
-                    _event = slugify(event, delimiter='_').upper()
-                    if _event in KNOWN_BALL_EVENTS:
-                        events.append(_event)
-                    else:
-                        print(f"Unkown ball event {event}")
-            else:
-                events = []
+        if json_content is None:
+            changed, json_content = get_json_if_changed(url=f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/{innings_id}")
+            if not changed:
+                return None
 
-            commentary_item = {}
-            commentary_item['timestamp'] = commentary['timestamp']
-            commentary_item['commText'] = format_comm_text(commentary['commText'], formats=commentary['commentaryFormats'])
-            commentary_item['ballNbr'] = commentary['ballNbr']
-            commentary_item['overs'] = ball_num_to_overs(commentary['ballNbr'])
-            commentary_item['events'] = events
-            commentary_item['batsmanStriker'] = batsman_striker
-            commentary_item['bowlerStriker'] = bowler_striker
-            commentary_item['batTeamScore'] = commentary['batTeamScore']
+        last_timestamp = max((item.timestamp for item in stored), default=None)
+        _, new_items = transform_commentary(json_content, after_timestamp=last_timestamp)
+        if not new_items:
+            return None
 
-            commentary_data.append(commentary_item)
+        logger.info("%s new commentary items for match %s innings %s", len(new_items), match_id, innings_id)
+        commentary_data = stored + new_items
+        save_match_items(series_id, match_id, f'commentary/{innings_id}.json', iter_commentary_json(commentary_data))
 
-        set_file_data(file_path=f"series/{series_id}/matches/{match_id}/commentary/{innings_id}.json", data=commentary_data)
-        
         return commentary_data
     except Exception as e:
-        print("ERROR in get_commentary ==> ", e.args)
+        logger.error("ERROR in refresh_commentary ==> %s", e.args)
 
-def get_match(match_id, match_number=None):
+@timed_stage()
+def get_match(match_id, match_number=None, series_id=None, resume=False):
     try:
-        print(f"Fetching match {match_id}...")
+        checkpoint = get_checkpoint(series_id) if resume and series_id else None
+        if checkpoint and checkpoint.is_match_complete(match_id):
+            logger.info("Skipping match %s, already complete", match_id)
+            return
+
+        logger.info("Fetching match %s", match_id)
         match_info = get_match_info(match_id=match_id, match_number=match_number)
-        get_match_squads(match_id=match_id, match_number=match_number)
-        get_match_data(match_id=match_id, match_number=match_number)
+        checkpoint = get_checkpoint(match_info['series']) if resume else None
+
+        def is_done(name):
+            return checkpoint and checkpoint.is_complete(get_match_artifact_path(match_info['series'], match_id, name))
+
+        if not is_done('squads.json'):
+            get_match_squads(match_id=match_id, match_number=match_number, match_info=match_info)
+
+        # each innings is fetched and written once, then handed to the scorecard
+        commentary_lists = {}
+        for innings_id in get_innings_ids(match_info):
+            if not is_done(f'commentary/{innings_id}.json'):
+                commentary_lists[innings_id] = get_commentary(match_id=match_id, innings_id=innings_id)
+            elif not is_done('matchData.json'):
+                commentary_lists[innings_id] = get_stored_commentary(match_info['series'], match_id, innings_id)
+
+        if not is_done('matchData.json'):
+            get_match_data(match_id=match_id, match_number=match_number, commentary_lists=commentary_lists, match_info=match_info)
+
+        mark_match_complete(match_info)
+
+    except Exception as e:
+        logger.error("ERROR in get_match ==> %s", e.args)
+
+@timed_stage()
+def refresh_match(match_id, series_id):
+    """
+    Incremental update of a stored (usually live) match. Only innings whose
+    commentary gained new balls are merged and rebuilt in matchData.json.
+    Returns True when anything changed.
+    """
+    try:
+        info_url = f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/0"
+        changed, json_content = get_json_if_changed(url=info_url)
+        if changed:
+            stored_info = get_file_data(file_path=get_match_artifact_path(series_id, match_id, 'info.json'))
+            match_info = transform_match_info(json_content, match_id, stored_info.get('matchNumber'))
+            save_match_artifact(series_id, match_id, 'info.json', match_info)
+        else:
+            match_info = get_file_data(file_path=get_match_artifact_path(series_id, match_id, 'info.json'), default_data=None)
+
+        if not match_info:
+            raise Exception(f"No stored info for match {match_id}, fetch it with get_match first")
+
+        changed_commentary = {}
+        for innings_id in get_innings_ids(match_info):
+            # innings 0 shares its endpoint with the match info fetched above
+            if innings_id == 0 and not changed:
+                continue
+
+            innings_json = json_content if innings_id == 0 else None
+            commentary_data = refresh_commentary(match_id=match_id, innings_id=innings_id, series_id=series_id, json_content=innings_json)
+            if commentary_data is not None:
+                changed_commentary[innings_id] = commentary_data
 
-        innings_scorelist = match_info['inningsScoreList']
-        innings_ids = [0]
-        for innings in innings_scorelist:
-            innings_ids.append(innings['inningsId'])
+        changed_innings_ids = [innings_id for innings_id in changed_commentary if innings_id != 0]
+        if changed_innings_ids:
+            get_response_cache().invalidate(f"{BASE_URL}/live-cricket-scorecard/{match_id}/match-slug")
+            get_match_data(match_id=match_id, match_number=match_info['matchNumber'], innings_ids=changed_innings_ids, commentary_lists=changed_commentary)
 
-        for innings_id in innings_ids:
-            get_commentary(match_id=match_id, innings_id=innings_id)
+        mark_match_complete(match_info)
 
+        return changed or bool(changed_commentary)
     except Exception as e:
-        print("ERROR in get_match_data ==> ", e.args)
+        logger.error("ERROR in refresh_match ==> %s", e.args)
 
+    return False
 
-def get_series_matches(series_id):
+def poll_match(match_id, series_id, interval):
+    while True:
+        refresh_match(match_id=match_id, series_id=series_id)
+
+        match_info = get_file_data(file_path=get_match_artifact_path(series_id, match_id, 'info.json'))
+        if match_info.get('state') == 'complete':
+            break
+
+        time.sleep(interval)
+
+def get_innings_ids(match_info):
+    innings_ids = [0]
+    for innings in match_info['inningsScoreList']:
+        innings_ids.append(innings['inningsId'])
+
+    return innings_ids
+
+def mark_match_complete(match_info):
+    # live matches keep changing, so only finished ones are skipped on resume
+    if match_info['state'] != 'complete':
+        return
+
+    checkpoint = get_checkpoint(match_info['series'])
+    names = ['info.json', 'squads.json', 'matchData.json'] + [f'commentary/{innings_id}.json' for innings_id in get_innings_ids(match_info)]
+    for name in names:
+        if not checkpoint.is_complete(get_match_artifact_path(match_info['series'], match_info['id'], name)):
+            return
+
+    checkpoint.mark_match_complete(match_info['id'])
+
+
+@timed_stage()
+def get_series_match_ids(series_id):
+    """
+    [(match_id, match_number)] of a series, in the order of its matches page.
+    """
+    html_content = get_html_content(url=f"{BASE_URL}/cricket-series/{series_id}/series-slug/matches")
+    soup = parse_html(html_content, only=SERIES_MATCHES_LIST)
+    match_links = soup.select('.cb-bg-white.cb-col-100.cb-col.cb-hm-rght.cb-series-filters .text-hvr-underline')
+
+    return [(get_param_from_url(match_link.attrs['href'], pos=2), i) for i, match_link in enumerate(match_links, 1)]
+
+@timed_stage()
+def get_series_matches(series_id, match_ids=None, resume=False):
+    try:
+        logger.info("Fetching series %s", series_id)
+        for match_id, match_number in get_series_match_ids(series_id):
+            if match_ids is None or match_id in match_ids:
+                get_match(match_id=match_id, match_number=match_number, series_id=series_id, resume=resume)
+
+    except Exception as e:
+        logger.error("ERROR in get_series_matches ==> %s", e.args)
+
+async def get_match_async(match_id, match_number=None, series_id=None, resume=False):
     try:
-        print(f"Fetching series {series_id}...")
-        html_content = get_html_content(url=f"{BASE_URL}/cricket-series/{series_id}/series-slug/matches")
-        soup = BeautifulSoup(html_content, 'html.parser')
+        checkpoint = get_checkpoint(series_id) if resume and series_id else None
+        if checkpoint and checkpoint.is_match_complete(match_id):
+            logger.info("Skipping match %s, already complete", match_id)
+            return
+
+        logger.info("Fetching match %s", match_id)
+        match_info = await asyncio.to_thread(get_match_info, match_id, match_number)
+        checkpoint = get_checkpoint(match_info['series']) if resume else None
 
-        match_links = soup.select('.cb-bg-white.cb-col-100.cb-col.cb-hm-rght.cb-series-filters .text-hvr-underline')
+        def is_done(name):
+            return checkpoint and checkpoint.is_complete(get_match_artifact_path(match_info['series'], match_id, name))
 
-        for i, match_link in enumerate(match_links, 1):
-            match_id = get_param_from_url(match_link.attrs['href'], pos=2)
-            if match_id == '72622':
-                get_match(match_id=match_id, match_number=i)
-                sleep(1)
+        # squads and every innings first: the scorecard reads squads.json to resolve
+        # dismissal ids, and is built from the commentary fetched here
+        tasks = []
+        if not is_done('squads.json'):
+            tasks.append(asyncio.to_thread(get_match_squads, match_id, match_number, match_info))
+
+        innings_tasks = {}
+        for innings_id in get_innings_ids(match_info):
+            if not is_done(f'commentary/{innings_id}.json'):
+                innings_tasks[innings_id] = asyncio.to_thread(get_commentary, match_id, innings_id)
+            elif not is_done('matchData.json'):
+                innings_tasks[innings_id] = asyncio.to_thread(get_stored_commentary, match_info['series'], match_id, innings_id)
+
+        results = await asyncio.gather(*tasks, *innings_tasks.values())
+        commentary_lists = dict(zip(innings_tasks, results[len(tasks):]))
+
+        if not is_done('matchData.json'):
+            await asyncio.to_thread(get_match_data, match_id, match_number, commentary_lists=commentary_lists, match_info=match_info)
+
+        await asyncio.to_thread(mark_match_complete, match_info)
 
     except Exception as e:
-        print("ERROR in get_series_matches ==> ", e.args)
+        logger.error("ERROR in get_match_async ==> %s", e.args)
+
+async def get_series_matches_async(series_id, match_ids=None, concurrency=DEFAULT_CONCURRENCY, resume=False):
+    """
+    Fetches every match of a series (or only `match_ids`) with up to `concurrency`
+    matches in flight. Request pacing is left to the shared rate limiter.
+    """
+    try:
+        logger.info("Fetching series %s", series_id)
+        series_matches = await asyncio.to_thread(get_series_match_ids, series_id)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(match_id, match_number):
+            async with semaphore:
+                await get_match_async(match_id=match_id, match_number=match_number, series_id=series_id, resume=resume)
+
+        tasks = []
+        for match_id, match_number in series_matches:
+            if match_ids is None or match_id in match_ids:
+                tasks.append(run(match_id, match_number))
 
+        await asyncio.gather(*tasks)
+
+    except Exception as e:
+        logger.error("ERROR in get_series_matches_async ==> %s", e.args)
+
+def add_observability_args(parser):
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='INFO')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text', help='plain text lines, or one JSON object per line')
+    parser.add_argument('--metrics-report', default=None, help='write a JSON run report (stage timings, requests, cache hits, parse and disk time) here on exit')
+    parser.add_argument('--metrics-prometheus', default=None, help='write the run metrics in Prometheus text format here on exit')
+
+    return parser
+
+def configure_observability(args):
+    configure_logging(level=args.log_level, log_format=args.log_format)
+    configure_metrics(report_path=args.metrics_report, prometheus_path=args.metrics_prometheus)
+
+def add_run_args(parser):
+    """
+    The storage, cache, network, scorecard and logging options shared by every entry point.
+    """
+    parser.add_argument('--storage', default=f'json:{BASE_DATA_PATH}', help='where artifacts go, json:<dir> or sqlite:<file>')
+    parser.add_argument('--compact', action='store_true', help='write json artifacts without indentation, one commentary item per line')
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None, help='store json artifacts as .gz (readable by the server seeders) or .zst')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL, help='seconds a fetched response stays fresh')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_SIZE, help='max responses kept in memory')
+    parser.add_argument('--cache-dir', default=None, help='persist fetched responses to this directory')
+    parser.add_argument('--archive', default=None, help='fixture archive directory used by --archive-mode')
+    parser.add_argument('--archive-mode', choices=ARCHIVE_MODES, default=None, help='record responses into --archive, or replay them from it offline')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help='number of hosts to keep connection pools for')
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST, help='max open connections per host')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help='retries on 429/5xx before giving up')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request read timeout in seconds')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='max requests per second across all hosts')
+    parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help='max requests per second to a single host')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help='requests allowed back to back before pacing kicks in')
+    parser.add_argument('--scorecard', choices=SCORECARD_SOURCES, default='scrape', help='build matchData from the scorecard page, from commentary alone, or scrape and cross-check against commentary')
+    parser.add_argument('--resume', action='store_true', help='skip matches and artifacts the series checkpoint marks complete')
+    parser.add_argument('--player-max-age', type=float, default=None, help='refetch stored player profiles older than this many seconds, default never')
+    parser.add_argument('--player-workers', type=int, default=DEFAULT_PLAYER_WORKERS, help='player profiles fetched concurrently')
+    parser.add_argument('--validate', choices=VALIDATION_MODES, default='warn', help='check each artifact against the server schemas before writing it: skip, log violations, or refuse the write')
+
+    return add_observability_args(parser)
+
+def configure_run(args):
+    configure_observability(args)
+    configure_storage(args.storage, compact=args.compact, compression=args.compress)
+    configure_scorecard(args.scorecard)
+    configure_validation(args.validate)
+    configure_player_resolver(max_age=args.player_max_age, workers=args.player_workers)
+    configure_cache(ttl=args.cache_ttl, max_size=args.cache_size, cache_dir=args.cache_dir)
+    configure_http(
+        pool_size=args.pool_size,
+        max_per_host=args.max_per_host,
+        max_retries=args.max_retries,
+        timeout=(5, args.timeout),
+    )
+    configure_rate_limit(rate=args.rate, host_rate=args.host_rate, burst=args.burst)
+    if args.archive_mode:
+        configure_archive(path=args.archive, mode=args.archive_mode)
+
+def parse_args():
+    parser = add_run_args(argparse.ArgumentParser(description='Scrape cricbuzz data into the data/ tree.'))
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='matches fetched concurrently')
+    parser.add_argument('--refresh-match', default=None, help='incrementally update this stored match instead of a full run')
+    parser.add_argument('--series-id', default=None, help='series of --refresh-match')
+    parser.add_argument('--poll', type=float, default=None, help='with --refresh-match, keep refreshing every N seconds until the match completes')
+
+    args = parser.parse_args()
+    if args.archive_mode and not args.archive:
+        parser.error('--archive-mode needs --archive')
+    if args.refresh_match and not args.series_id:
+        parser.error('--refresh-match needs --series-id')
+    if args.poll and not args.refresh_match:
+        parser.error('--poll needs --refresh-match')
+
+    return args
 
 def main():
     try:
+        args = parse_args()
+        configure_run(args)
+
+        if args.refresh_match:
+            if args.poll:
+                poll_match(match_id=args.refresh_match, series_id=args.series_id, interval=args.poll)
+            else:
+                refresh_match(match_id=args.refresh_match, series_id=args.series_id)
+            return
+
         series_data = get_file_data(f"series/index.json")
         series_ids = list(series_data.keys())
         for series_id in series_ids:
+            # matches first: venue timezones are resolved for the date of their matches
+            asyncio.run(get_series_matches_async(series_id=series_id, concurrency=args.concurrency, resume=args.resume))
             get_series_venues(series_id=series_id)
-            # get_series_matches(series_id=series_id)
-            sleep(5)
-        
+
     except Exception as e:
-        print("ERROR in main ==> ", e.args)
+        logger.error("ERROR in main ==> %s", e.args)
+
+# dirty players and checkpoint marks are written back even if a run dies half way
+atexit.register(lambda: get_player_registry().flush())
+atexit.register(flush_checkpoints)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
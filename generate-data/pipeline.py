@@ -0,0 +1,304 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from main import (BASE_URL, add_run_args, configure_run, fetch_missing_players, get_match_artifact_path, get_series_match_ids, get_squad_aliases, get_squad_player_ids, mark_match_complete, save_match_artifact, save_match_items,
+    transform_commentary, transform_match_data, transform_match_data_from_commentary, transform_match_info, transform_match_squads,
+    verify_match_data)
+from utils import fetch_content
+from utils.checkpoint import get_checkpoint
+from utils.logs import configure_logging
+from utils.metrics import capture_metrics, get_metrics, timed_stage
+from utils.records import iter_commentary_json
+from utils.schemas import check_match_references
+from utils.scorecard import get_scorecard_source
+
+DEFAULT_FETCH_WORKERS = 4
+DONE = object()
+
+logger = logging.getLogger(__name__)
+
+@timed_stage()
+def fetch_match_bundle(match_id, match_number=None):
+    """
+    Fetch stage: downloads every raw payload a match needs and returns them as
+    bytes ready to ship to a worker. The squads page is parsed here, and its
+    unknown players fetched, so the scorecard's dismissal names can be resolved
+    against their registry aliases, as get_match_data does.
+    """
+    try:
+        scorecard_source = get_scorecard_source()
+        info_content = fetch_content(f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/0")
+        info_json = json.loads(info_content)
+        innings_list = info_json['matchDetails']['miniscore']['matchScoreDetails']['inningsScoreList']
+
+        bundle = {
+            'match_id': match_id,
+            'match_number': match_number,
+            'info': info_content,
+            'squads': None,
+            'aliases': None,
+            'scorecard': None if scorecard_source == 'commentary' else fetch_content(f"{BASE_URL}/live-cricket-scorecard/{match_id}/match-slug"),
+            'scorecard_source': scorecard_source,
+            'commentary': {0: info_content},
+            'errors': {},
+        }
+        for innings in innings_list:
+            innings_id = innings['inningsId']
+            bundle['commentary'][innings_id] = fetch_content(f"{BASE_URL}/api/cricket-match/{match_id}/full-commentary/{innings_id}")
+
+        try:
+            squads_content = fetch_content(f"{BASE_URL}/cricket-match-squads/{match_id}/match-slug")
+            squads = transform_match_squads(squads_content, transform_match_info(info_json, match_id, match_number))
+            fetch_missing_players(get_squad_player_ids(squads))
+            bundle['squads'] = squads
+            bundle['aliases'] = get_squad_aliases(squads)
+        except Exception as e:
+            logger.error("ERROR in fetch_match_bundle squads for match %s ==> %s", match_id, e.args)
+            bundle['errors']['squads.json'] = repr(e)
+
+        return bundle
+    except Exception as e:
+        logger.error("ERROR in fetch_match_bundle for match %s ==> %s", match_id, e.args)
+
+def transform_match_bundle(bundle):
+    """
+    Transform stage, run in a worker process: raw payloads -> the info, squads,
+    matchData and commentary artifacts of one match. The worker's metrics ride
+    back with the result for the parent to merge.
+    """
+    with capture_metrics() as metrics, metrics.stage('transform_match_bundle'):
+        result = transform_match_bundle_artifacts(bundle)
+
+    result['metrics'] = metrics.state()
+
+    return result
+
+def transform_bundle_match_data(bundle, match_info, commentary_lists):
+    missing_innings_ids = [innings['inningsId'] for innings in match_info['inningsScoreList'] if innings['inningsId'] not in commentary_lists]
+    if missing_innings_ids:
+        raise Exception(f"No commentary for innings {missing_innings_ids}")
+
+    if bundle['scorecard'] is None:
+        return transform_match_data_from_commentary(match_info, commentary_lists)
+
+    if bundle['squads'] is None:
+        raise Exception("No squads to resolve the scorecard names against")
+
+    match_data = transform_match_data(bundle['scorecard'], match_info, commentary_lists, bundle['squads'], aliases=bundle['aliases'])
+    if bundle['scorecard_source'] == 'verify':
+        verify_match_data(match_data, commentary_lists)
+
+    return match_data
+
+def transform_match_bundle_artifacts(bundle):
+    """
+    Transforms every artifact on its own: one that fails is left out and
+    reported in `errors`, the others are still written. matchData needs the
+    match info, and the commentary of every innings.
+    """
+    match_id = bundle['match_id']
+    errors = dict(bundle['errors'])
+    artifacts = {}
+
+    def transform(name, fn):
+        try:
+            return fn()
+        except Exception as e:
+            logger.error("ERROR transforming %s of match %s ==> %s", name, match_id, e.args)
+            get_metrics().increment('transform_errors', artifact=name.split('/')[0])
+            errors[name] = repr(e)
+
+    match_info = transform('info.json', lambda: transform_match_info(json.loads(bundle['info']), match_id, bundle['match_number']))
+    series_id = match_info['series'] if match_info else None
+    if match_info:
+        artifacts['info.json'] = match_info
+
+    commentary_lists = {}
+    for innings_id, content in bundle['commentary'].items():
+        name = f'commentary/{innings_id}.json'
+        commentary = transform(name, lambda: transform_commentary(json.loads(content)))
+        if commentary:
+            # CommentaryItems rather than their json: the writer streams them out an item at a time
+            series_id, commentary_lists[innings_id] = commentary
+            artifacts[name] = commentary_lists[innings_id]
+
+    if bundle['squads'] is not None:
+        artifacts['squads.json'] = bundle['squads']
+
+    if match_info:
+        match_data = transform('matchData.json', lambda: transform_bundle_match_data(bundle, match_info, commentary_lists))
+        if match_data:
+            artifacts['matchData.json'] = match_data
+
+    return {
+        'match_id': match_id,
+        'series_id': series_id,
+        'match_info': match_info,
+        'artifacts': artifacts,
+        'errors': errors,
+    }
+
+@timed_stage()
+def write_match_artifacts(result):
+    """
+    Writer stage: persists what was transformed of one match, each artifact on
+    its own. Returns {artifact name: error} for the ones that failed upstream
+    or here.
+    """
+    get_metrics().merge(result['metrics'])
+    match_id = result['match_id']
+    series_id = result['series_id']
+    artifacts = dict(result['artifacts'])
+    errors = dict(result['errors'])
+    if series_id is None:
+        raise Exception(f"No series id for match {match_id}, nothing transformed")
+
+    if 'squads.json' in artifacts and 'matchData.json' in artifacts:
+        try:
+            check_match_references(get_match_artifact_path(series_id, match_id, 'matchData.json'), artifacts['squads.json'], artifacts['matchData.json'])
+        except Exception as e:
+            errors['matchData.json'] = repr(e)
+            del artifacts['matchData.json']
+
+    for name, data in artifacts.items():
+        try:
+            if name.startswith('commentary/'):
+                save_match_items(series_id, match_id, name, iter_commentary_json(data))
+            else:
+                save_match_artifact(series_id, match_id, name, data)
+        except Exception as e:
+            logger.error("ERROR writing %s of match %s ==> %s", name, match_id, e.args)
+            errors[name] = repr(e)
+
+    if result['match_info']:
+        mark_match_complete(result['match_info'])
+
+    return errors
+
+def run_pipeline(matches, fetch_workers=DEFAULT_FETCH_WORKERS, transform_workers=None, log_level='INFO', log_format='text'):
+    """
+    Scrapes `matches` ([(match_id, match_number)]) through three decoupled stages:
+    fetcher threads fill a bounded queue with raw payloads, a process pool turns
+    them into artifacts, and a writer thread persists the results. Returns the
+    failures, one "<match id> <artifact>: <error>" line each.
+
+    The workers are spawned rather than forked: a fork taken while the fetcher
+    and writer threads hold locks (logging, the response cache, connection
+    pools) can leave a worker deadlocked. They set up logging with `log_level`
+    and `log_format`, as nothing else is inherited.
+    """
+    transform_workers = transform_workers or os.cpu_count()
+    raw_queue = queue.Queue(maxsize=transform_workers * 2)
+    write_queue = queue.Queue()
+    # caps payloads waiting inside the process pool, so slow transforms hold back the fetchers
+    in_flight = threading.BoundedSemaphore(transform_workers * 2)
+    failures = []
+
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is DONE:
+                return
+
+            match_id, future = item
+            try:
+                errors = write_match_artifacts(future.result())
+            except Exception as e:
+                errors = {'*': repr(e)}
+                logger.error("ERROR in pipeline writer ==> %s", e.args)
+
+            failures.extend(f"{match_id} {name}: {error}" for name, error in errors.items())
+
+    def on_transformed(match_id, future):
+        in_flight.release()
+        write_queue.put((match_id, future))
+
+    def fetcher(match_id, match_number):
+        # always answers, so the loop below never waits on a fetch that died
+        bundle = None
+        try:
+            bundle = fetch_match_bundle(match_id, match_number)
+        except Exception as e:
+            logger.error("ERROR in pipeline fetcher ==> %s", e.args)
+        raw_queue.put((match_id, bundle))
+
+    transform_pool = ProcessPoolExecutor(
+        transform_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=configure_logging,
+        initargs=(log_level, log_format),
+    )
+    writer_thread = threading.Thread(target=writer, name='pipeline-writer')
+    writer_thread.start()
+
+    try:
+        with ThreadPoolExecutor(fetch_workers) as fetch_pool, transform_pool:
+            fetches = [(match_id, fetch_pool.submit(fetcher, match_id, match_number)) for match_id, match_number in matches]
+
+            # once the pool breaks (e.g. a worker was OOM-killed) every match left is a failure:
+            # fetches not started yet are cancelled, the running ones drained so their fetchers return
+            pool_error = None
+            pending = len(matches)
+            while pending:
+                match_id, bundle = raw_queue.get()
+                pending -= 1
+                if not bundle:
+                    failures.append(f"{match_id} *: fetch failed")
+                    continue
+                if pool_error:
+                    failures.append(f"{match_id} *: {pool_error!r}")
+                    continue
+
+                in_flight.acquire()
+                try:
+                    future = transform_pool.submit(transform_match_bundle, bundle)
+                except Exception as e:
+                    in_flight.release()
+                    logger.error("ERROR in run_pipeline ==> %s", e.args)
+                    pool_error = e
+                    failures.append(f"{match_id} *: {e!r}")
+                    for fetch_match_id, fetch in fetches:
+                        if fetch.cancel():
+                            failures.append(f"{fetch_match_id} *: {e!r}")
+                            pending -= 1
+                    continue
+
+                future.add_done_callback(partial(on_transformed, match_id))
+    finally:
+        write_queue.put(DONE)
+        writer_thread.join()
+
+    return failures
+
+def main():
+    parser = add_run_args(argparse.ArgumentParser(description='Scrape a series with separate fetch, transform and write stages.'))
+    parser.add_argument('series_id')
+    parser.add_argument('--matches', nargs='*', default=None, help='only these match ids')
+    parser.add_argument('--fetch-workers', type=int, default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument('--transform-workers', type=int, default=None, help='defaults to the number of cores')
+    args = parser.parse_args()
+    if args.archive_mode and not args.archive:
+        parser.error('--archive-mode needs --archive')
+
+    configure_run(args)
+
+    matches = get_series_match_ids(args.series_id)
+    if args.matches is not None:
+        matches = [(match_id, match_number) for match_id, match_number in matches if match_id in args.matches]
+    if args.resume:
+        checkpoint = get_checkpoint(args.series_id)
+        matches = [(match_id, match_number) for match_id, match_number in matches if not checkpoint.is_match_complete(match_id)]
+
+    failures = run_pipeline(matches, fetch_workers=args.fetch_workers, transform_workers=args.transform_workers, log_level=args.log_level, log_format=args.log_format)
+    print(f"Finished {len(matches)} matches, {len(failures)} failures")
+    for failure in failures:
+        print(f"  {failure}")
+
+if __name__ == "__main__":
+    main()
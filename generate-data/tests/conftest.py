@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts import `utils` as a top-level package, so tests run with generate-data on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
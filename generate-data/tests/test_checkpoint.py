@@ -0,0 +1,61 @@
+import pytest
+
+import main
+from utils import checkpoint, schemas
+from utils.checkpoint import ArrayChecksum, get_checksum, get_items_checksum
+from utils.schemas import ArtifactValidationError
+from utils.storage import ITEMS_PAGE_SIZE, configure_storage, get_storage
+
+ITEMS = [
+    {'timestamp': 1700000000000 + i, 'overs': i / 10, 'commText': f"ball {i} & more", 'events': ['FOUR'] if i % 4 == 0 else []}
+    for i in range(25)
+]
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path, monkeypatch):
+    spec = f"json:{tmp_path}/" if request.param == 'json' else f"sqlite:{tmp_path}/corpus.db"
+    monkeypatch.setattr(checkpoint, '_checkpoints', {})
+    yield configure_storage(spec)
+    configure_storage('json:')
+
+@pytest.mark.parametrize('items', [[], ITEMS[:1], ITEMS, [{'b': 1, 'a': [2, {'d': None, 'c': 'x'}]}]])
+def test_array_checksum_matches_get_checksum(items):
+    checksum = ArrayChecksum()
+    assert list(checksum.feed(iter(items))) == items
+    assert checksum.hexdigest() == get_checksum(items)
+    assert checksum.count == len(items)
+    assert get_items_checksum(items) == get_checksum(items)
+
+def test_save_match_items_round_trip(storage):
+    main.save_match_items(7607, 1, 'commentary/1.json', iter(ITEMS))
+
+    path = main.get_match_artifact_path(7607, 1, 'commentary/1.json')
+    assert storage.read(path) == ITEMS
+    assert list(storage.iter_items(path)) == ITEMS
+    assert checkpoint.get_checkpoint(7607).is_complete(path)
+
+    # a stored copy changed behind the checkpoint's back is not complete
+    storage.write(path, ITEMS[1:])
+    assert not checkpoint.get_checkpoint(7607).is_complete(path)
+
+@pytest.mark.parametrize('count', [0, 1, ITEMS_PAGE_SIZE, ITEMS_PAGE_SIZE * 2 + 1])
+def test_write_items_replaces_a_document(storage, count):
+    items = [{'i': i} for i in range(count)]
+    storage.write('commentary/1.json', [{'old': True}])
+    storage.write_items('commentary/1.json', iter(items))
+
+    assert storage.read('commentary/1.json') == items
+    assert list(storage.iter_items('commentary/1.json')) == items
+    assert list(storage.list_paths()) == ['commentary/1.json']
+
+def test_strict_validation_keeps_stored_copy(storage, monkeypatch):
+    monkeypatch.setattr(schemas, 'validation_mode', 'strict')
+    main.save_match_items(7607, 1, 'commentary/1.json', iter(ITEMS))
+    path = main.get_match_artifact_path(7607, 1, 'commentary/1.json')
+
+    invalid = ITEMS[:10] + [{**ITEMS[10], 'overs': -1}] + ITEMS[11:]
+    with pytest.raises(ArtifactValidationError):
+        main.save_match_items(7607, 1, 'commentary/1.json', iter(invalid))
+
+    assert get_storage().read(path) == ITEMS
+    assert checkpoint.get_checkpoint(7607).is_complete(path)
@@ -0,0 +1,62 @@
+import pytest
+
+from utils.dismissals import BUILDERS, DISMISSAL_PATTERN, Dismissal, classify_dismissal
+
+# one row per DISMISSAL_PATTERN branch, plus the variants each branch accepts
+DISMISSAL_CASES = [
+    # caught_and_bowled
+    ('c and b Jadeja', Dismissal('caught', bowler='Jadeja')),
+    ('c & b Kuldeep Yadav', Dismissal('caught', bowler='Kuldeep Yadav')),
+    # caught
+    ('c Kohli b Bumrah', Dismissal('caught', bowler='Bumrah', helpers=('Kohli',))),
+    ('c Rahane (sub) b Ashwin', Dismissal('caught', bowler='Ashwin', helpers=('Rahane',))),
+    ('c (sub) Manish Pandey b Chahal', Dismissal('caught', bowler='Chahal', helpers=('Manish Pandey',))),
+    # bowled
+    ('b Starc', Dismissal('bowled', bowler='Starc')),
+    # run_out, one fielder and several
+    ('run out (Jadeja)', Dismissal('run-out', helpers=('Jadeja',))),
+    ('run out (Jadeja/Dhoni)', Dismissal('run-out', helpers=('Jadeja', 'Dhoni'))),
+    ('run out (Miller/de Kock/Rabada)', Dismissal('run-out', helpers=('Miller', 'de Kock', 'Rabada'))),
+    ('run out (Pandey (sub)/Dhoni)', Dismissal('run-out', helpers=('Pandey', 'Dhoni'))),
+    # stumped
+    ('st Dhoni b Jadeja', Dismissal('stumped', bowler='Jadeja', helpers=('Dhoni',))),
+    # lbw
+    ('lbw b Shami', Dismissal('lbw', bowler='Shami')),
+    # hit_wicket
+    ('hit wicket b Rabada', Dismissal('hit-wicket', bowler='Rabada')),
+    ('hit wkt b Rabada', Dismissal('hit-wicket', bowler='Rabada')),
+    # timed_out
+    ('timed out', Dismissal('timed-out')),
+    # obstructed
+    ('obstructing the field', Dismissal('obstruct-field')),
+    ('obstructed the field', Dismissal('obstruct-field')),
+    ('obs the field', Dismissal('obstruct-field')),
+    ('obstructing', Dismissal('obstruct-field')),
+    # retired
+    ('retired hurt', Dismissal('retired')),
+    ('retired out', Dismissal('retired')),
+    ('retired ill', Dismissal('retired')),
+    ('retired not out', Dismissal('retired')),
+    ('retd hurt', Dismissal('retired')),
+    ('retd not out', Dismissal('retired')),
+    # handled
+    ('handled the ball', Dismissal('handled-ball')),
+]
+
+@pytest.mark.parametrize('dismissal_string, expected', DISMISSAL_CASES)
+def test_classify_dismissal(dismissal_string, expected):
+    assert classify_dismissal(dismissal_string) == expected
+
+@pytest.mark.parametrize('dismissal_string', ['not out', 'batting', '', 'did not bat'])
+def test_not_a_dismissal(dismissal_string):
+    assert classify_dismissal(dismissal_string) is None
+
+def test_every_branch_is_covered():
+    covered = {DISMISSAL_PATTERN.match(dismissal_string).lastgroup for dismissal_string, _ in DISMISSAL_CASES}
+
+    assert covered == set(BUILDERS)
+
+def test_to_dict():
+    assert Dismissal('caught', bowler='Bumrah', helpers=('Kohli',)).to_dict() == {'dismissalType': 'caught', 'bowler': 'Bumrah', 'helpers': ['Kohli']}
+    assert Dismissal('run-out', helpers=('Jadeja', 'Dhoni')).to_dict() == {'dismissalType': 'run-out', 'helpers': ['Jadeja', 'Dhoni']}
+    assert Dismissal('retired').to_dict() == {'dismissalType': 'retired'}
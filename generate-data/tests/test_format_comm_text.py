@@ -0,0 +1,37 @@
+import pytest
+
+from utils import format_comm_text
+
+def bold(*pairs):
+    return {'bold': {'formatId': [format_id for format_id, _ in pairs], 'formatValue': [value for _, value in pairs]}}
+
+# (commText, commentaryFormats, expected) for each scanner get_format_scanner builds
+FORMAT_CASES = [
+    # no formats: escaping only
+    ('FOUR, through the covers', {}, '<p>FOUR, through the covers</p>'),
+    ('Kohli & Rohit <3', {}, '<p>Kohli &amp; Rohit &lt;3</p>'),
+    # one id: str.replace
+    ('B0$ What a catch!', bold(('B0$', 'OUT!')), '<p><b>OUT!</b> What a catch!</p>'),
+    ('B0$ twice B0$', bold(('B0$', 'x')), '<p><b>x</b> twice <b>x</b></p>'),
+    ('B0$ & more', bold(('B0$', 'Pitch <report>')), '<p><b>Pitch &lt;report&gt;</b> &amp; more</p>'),
+    ('no id here', bold(('B0$', 'x')), '<p>no id here</p>'),
+    # several ids: one alternation, the longer id winning
+    ('B1$ then B10$', bold(('B1$', 'one'), ('B10$', 'ten')), '<p><b>one</b> then <b>ten</b></p>'),
+    ('B0$ B1$ costs $5', bold(('B0$', 'a'), ('B1$', 'b')), '<p><b>a</b> <b>b</b> costs $5</p>'),
+    # a value is never scanned again, even when it holds an id
+    ('B0$ B1$', bold(('B0$', 'B1$'), ('B1$', 'b')), '<p><b>B1$</b> <b>b</b></p>'),
+    # every format type; types without a tag are inlined as plain text
+    (
+        'B0$ and I0$ via L0$',
+        {**bold(('B0$', 'b')), 'italic': {'formatId': ['I0$'], 'formatValue': ['i']}, 'link': {'formatId': ['L0$'], 'formatValue': ['a & b']}},
+        '<p><b>b</b> and <i>i</i> via a &amp; b</p>',
+    ),
+    # ids holding characters escaping replaces still match
+    ('x A&1$ y B0$', bold(('A&1$', 'v'), ('B0$', 'w')), '<p>x <b>v</b> y <b>w</b></p>'),
+    # ids without a value are left as they are
+    ('B0$ B1$', {'bold': {'formatId': ['B0$', 'B1$'], 'formatValue': ['a']}}, '<p><b>a</b> B1$</p>'),
+]
+
+@pytest.mark.parametrize('comm_text, formats, expected', FORMAT_CASES)
+def test_format_comm_text(comm_text, formats, expected):
+    assert format_comm_text(comm_text, formats) == expected
@@ -0,0 +1,83 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from utils import http
+from utils.ratelimit import RateLimiter
+
+class StubHandler(BaseHTTPRequestHandler):
+    # the first `failures` requests of a path get a 503, the rest a 200
+    failures = 2
+    hits = {}
+
+    def do_GET(self):
+        hits = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        status = 503 if hits <= self.failures else 200
+        body = b'ok' if status == 200 else b'busy'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_url():
+    StubHandler.hits = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class RecordingLimiter:
+    def __init__(self):
+        self.urls = []
+
+    def acquire(self, url):
+        self.urls.append(url)
+        return 0
+
+def test_retries_503_until_success(stub_url, monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(http, 'get_rate_limiter', lambda: limiter)
+    client = http.HttpClient(backoff_factor=0, backoff_jitter=0)
+
+    response = client.get(f"{stub_url}/page")
+
+    assert response.status_code == 200
+    assert response.content == b'ok'
+    assert StubHandler.hits['/page'] == 3
+    assert client.stats.to_dict()['retries'] == 2
+    # one token per retry, for the same host the caller paced the first attempt on
+    assert [urlparse(url).netloc for url in limiter.urls] == [urlparse(stub_url).netloc] * 2
+
+def test_gives_up_after_max_retries(stub_url, monkeypatch):
+    monkeypatch.setattr(http, 'get_rate_limiter', RecordingLimiter)
+    monkeypatch.setattr(StubHandler, 'failures', 10)
+    client = http.HttpClient(max_retries=3, backoff_factor=0, backoff_jitter=0)
+
+    response = client.get(f"{stub_url}/page")
+
+    assert response.status_code == 503
+    assert StubHandler.hits['/page'] == 4
+
+def test_retries_are_paced_by_the_rate_limiter(stub_url, monkeypatch):
+    limiter = RateLimiter(rate=None, host_rate=10, burst=1)
+    monkeypatch.setattr(http, 'get_rate_limiter', lambda: limiter)
+    monkeypatch.setattr(StubHandler, 'failures', 4)
+    client = http.HttpClient(backoff_factor=0, backoff_jitter=0)
+
+    start = time.monotonic()
+    response = client.get(f"{stub_url}/page")
+
+    # 4 retries at 10/s with a burst of 1: the first is free, the fourth is at least 0.3s after it.
+    # The round trips between them count towards each interval, so only some of it is sleeping.
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 0.29
+    assert limiter.waited > 0
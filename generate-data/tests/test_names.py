@@ -0,0 +1,89 @@
+import pytest
+
+from utils.names import AmbiguousNameError, SquadNameIndex, normalize_name
+
+SQUAD = [
+    {'id': 1, 'name': 'Ravindra Jadeja'},
+    {'id': 2, 'name': 'Ajay Jadeja'},
+    {'id': 3, 'name': 'MS Dhoni'},
+    {'id': 4, 'name': 'Faf du Plessis'},
+    {'id': 5, 'name': 'Quinton de Kock'},
+    {'id': 6, 'name': 'Virat Kohli'},
+    {'id': 7, 'name': 'Rohit Sharma'},
+    {'id': 8, 'name': 'Ishant Sharma'},
+    {'id': 9, 'name': 'Rassie van der Dussen'},
+]
+ALIASES = {'Jaddu': 1}
+
+# (dismissal name, among, player id or the error the lookup raises), grouped by the form that matches
+NAME_CASES = [
+    # full name and aliases
+    ('Ravindra Jadeja', None, 1),
+    ('Jaddu', None, 1),
+    ('Rohit Sharma (c)', None, 7),
+    ('MS Dhoni (wk)', None, 3),
+    # a unique full name wins even when `among` points elsewhere
+    ('Ravindra Jadeja', {2}, 1),
+    # initials + surname
+    ('R Jadeja', None, 1),
+    ('A Jadeja', None, 2),
+    ('I Sharma', None, 8),
+    ('RVD Dussen', None, 9),
+    ('R Dussen', None, 9),
+    # surname and surname suffixes
+    ('Kohli', None, 6),
+    ('Kohli (sub)', None, 6),
+    ('du Plessis', None, 4),
+    ('Plessis', None, 4),
+    ('de Kock', None, 5),
+    ('van der Düssen', None, 9),
+    ('der Dussen', None, 9),
+    # first name
+    ('Virat', None, 6),
+    # the query's own surname as the last resort
+    ('M S Dhoni', None, 3),
+    ('Quinny de Kock', None, 5),
+    # two players share the surname: ambiguous unless `among` narrows it
+    ('Jadeja', None, AmbiguousNameError),
+    ('Jadeja', {1}, 1),
+    ('Jadeja', {2, 6}, 2),
+    ('Jadeja', {1, 2}, AmbiguousNameError),
+    ('Jadeja', {6}, AmbiguousNameError),
+    ('Sharma', {8}, 8),
+    ('Sharma', set(), AmbiguousNameError),
+    ('Deepak Sharma', None, AmbiguousNameError),
+    # nobody
+    ('Smith', None, LookupError),
+    ('', None, LookupError),
+]
+
+@pytest.fixture(scope='module')
+def index():
+    return SquadNameIndex(SQUAD, aliases=ALIASES)
+
+@pytest.mark.parametrize('name, among, expected', NAME_CASES)
+def test_lookup(index, name, among, expected):
+    if isinstance(expected, type):
+        with pytest.raises(expected):
+            index.lookup(name, among=among)
+    else:
+        assert index.lookup(name, among=among) == expected
+
+def test_no_match_is_not_ambiguous(index):
+    with pytest.raises(LookupError) as error:
+        index.lookup('Smith')
+
+    assert not isinstance(error.value, AmbiguousNameError)
+
+def test_ambiguous_names_every_candidate(index):
+    with pytest.raises(AmbiguousNameError, match=r'\[1, 2\]'):
+        index.lookup('Jadeja')
+
+@pytest.mark.parametrize('name, expected', [
+    ('Rohit Sharma (c)', 'rohit sharma'),
+    ("D'Arcy Short", 'darcy short'),
+    ('Rassie van der Düssen', 'rassie van der dussen'),
+    ('  Kohli   (sub) ', 'kohli'),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
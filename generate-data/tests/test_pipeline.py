@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pipeline
+
+class BreakingPool:
+    # runs the first `healthy` transforms inline, then fails like a pool whose worker was killed
+    healthy = 1
+
+    def __init__(self, *args, **kwargs):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted > self.healthy:
+            raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+@pytest.fixture
+def stages(monkeypatch):
+    written = []
+    monkeypatch.setattr(pipeline, 'ProcessPoolExecutor', BreakingPool)
+    monkeypatch.setattr(pipeline, 'fetch_match_bundle', lambda match_id, match_number: {'match_id': match_id})
+    monkeypatch.setattr(pipeline, 'transform_match_bundle', lambda bundle: bundle)
+    monkeypatch.setattr(pipeline, 'write_match_artifacts', lambda result: written.append(result['match_id']) or {})
+
+    return written
+
+def run(matches, **kwargs):
+    # run_pipeline must return rather than hang, so it gets a thread and a deadline
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(failures=pipeline.run_pipeline(matches, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), 'run_pipeline hung'
+
+    return result['failures']
+
+def test_broken_pool_fails_the_remaining_matches(stages):
+    matches = [(str(match_id), match_id) for match_id in range(1, 21)]
+    failures = run(matches, fetch_workers=2, transform_workers=1)
+
+    assert len(stages) == 1
+    failed = sorted(failure.split(' ', 1)[0] for failure in failures)
+    assert failed == sorted(match_id for match_id, _ in matches if match_id not in stages)
+    assert all('BrokenProcessPool' in failure for failure in failures)
+
+def test_failed_fetch_is_a_failure(stages, monkeypatch):
+    def fetch_match_bundle(match_id, match_number):
+        if match_id == '2':
+            raise ConnectionError('reset')
+        return {'match_id': match_id}
+
+    monkeypatch.setattr(pipeline, 'fetch_match_bundle', fetch_match_bundle)
+    BreakingPool.healthy = 10
+    try:
+        failures = run([('1', 1), ('2', 2), ('3', 3)], fetch_workers=2, transform_workers=1)
+    finally:
+        BreakingPool.healthy = 1
+
+    assert failures == ['2 *: fetch failed']
+    assert sorted(stages) == ['1', '3']
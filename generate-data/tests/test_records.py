@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from utils.records import commentary_from_json, commentary_to_json
+
+def item(overs, bowl_overs, events):
+    return {
+        'timestamp': 1700000000000, 'commText': '<p>FOUR</p>', 'ballNbr': 1, 'overs': overs, 'events': events,
+        'batsmanStriker': {'id': 1, 'batRuns': 4, 'ballsPlayed': 1, 'dotBalls': 0, 'batFours': 1, 'batSixes': 0},
+        'bowlerStriker': {'id': 2, 'bowlOvers': bowl_overs, 'bowlMaidens': 0, 'bowlRuns': 4, 'bowlWickets': 0, 'bowlWides': 0, 'bowlNoBalls': 0},
+        'batTeamScore': 4,
+    }
+
+# shared overs and events come back as they were stored, 12 and 12.0 included
+@pytest.mark.parametrize('items', [
+    [item(12, 2, ['OVER_BREAK']), item(12.0, 2.0, ['OVER_BREAK'])],
+    [item(12.0, 2.0, []), item(12, 2, [])],
+    [item(0.1, 0.1, ['FOUR']), item(0.1, 0.1, ['FOUR', 'OVER_BREAK'])],
+])
+def test_round_trip_is_byte_identical(items):
+    records = commentary_from_json(items)
+
+    assert json.dumps(commentary_to_json(records)) == json.dumps(items)
+
+def test_repeated_values_are_shared():
+    first, second = commentary_from_json([item(0.1, 0.1, ['FOUR']), item(0.1, 0.1, ['FOUR'])])
+
+    assert first.events is second.events
+    assert first.overs is second.overs
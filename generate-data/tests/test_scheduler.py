@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from utils.scheduler import DependencyFailedError, Task, TaskScheduler
+
+def fail(message):
+    raise ValueError(message)
+
+def test_results_keyed_on_task_key():
+    scheduler = TaskScheduler()
+    scheduler.add(Task('a', 'x', lambda: 1))
+    scheduler.add(Task('b', 'x', lambda: 2, deps=['a']))
+
+    results, failures = scheduler.run()
+
+    assert results == {'a': 1, 'b': 2}
+    assert failures == {}
+
+def test_failed_task_fails_its_dependents():
+    ran = []
+    scheduler = TaskScheduler()
+    scheduler.add(Task('info', 'info', fail, args=('no info',)))
+    scheduler.add(Task('squads', 'squads', ran.append, args=('squads',), deps=['info']))
+    scheduler.add(Task('scorecard', 'scorecard', ran.append, args=('scorecard',), deps=['squads']))
+    scheduler.add(Task('venue', 'venue', ran.append, args=('venue',)))
+
+    results, failures = scheduler.run()
+
+    assert ran == ['venue']
+    assert isinstance(failures['info'], ValueError)
+    assert isinstance(failures['squads'], DependencyFailedError)
+    assert isinstance(failures['scorecard'], DependencyFailedError)
+    assert set(results) == {'venue'}
+
+def test_task_added_after_its_dependency_failed_fails():
+    scheduler = TaskScheduler()
+    scheduler.add(Task('info', 'info', fail, args=('no info',)))
+    scheduler.run()
+
+    scheduler.add(Task('squads', 'squads', lambda: 'ran', deps=['info']))
+
+    assert isinstance(scheduler.failures['squads'], DependencyFailedError)
+    assert 'squads' not in scheduler.results
+
+def test_expand_adds_follow_ups():
+    scheduler = TaskScheduler()
+    scheduler.add(Task(
+        'info', 'info', lambda: [1, 2],
+        expand=lambda innings_ids: [Task(('commentary', innings_id), 'commentary', lambda i=innings_id: i * 10, deps=['info']) for innings_id in innings_ids],
+    ))
+
+    results, failures = scheduler.run()
+
+    assert results == {'info': [1, 2], ('commentary', 1): 10, ('commentary', 2): 20}
+    assert failures == {}
+
+def test_expand_that_raises_is_only_a_failure():
+    scheduler = TaskScheduler()
+    scheduler.add(Task('info', 'info', lambda: 'info', expand=lambda result: fail('bad expand')))
+    scheduler.add(Task('squads', 'squads', lambda: 'squads', deps=['info']))
+
+    results, failures = scheduler.run()
+
+    assert 'info' not in results
+    assert isinstance(failures['info'], ValueError)
+    assert isinstance(failures['squads'], DependencyFailedError)
+    assert results == {}
+
+def test_duplicate_key_runs_once():
+    calls = Counter()
+
+    def fetch_player(player_id):
+        calls[player_id] += 1
+        return player_id
+
+    scheduler = TaskScheduler()
+    first = scheduler.add(Task(('player', '1413'), 'player', fetch_player, args=('1413',)))
+    second = scheduler.add(Task(('player', '1413'), 'player', fetch_player, args=('other',)))
+    # follow-ups from two matches asking for the same player
+    scheduler.add(Task('match-1', 'info', lambda: None, expand=lambda _: [Task(('player', '1413'), 'player', fetch_player, args=('1413',))]))
+    scheduler.add(Task('match-2', 'info', lambda: None, expand=lambda _: [Task(('player', '1413'), 'player', fetch_player, args=('1413',))]))
+
+    results, failures = scheduler.run()
+
+    assert second is first
+    assert calls == {'1413': 1}
+    assert results[('player', '1413')] == '1413'
+    assert failures == {}
+
+def test_per_type_concurrency():
+    running = Counter()
+    peak = Counter()
+    lock = threading.Lock()
+
+    def work(task_type):
+        with lock:
+            running[task_type] += 1
+            peak[task_type] = max(peak[task_type], running[task_type])
+        time.sleep(0.02)
+        with lock:
+            running[task_type] -= 1
+
+    scheduler = TaskScheduler(concurrency={'player': 3, 'scorecard': 1}, default_concurrency=2, max_workers=8)
+    for i in range(8):
+        scheduler.add(Task(('player', i), 'player', work, args=('player',)))
+        scheduler.add(Task(('scorecard', i), 'scorecard', work, args=('scorecard',)))
+        scheduler.add(Task(('venue', i), 'venue', work, args=('venue',)))
+
+    results, failures = scheduler.run()
+
+    assert len(results) == 24 and failures == {}
+    assert peak == {'player': 3, 'scorecard': 1, 'venue': 2}
+
+def test_priority_orders_ready_tasks():
+    order = []
+    scheduler = TaskScheduler(concurrency={'x': 1})
+    for key, priority in (('low', 2), ('high', 0), ('mid', 1)):
+        scheduler.add(Task(key, 'x', order.append, args=(key,), priority=priority))
+
+    scheduler.run()
+
+    assert order == ['high', 'mid', 'low']
+
+def test_missing_dependency_is_a_failure():
+    scheduler = TaskScheduler()
+    scheduler.add(Task('scorecard', 'scorecard', lambda: 'ran', deps=['never-added']))
+
+    results, failures = scheduler.run()
+
+    assert results == {}
+    assert isinstance(failures['scorecard'], DependencyFailedError)
+    assert 'never-added' in str(failures['scorecard'])
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_dependency_chain_runs_in_order(concurrency):
+    order = []
+    scheduler = TaskScheduler(default_concurrency=concurrency)
+    for i in range(5):
+        scheduler.add(Task(i, 'x', order.append, args=(i,), deps=[i - 1] if i else ()))
+
+    scheduler.run()
+
+    assert order == [0, 1, 2, 3, 4]
@@ -1,15 +1,45 @@
+import json
+import logging
 import re
+import threading
 import unicodedata
 import time
 from urllib.parse import urlparse
-import pytz
-import requests
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
+from functools import lru_cache
+# `import html` would be shadowed by the utils.html submodule
+from html import escape
+from utils.archive import get_archive
+from utils.cache import get_response_cache
+from utils.http import get_http_client
+from utils.metrics import get_endpoint_type, get_metrics
+from utils.ratelimit import get_rate_limiter
+from utils.timezones import get_timezone_from_offset
 
 BASE_URL = 'https://www.cricbuzz.com'
 BASE_DATA_PATH = 'data/'
 BALLS_IN_OVER = 6
 
+# commentaryFormats type -> tag wrapped around its values; other types are inlined as plain text
+FORMAT_TAGS = {
+    'bold': 'b',
+    'italic': 'i',
+    'underline': 'u',
+}
+# format_comm_text scanners, one per distinct set of format ids: a series has a few dozen
+FORMAT_SCANNER_CACHE_SIZE = 1024
+
+SLUG_SEPARATORS = re.compile(r'[\s_-]+')
+SLUG_INVALID_CHARS = re.compile(r'[^a-z0-9-_]')
+# slugify only ever sees ball events, player styles and match states: a few dozen distinct inputs
+SLUG_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+_url_locks = {}
+_url_locks_guard = threading.Lock()
+_validators = {}
+
 def format_date(str_date):
     input_format = "%b %d, %Y"
     output_format = "%Y-%m-%d"
@@ -27,7 +57,7 @@ def get_param_from_url(url, pos):
 
 
 def sleep(duration):
-    print(f"Sleeping for {duration} seconds...")
+    logger.debug("Sleeping for %s seconds", duration)
     time.sleep(duration)
 
 def extract_number(s):
@@ -36,27 +66,125 @@ def extract_number(s):
         return int(match.group())
     return None
 
-def get_html_content(url):
-    try:
-        response = requests.get(url=url)
+def _get_url_lock(url):
+    with _url_locks_guard:
+        lock = _url_locks.get(url)
+        if not lock:
+            lock = threading.Lock()
+            _url_locks[url] = lock
+
+        return lock
+
+def fetch_content(url):
+    metrics = get_metrics()
+    endpoint = get_endpoint_type(url)
+    cache = get_response_cache()
+    content = cache.get(url)
+    if content is not None:
+        metrics.increment('cache_lookups', endpoint=endpoint, result='hit')
+        return content
+
+    # concurrent callers of the same URL wait for the first fetch instead of repeating it
+    with _get_url_lock(url):
+        content = cache.get(url)
+        if content is not None:
+            metrics.increment('cache_lookups', endpoint=endpoint, result='hit')
+            return content
+
+        metrics.increment('cache_lookups', endpoint=endpoint, result='miss')
+        archive, archive_mode = get_archive()
+        if archive_mode == 'replay':
+            content = archive.get(url)
+            if content is None:
+                logger.error("ERROR in fetch_content ==> %s is not in the replay archive", url, extra={'url': url})
+                return None
+
+            metrics.increment('archive_reads', endpoint=endpoint)
+            cache.set(url, content)
+            return content
+
+        metrics.observe('rate_limit_wait', get_rate_limiter().acquire(url))
+        response = get_http_client().get(url=url)
 
         if response.status_code == 200:
+            cache.set(url, response.content)
+            if archive_mode == 'record':
+                archive.put(url, response.content)
             return response.content
+
+    logger.error("ERROR in fetch_content ==> %s for %s", response.status_code, url, extra={'url': url, 'status': response.status_code})
+    return None
+
+def fetch_if_changed(url):
+    """
+    Conditional GET that skips the response cache, for polling live pages.
+    Sends the ETag/Last-Modified seen on the previous poll and returns
+    (False, None) when the upstream answers 304 Not Modified.
+    """
+    archive, archive_mode = get_archive()
+    if archive_mode == 'replay':
+        content = archive.get(url)
+        return content is not None, content
+
+    headers = {}
+    validators = _validators.get(url, {})
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    get_metrics().observe('rate_limit_wait', get_rate_limiter().acquire(url))
+    response = get_http_client().get(url=url, headers=headers)
+
+    if response.status_code == 304:
+        return False, None
+
+    if response.status_code == 200:
+        _validators[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        # later plain fetches of this URL in the run see the fresh copy
+        get_response_cache().set(url, response.content)
+        if archive_mode == 'record':
+            archive.put(url, response.content)
+        return True, response.content
+
+    logger.error("ERROR in fetch_if_changed ==> %s for %s", response.status_code, url, extra={'url': url, 'status': response.status_code})
+    return False, None
+
+def get_json_if_changed(url):
+    try:
+        changed, content = fetch_if_changed(url)
+
+        if changed:
+            with get_metrics().timer('parse', format='json'):
+                return True, json.loads(content)
+
+    except Exception as e:
+        logger.error("ERROR in get_json_if_changed ==> %s", e.args)
+
+    return False, None
+
+def get_html_content(url):
+    try:
+        return fetch_content(url)
         
     except Exception as e:
-        print("ERROR in get_html_content ==> ", e.args)
+        logger.error("ERROR in get_html_content ==> %s", e.args)
 
     return None
 
 def get_json_content(url):
     try:
-        response = requests.get(url=url)
+        content = fetch_content(url)
 
-        if response.status_code == 200:
-            return response.json()
+        if content is not None:
+            with get_metrics().timer('parse', format='json'):
+                return json.loads(content)
         
     except Exception as e:
-        print("ERROR in get_html_content ==> ", e.args)
+        logger.error("ERROR in get_json_content ==> %s", e.args)
 
     return None
 
@@ -71,58 +199,117 @@ def ball_num_to_overs(ball_num):
     
     return overs + balls
 
+def get_trie_pattern(node):
+    # regex for the strings of a {char: child} trie, '' marking where one ends; shared prefixes are matched once
+    branches = [re.escape(char) + get_trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if '' in node:
+        pattern = f"(?:{pattern})?"
+
+    return pattern
+
+def render_format_value(formats, format_type, i, tag):
+    # the i-th value of a format type, escaped and wrapped in its tag; None when it has no value
+    format_values = formats[format_type]['formatValue']
+    if i >= len(format_values):
+        return None
+
+    value = format_values[i]
+    if '&' in value or '<' in value or '>' in value:
+        value = escape(value, quote=False)
+
+    return f"<{tag}>{value}</{tag}>" if tag else value
+
+@lru_cache(maxsize=FORMAT_SCANNER_CACHE_SIZE)
+def get_format_scanner(format_key):
+    """
+    The single pass over a commentary text for one set of format ids,
+    `format_key` being (format type, (format ids), ...). Returns
+    scan(comm_text, formats) for the escaped text. A lone id is one
+    str.replace; a larger set is one compiled alternation of the ids, as a
+    trie so B10$ wins over B1$. Only the ids found are rendered.
+    """
+    # the text is escaped before the scan, so the ids are looked for escaped too
+    slots = {}
+    for format_type, format_ids in zip(format_key[::2], format_key[1::2]):
+        for i, format_id in enumerate(format_ids):
+            if format_id:
+                slots.setdefault(escape(format_id, quote=False), (format_type, i, FORMAT_TAGS.get(format_type)))
+
+    if not slots:
+        return lambda comm_text, formats: comm_text
+
+    if len(slots) == 1:
+        (format_id, (format_type, i, tag)), = slots.items()
+
+        # render_format_value inlined: most items have just the one id
+        def scan(comm_text, formats):
+            format_values = formats[format_type]['formatValue']
+            if i >= len(format_values):
+                return comm_text
+
+            value = format_values[i]
+            if '&' in value or '<' in value or '>' in value:
+                value = escape(value, quote=False)
+
+            return comm_text.replace(format_id, f"<{tag}>{value}</{tag}>" if tag else value)
+
+        return scan
+
+    trie = {}
+    for format_id in slots:
+        node = trie
+        for char in format_id:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    pattern = re.compile(get_trie_pattern(trie))
+
+    def scan(comm_text, formats):
+        def replace(match):
+            value = render_format_value(formats, *slots[match[0]])
+            return match[0] if value is None else value
+
+        return pattern.sub(replace, comm_text)
+
+    return scan
+
 def format_comm_text(comm_text, formats):
-    for format_type in formats:
-        _format = formats[format_type]
-        if format_type == 'bold':
-            format_ids = _format['formatId']
-            format_values = _format['formatValue']
-            for i in range(len(format_ids)):
-                comm_text = comm_text.replace(format_ids[i], f"<b>{format_values[i]}</b>")
+    """
+    Renders a commentary text as a <p>: the text is HTML-escaped and every
+    commentaryFormats placeholder (e.g. B0$) becomes its escaped value,
+    wrapped in the tag of its type. The placeholders are replaced in one pass
+    by the scanner cached for the item's set of format ids.
+    """
+    if '&' in comm_text or '<' in comm_text or '>' in comm_text:
+        comm_text = escape(comm_text, quote=False)
+    if not formats:
+        return f"<p>{comm_text}</p>"
 
-    return f"<p>{comm_text}</p>"
+    format_key = ()
+    for format_type, _format in formats.items():
+        format_key += (format_type, tuple(_format['formatId']))
 
+    return f"<p>{get_format_scanner(format_key)(comm_text, formats)}</p>"
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
 def slugify(text, delimiter = '-'):
-    # Normalize unicode characters
-    text = unicodedata.normalize('NFKD', text)
-    text = text.encode('ascii', 'ignore').decode('ascii')
+    # Normalize unicode characters; NFKD leaves ASCII as it is
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = text.encode('ascii', 'ignore').decode('ascii')
     
     text = text.lower()
     
     # Replace spaces and underscores with hyphens
-    text = re.sub(r'[\s_-]+', delimiter, text)
+    text = SLUG_SEPARATORS.sub(delimiter, text)
     
     # Remove all characters that are not alphanumeric or hyphens
-    text = re.sub(r'[^a-z0-9-_]', '', text)
+    text = SLUG_INVALID_CHARS.sub('', text)
     
     # Remove leading and trailing hyphens
     text = text.strip(delimiter)
     
     return text
-
-def get_timezone_from_offset(offset):
-    """
-    Converts a UTC offset string (e.g., 'UTC +05:30') to a timezone name (e.g., 'Asia/Kolkata').
-
-    Args:
-    utc_offset_str (str): A string representing the UTC offset, e.g., 'UTC +05:30'.
-
-    Returns:
-    str: A timezone name corresponding to the UTC offset, or 'Unknown timezone' if not found.
-    """
-    try:
-        sign = 1 if offset[0] == '+' else -1
-        hours, minutes = map(int, offset[1:].split(':'))
-        total_offset = timedelta(hours=sign * hours, minutes=sign * minutes)
-
-        now_utc = datetime.now(timezone.utc)
-        
-        for tz_name in pytz.all_timezones:
-            tz = pytz.timezone(tz_name)
-            if now_utc.astimezone(tz).utcoffset() == total_offset:
-                return tz_name
-        
-    except Exception as e:
-        print(f"Error: {str(e)}") 
-    
-    return "Asia/Calcutta"
\ No newline at end of file
@@ -0,0 +1,97 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+class FixtureArchive:
+    """
+    Content-addressed store of raw responses for offline re-runs.
+
+    Bodies are gzip-compressed under objects/<sha[:2]>/<sha>.gz, named by the
+    sha256 of the uncompressed body, so identical pages are stored once.
+    index.json maps every recorded URL to its body hash.
+    """
+
+    def __init__(self, path, save_every=50):
+        self.path = path
+        self.index_path = os.path.join(path, 'index.json')
+        self.save_every = save_every
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.index_path, 'r') as fd:
+                self._index = json.load(fd)
+        except FileNotFoundError:
+            self._index = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], f"{digest}.gz")
+
+    def __contains__(self, url):
+        return url in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, url):
+        digest = self._index.get(url)
+        if not digest:
+            return None
+
+        with gzip.open(self._object_path(digest), 'rb') as fd:
+            return fd.read()
+
+    def put(self, url, content):
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb') as fd:
+                fd.write(content)
+            os.replace(tmp_path, object_path)
+
+        with self._lock:
+            self._index[url] = digest
+            self._unsaved += 1
+            if self._unsaved < self.save_every:
+                return
+
+        self.save()
+
+    def save(self):
+        with self._lock:
+            self._unsaved = 0
+            os.makedirs(self.path, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w') as fd:
+                json.dump(self._index, fd, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+ARCHIVE_MODES = ('record', 'replay')
+
+archive = None
+archive_mode = None
+
+def configure_archive(path, mode):
+    """
+    mode 'record' stores every response fetched from the network in the archive at `path`;
+    mode 'replay' serves every fetch from it and never touches the network.
+    """
+    global archive, archive_mode
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unknown archive mode {mode!r}, expected one of {', '.join(ARCHIVE_MODES)}")
+
+    archive = FixtureArchive(path)
+    archive_mode = mode
+    if mode == 'record':
+        atexit.register(archive.save)
+
+    return archive
+
+def get_archive():
+    return archive, archive_mode
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_SIZE = 512
+
+class ResponseCache:
+    """
+    LRU cache of raw response bodies keyed on URL.
+
+    Entries expire after `ttl` seconds (None keeps them for the whole run) and the
+    least recently used entry is evicted once `max_size` entries are held. When
+    `cache_dir` is set every entry is also persisted to disk so later runs can
+    reuse it while it is still fresh.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, cache_dir=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _is_fresh(self, stored_at):
+        return self.ttl is None or (time.time() - stored_at) < self.ttl
+
+    def _disk_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_disk(self, url):
+        try:
+            path = self._disk_path(url)
+            stored_at = os.path.getmtime(path)
+            if not self._is_fresh(stored_at):
+                return None
+
+            with open(path, 'rb') as fd:
+                return stored_at, fd.read()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error("ERROR in ResponseCache._read_disk ==> %s", e.args)
+
+        return None
+
+    def _write_disk(self, url, content):
+        try:
+            path = self._disk_path(url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as fd:
+                fd.write(content)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error("ERROR in ResponseCache._write_disk ==> %s", e.args)
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and self._is_fresh(entry[0]):
+                self._entries.move_to_end(url)
+                self.hits += 1
+                return entry[1]
+
+            if entry:
+                del self._entries[url]
+
+        if self.cache_dir:
+            entry = self._read_disk(url)
+            if entry:
+                with self._lock:
+                    self._store(url, entry)
+                    self.hits += 1
+                return entry[1]
+
+        with self._lock:
+            self.misses += 1
+
+        return None
+
+    def set(self, url, content):
+        with self._lock:
+            self._store(url, (time.time(), content))
+
+        if self.cache_dir:
+            self._write_disk(url, content)
+
+    def _store(self, url, entry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while self.max_size and len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+
+        if self.cache_dir:
+            try:
+                os.remove(self._disk_path(url))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+response_cache = ResponseCache()
+
+def configure_cache(ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, cache_dir=None):
+    global response_cache
+    response_cache = ResponseCache(ttl=ttl, max_size=max_size, cache_dir=cache_dir)
+
+    return response_cache
+
+def get_response_cache():
+    return response_cache
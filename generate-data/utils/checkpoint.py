@@ -0,0 +1,150 @@
+import hashlib
+import json
+import threading
+import time
+from utils.storage import get_storage
+
+# artifact marks held in memory before checkpoint.json is rewritten
+DEFAULT_FLUSH_EVERY = 50
+
+CHECKSUM_SEPARATORS = (',', ':')
+
+def get_checksum(data):
+    content = json.dumps(data, sort_keys=True, separators=CHECKSUM_SEPARATORS)
+
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class ArrayChecksum:
+    """
+    get_checksum of a JSON array, fed an item at a time while it is streamed to
+    storage: hashes the same bytes get_checksum would, without the array or its
+    serialized copy ever being built.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._hash = hashlib.sha256()
+
+    def update(self, item):
+        content = json.dumps(item, sort_keys=True, separators=CHECKSUM_SEPARATORS)
+        self._hash.update((',' if self.count else '[').encode('utf-8'))
+        self._hash.update(content.encode('utf-8'))
+        self.count += 1
+
+    def feed(self, items):
+        # passes `items` through, hashing each on the way
+        for item in items:
+            self.update(item)
+            yield item
+
+    def hexdigest(self):
+        digest = self._hash.copy()
+        digest.update(b']' if self.count else b'[]')
+
+        return digest.hexdigest()
+
+def get_items_checksum(items):
+    checksum = ArrayChecksum()
+    for item in items:
+        checksum.update(item)
+
+    return checksum.hexdigest()
+
+class Checkpoint:
+    """
+    Per-series manifest (series/{id}/checkpoint.json) of the artifacts a run has
+    finished writing, with their checksums, and of the matches that are fully done.
+    An artifact only counts as complete while the stored copy still matches its checksum.
+    Streamed array artifacts record their item count too, and are read back
+    an item at a time to check it.
+
+    The manifest is written every `flush_every` artifact marks, on every
+    finished match and on `flush()`, rather than after each artifact. Marks lost
+    to a crash only mean those artifacts are fetched again on resume.
+    """
+
+    def __init__(self, series_id, flush_every=DEFAULT_FLUSH_EVERY):
+        self.series_id = series_id
+        self.file_path = f"series/{series_id}/checkpoint.json"
+        self.flush_every = flush_every
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        try:
+            self._manifest = get_storage().read(self.file_path)
+        except FileNotFoundError:
+            self._manifest = {}
+
+        self._manifest.setdefault('artifacts', {})
+        self._manifest.setdefault('matches', {})
+
+    def _save(self):
+        get_storage().write(self.file_path, self._manifest)
+        self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def is_complete(self, artifact_path):
+        with self._lock:
+            entry = self._manifest['artifacts'].get(artifact_path)
+
+        if not entry:
+            return False
+
+        try:
+            if 'items' in entry:
+                return get_items_checksum(get_storage().iter_items(artifact_path)) == entry['checksum']
+            return get_checksum(get_storage().read(artifact_path)) == entry['checksum']
+        except Exception:
+            return False
+
+    def _mark(self, artifact_path, entry):
+        with self._lock:
+            self._manifest['artifacts'][artifact_path] = {
+                **entry,
+                'completedAt': int(time.time() * 1000),
+            }
+            self._pending += 1
+
+            if self.flush_every and self._pending >= self.flush_every:
+                self._save()
+
+    def mark_complete(self, artifact_path, data):
+        self._mark(artifact_path, {'checksum': get_checksum(data)})
+
+    def mark_items_complete(self, artifact_path, checksum):
+        # `checksum`: the ArrayChecksum the artifact's items were fed through as they were written
+        self._mark(artifact_path, {'checksum': checksum.hexdigest(), 'items': checksum.count})
+
+    def is_match_complete(self, match_id):
+        with self._lock:
+            return str(match_id) in self._manifest['matches']
+
+    def mark_match_complete(self, match_id):
+        with self._lock:
+            self._manifest['matches'][str(match_id)] = {
+                'completedAt': int(time.time() * 1000),
+            }
+            self._save()
+
+_checkpoints = {}
+_checkpoints_lock = threading.Lock()
+
+def get_checkpoint(series_id):
+    with _checkpoints_lock:
+        checkpoint = _checkpoints.get(str(series_id))
+        if not checkpoint:
+            checkpoint = Checkpoint(series_id)
+            _checkpoints[str(series_id)] = checkpoint
+
+        return checkpoint
+
+def flush_checkpoints():
+    with _checkpoints_lock:
+        checkpoints = list(_checkpoints.values())
+
+    for checkpoint in checkpoints:
+        checkpoint.flush()
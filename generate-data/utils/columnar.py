@@ -0,0 +1,261 @@
+import ast
+import glob
+import os
+import re
+import sys
+import threading
+from array import array
+from utils.records import BatterState, BowlerState
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# bit i of the events column is set when BALL_EVENTS[i] happened on the ball; only ever append here
+BALL_EVENTS = (
+    "WICKET",
+    "MAIDEN_OVER",
+    "FOUR",
+    "SIX",
+    "FIFTY",
+    "HUNDRED",
+    "UDRS",
+    "PARTNERSHIP",
+    "INJURY",
+    "TEAM_FIFTY",
+    "TEAM_HUNDRED",
+    "DROPPED",
+    "RUNOUT_MISS",
+    "HIGHSCORING_OVER",
+    "OVER_BREAK",
+)
+EVENT_BITS = {event: 1 << i for i, event in enumerate(BALL_EVENTS)}
+
+# column -> array typecode. Counters are per-ball deltas of the cumulative
+# batsmanStriker / bowlerStriker figures in the commentary.
+BALL_COLUMNS = {
+    'inningsId': 'b',
+    'timestamp': 'q',
+    'ballNbr': 'i',
+    'overs': 'd',
+    'batterId': 'i',
+    'bowlerId': 'i',
+    'runs': 'h',
+    'batterRuns': 'h',
+    'batterBalls': 'b',
+    'batterDots': 'b',
+    'batterFours': 'b',
+    'batterSixes': 'b',
+    'bowlerRuns': 'h',
+    'bowlerWickets': 'b',
+    'wides': 'b',
+    'noBalls': 'b',
+    'byes': 'b',
+    'legByes': 'b',
+    'events': 'i',
+    'batTeamScore': 'i',
+}
+
+PARQUET_TYPES = {'b': 'int8', 'h': 'int16', 'i': 'int32', 'l': 'int64', 'q': 'int64', 'f': 'float32', 'd': 'float64'}
+
+NPY_MAGIC = b'\x93NUMPY'
+NPY_KINDS = {'b': 'i', 'h': 'i', 'i': 'i', 'l': 'i', 'q': 'i', 'f': 'f', 'd': 'f'}
+COMMENTARY_PATH_PATTERN = re.compile(r'^series/(\d+)/matches/(\d+)/commentary/(\d+)\.json$')
+EXPORT_FORMATS = ('npy', 'parquet')
+
+# the figures before a player's first ball
+NO_BATTER = BatterState(0, 0, 0, 0, 0, 0)
+NO_BOWLER = BowlerState(0, 0.0, 0, 0, 0, 0, 0)
+
+def get_events_mask(events):
+    mask = 0
+    for event in events:
+        mask |= EVENT_BITS.get(event, 0)
+
+    return mask
+
+def get_bye_kind(comm_text):
+    # the ball description comes first, e.g. 'Chahar to Kohli, 1 leg bye, ...'
+    description = comm_text[:120].lower()
+    if 'leg bye' in description:
+        return 'legByes'
+    if 'bye' in description:
+        return 'byes'
+
+    return None
+
+def flatten_commentary(innings_id, commentary_list):
+    """
+    Turns one innings' commentary (CommentaryItem records, oldest first, as get_commentary
+    returns it) into columns of one row per delivery. Items that aren't deliveries (ballNbr 0) are dropped.
+    """
+    columns = {name: array(typecode) for name, typecode in BALL_COLUMNS.items()}
+    batters = {}
+    bowlers = {}
+    last_score = 0
+
+    for commentary in commentary_list:
+        if commentary.ball_nbr == 0:
+            continue
+
+        batter = commentary.batsman_striker
+        bowler = commentary.bowler_striker
+        last_batter = batters.get(batter.id, NO_BATTER)
+        last_bowler = bowlers.get(bowler.id, NO_BOWLER)
+        batters[batter.id] = batter
+        bowlers[bowler.id] = bowler
+
+        columns['inningsId'].append(innings_id)
+        columns['timestamp'].append(commentary.timestamp)
+        columns['ballNbr'].append(commentary.ball_nbr)
+        columns['overs'].append(commentary.overs)
+        columns['batterId'].append(batter.id)
+        columns['bowlerId'].append(bowler.id)
+        columns['runs'].append(commentary.bat_team_score - last_score)
+        columns['batterRuns'].append(batter.bat_runs - last_batter.bat_runs)
+        columns['batterBalls'].append(batter.balls_played - last_batter.balls_played)
+        columns['batterDots'].append(batter.dot_balls - last_batter.dot_balls)
+        columns['batterFours'].append(batter.bat_fours - last_batter.bat_fours)
+        columns['batterSixes'].append(batter.bat_sixes - last_batter.bat_sixes)
+        columns['bowlerRuns'].append(bowler.bowl_runs - last_bowler.bowl_runs)
+        columns['bowlerWickets'].append(bowler.bowl_wickets - last_bowler.bowl_wickets)
+        columns['wides'].append(bowler.bowl_wides - last_bowler.bowl_wides)
+        columns['noBalls'].append(bowler.bowl_no_balls - last_bowler.bowl_no_balls)
+
+        # runs neither the batter nor the bowler is charged with; only the text tells byes from leg byes
+        extra_runs = commentary.bat_team_score - last_score - columns['batterRuns'][-1] - columns['wides'][-1] - columns['noBalls'][-1]
+        bye_kind = get_bye_kind(commentary.comm_text) if extra_runs > 0 else None
+        columns['byes'].append(extra_runs if bye_kind == 'byes' else 0)
+        columns['legByes'].append(extra_runs if bye_kind == 'legByes' else 0)
+        columns['events'].append(get_events_mask(commentary.events))
+        columns['batTeamScore'].append(commentary.bat_team_score)
+        last_score = commentary.bat_team_score
+
+    return columns
+
+def concat_columns(column_sets):
+    columns = {name: array(typecode) for name, typecode in BALL_COLUMNS.items()}
+    for column_set in column_sets:
+        for name, values in column_set.items():
+            columns[name].extend(values)
+
+    return columns
+
+def get_npy_descr(values):
+    if values.typecode not in NPY_KINDS:
+        raise ValueError(f"No .npy dtype for array typecode {values.typecode!r}")
+
+    if values.itemsize == 1:
+        return f"|{NPY_KINDS[values.typecode]}1"
+
+    return f"<{NPY_KINDS[values.typecode]}{values.itemsize}"
+
+def write_npy(full_path, values):
+    """
+    Writes an array.array as a version 1.0 .npy file, little endian, so numpy
+    can memory-map it with numpy.load(full_path, mmap_mode='r').
+    """
+    header = f"{{'descr': '{get_npy_descr(values)}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # magic + version + header length + header must be a multiple of 64 bytes
+    padding = 64 - (len(NPY_MAGIC) + 4 + len(header) + 1) % 64
+    header = header + ' ' * (padding % 64) + '\n'
+
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as fd:
+        fd.write(NPY_MAGIC + b'\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1'))
+        fd.write(values.tobytes())
+    os.replace(tmp_path, full_path)
+
+def read_npy(full_path):
+    """
+    Reads a .npy column: a read-only memory map when numpy is installed,
+    an array.array otherwise.
+    """
+    if numpy is not None:
+        return numpy.load(full_path, mmap_mode='r')
+
+    with open(full_path, 'rb') as fd:
+        if fd.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(f"{full_path} is not a .npy file")
+
+        major_version = fd.read(2)[0]
+        header_size = int.from_bytes(fd.read(2 if major_version == 1 else 4), 'little')
+        header = ast.literal_eval(fd.read(header_size).decode('latin1'))
+        content = fd.read()
+
+    descr = header['descr']
+    typecode = next(
+        typecode for typecode, kind in NPY_KINDS.items()
+        if kind == descr[1] and array(typecode).itemsize == int(descr[2:])
+    )
+    values = array(typecode)
+    values.frombytes(content)
+    if values.itemsize > 1 and (descr[0] == '<') != (sys.byteorder == 'little'):
+        values.byteswap()
+
+    return values
+
+def get_partition_path(base_path, series_id, match_id):
+    return os.path.join(base_path, f"series={series_id}", f"match={match_id}")
+
+def write_match_columns(base_path, series_id, match_id, columns, export_format='npy'):
+    partition_path = get_partition_path(base_path, series_id, match_id)
+    os.makedirs(partition_path, exist_ok=True)
+
+    if export_format == 'parquet':
+        if pyarrow is None:
+            raise RuntimeError('parquet export needs the pyarrow package')
+
+        table = pyarrow.table({
+            name: pyarrow.array(values.tolist(), type=getattr(pyarrow, PARQUET_TYPES[values.typecode])())
+            for name, values in columns.items()
+        })
+        pyarrow.parquet.write_table(table, os.path.join(partition_path, 'balls.parquet'))
+        return
+
+    for name, values in columns.items():
+        write_npy(os.path.join(partition_path, f"{name}.npy"), values)
+
+def load_balls(base_path, series_id='*', columns=None):
+    """
+    Loads .npy ball columns for every match of `series_id` (default: all series)
+    and concatenates them, adding seriesId and matchId columns from the partition names.
+    """
+    names = list(columns or BALL_COLUMNS)
+    partitions = sorted(glob.glob(get_partition_path(base_path, series_id, '*')))
+    loaded = {name: [] for name in names}
+    loaded['seriesId'] = []
+    loaded['matchId'] = []
+
+    for partition_path in partitions:
+        match_columns = {name: read_npy(os.path.join(partition_path, f"{name}.npy")) for name in names}
+        size = len(next(iter(match_columns.values()))) if match_columns else 0
+        match_id = int(os.path.basename(partition_path).partition('=')[2])
+        series_id_value = int(os.path.basename(os.path.dirname(partition_path)).partition('=')[2])
+
+        for name, values in match_columns.items():
+            loaded[name].append(values)
+        loaded['seriesId'].append(array('i', [series_id_value]) * size)
+        loaded['matchId'].append(array('i', [match_id]) * size)
+
+    if numpy is not None:
+        return {name: numpy.concatenate(parts) if parts else numpy.array([]) for name, parts in loaded.items()}
+
+    result = {}
+    for name, parts in loaded.items():
+        result[name] = array(parts[0].typecode if parts else 'i')
+        for part in parts:
+            result[name].extend(part)
+
+    return result
@@ -0,0 +1,36 @@
+def build_commentary_index(commentary_list):
+    """
+    Indexes an innings' commentary (CommentaryItem records, oldest ball first)
+    in a single pass.
+
+    Returns a dict with:
+    batters: batter id -> their latest batsmanStriker state
+    bowlers: bowler id -> their latest bowlerStriker state
+    last_ball: the latest item that is an actual delivery (ballNbr != 0)
+    current_bowler_ids: the (up to) two bowlers seen most recently, latest first
+    """
+    batters = {}
+    bowlers = {}
+    bowler_last_seen = {}
+    last_ball = None
+
+    for position, commentary in enumerate(commentary_list):
+        if commentary.ball_nbr != 0:
+            last_ball = commentary
+
+        batter = commentary.batsman_striker
+        batters[batter.id] = batter
+
+        bowler = commentary.bowler_striker
+        if bowler.id > 0:
+            bowlers[bowler.id] = bowler
+            bowler_last_seen[bowler.id] = position
+
+    current_bowler_ids = sorted(bowler_last_seen, key=bowler_last_seen.get, reverse=True)[:2]
+
+    return {
+        'batters': batters,
+        'bowlers': bowlers,
+        'last_ball': last_ball,
+        'current_bowler_ids': current_bowler_ids,
+    }
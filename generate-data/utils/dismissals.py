@@ -0,0 +1,83 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+
+class Dismissal(NamedTuple):
+    dismissal_type: str
+    bowler: Optional[str] = None
+    helpers: Tuple[str, ...] = ()
+
+    def to_dict(self):
+        data = {
+            'dismissalType': self.dismissal_type,
+        }
+        if self.bowler:
+            data['bowler'] = self.bowler
+        if self.helpers:
+            data['helpers'] = list(self.helpers)
+
+        return data
+
+# One alternation, tried left to right like the old sequential patterns. Each
+# branch is wrapped in a group named after it so `lastgroup` says which matched.
+DISMISSAL_PATTERN = re.compile('|'.join([
+    r'(?P<caught_and_bowled>c (?:and|&) b (?P<cab_bowler>.+))',
+    r'(?P<caught>c (?P<c_catcher>.+) b (?P<c_bowler>.+))',
+    r'(?P<bowled>b (?P<b_bowler>.+))',
+    r'(?P<run_out>run out \((?P<ro_helpers>.+)\))',
+    r'(?P<stumped>st (?P<st_keeper>.+) b (?P<st_bowler>.+))',
+    r'(?P<lbw>lbw b (?P<lbw_bowler>.+))',
+    r'(?P<hit_wicket>hit (?:wicket|wkt) b (?P<hw_bowler>.+))',
+    r'(?P<timed_out>timed out)',
+    r'(?P<obstructed>obs(?:tructing|tructed)?(?: the field)?)',
+    r'(?P<retired>(?:retired|retd) (?:out|hurt|ill|not out))',
+    r'(?P<handled>handled)',
+]))
+
+def _clean_name(name):
+    return name.replace('(sub)', '').strip()
+
+def _caught_and_bowled(match):
+    return Dismissal('caught', bowler=match['cab_bowler'])
+
+def _caught(match):
+    return Dismissal('caught', bowler=match['c_bowler'], helpers=(_clean_name(match['c_catcher']),))
+
+def _bowled(match):
+    return Dismissal('bowled', bowler=match['b_bowler'])
+
+def _run_out(match):
+    return Dismissal('run-out', helpers=tuple(_clean_name(helper) for helper in match['ro_helpers'].split('/')))
+
+def _stumped(match):
+    return Dismissal('stumped', bowler=match['st_bowler'], helpers=(match['st_keeper'],))
+
+def _lbw(match):
+    return Dismissal('lbw', bowler=match['lbw_bowler'])
+
+def _hit_wicket(match):
+    return Dismissal('hit-wicket', bowler=match['hw_bowler'])
+
+BUILDERS = {
+    'caught_and_bowled': _caught_and_bowled,
+    'caught': _caught,
+    'bowled': _bowled,
+    'run_out': _run_out,
+    'stumped': _stumped,
+    'lbw': _lbw,
+    'hit_wicket': _hit_wicket,
+    'timed_out': lambda match: Dismissal('timed-out'),
+    'obstructed': lambda match: Dismissal('obstruct-field'),
+    'retired': lambda match: Dismissal('retired'),
+    'handled': lambda match: Dismissal('handled-ball'),
+}
+
+def classify_dismissal(dismissal_string):
+    """
+    Classifies a scorecard dismissal such as 'c Jadeja b Chahar' in a single regex
+    pass. Returns a Dismissal, or None for strings like 'not out'.
+    """
+    match = DISMISSAL_PATTERN.match(dismissal_string)
+    if not match:
+        return None
+
+    return BUILDERS[match.lastgroup](match)
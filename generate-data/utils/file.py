@@ -1,25 +1,44 @@
-import json
-import os
+import logging
+from utils.storage import BASE_DATA_PATH, get_storage
 
-BASE_DATA_PATH = 'data/'
+logger = logging.getLogger(__name__)
+
+class CorruptDataError(Exception):
+    pass
 
 def set_file_data(file_path, data):
     try:
-        file_dir = os.path.dirname(BASE_DATA_PATH + file_path)
-        os.makedirs(file_dir, exist_ok=True)
-        with open(BASE_DATA_PATH + file_path, 'w') as fd:
-            json.dump(data, fd, indent=2)
+        get_storage().write(file_path, data)
 
     except Exception as e:
-        print("ERROR in set_file_data ==> ", e.args)
+        logger.error("ERROR in set_file_data ==> %s", e.args)
 
-def get_file_data(file_path, default_data = {}):
+def set_file_items(file_path, items):
+    """
+    Streams a JSON array artifact to storage from an iterable. Unlike
+    set_file_data, errors propagate: nothing may be marked complete after a
+    write that did not finish.
+    """
+    get_storage().write_items(file_path, items)
+
+def set_file_records(file_path, records):
+    """
+    Adds or replaces entries of an id -> entity map (e.g. venues/index.json)
+    without the caller having to rewrite the whole map.
+    """
     try:
-        data = default_data
-        with open(BASE_DATA_PATH + file_path, 'r') as fd:
-            data = json.load(fd)
+        get_storage().write_records(file_path, records)
 
     except Exception as e:
-        print("ERROR in get_file_data ==> ", e.args)
+        logger.error("ERROR in set_file_records ==> %s", e.args)
+
+def get_file_data(file_path, default_data = {}):
+    try:
+        return get_storage().read(file_path)
+
+    except FileNotFoundError:
+        return default_data
 
-    return data
+    except ValueError as e:
+        # a truncated file must not be read back as empty and then overwritten
+        raise CorruptDataError(f"{file_path} is corrupt: {e}") from e
@@ -0,0 +1,51 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from utils.metrics import get_metrics
+
+try:
+    import lxml
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+def has_classes(attrs, *classes):
+    # a strainer sees the raw attributes while parsing, where class is still one string
+    return set(classes) <= set(attrs.get('class', '').split())
+
+def is_match_squads_el(name, attrs):
+    # headers and team columns end up as siblings in the strained tree, so find_next_sibling still pairs them
+    return name == 'div' and any(has_classes(attrs, class_) for class_ in ('cb-pl11-hdr', 'cb-play11-lft-col', 'cb-play11-rt-col'))
+
+def is_player_profile_el(name, attrs):
+    return name in ('h1', 'h3') or (name == 'div' and has_classes(attrs, 'cb-col-33', 'text-black'))
+
+def is_series_matches_el(name, attrs):
+    return name == 'div' and has_classes(attrs, 'cb-hm-rght', 'cb-series-filters')
+
+# only the subtrees each extractor in main.py reads
+SCORECARD_INNINGS = SoupStrainer('div', id=re.compile(r'^innings_\d+$'))
+VENUE_CARD = SoupStrainer('div', class_='cb-left cb-col-67 cb-col')
+SERIES_VENUES_LIST = SoupStrainer('div', class_='cb-list-group')
+TEAM_PLAYERS_LIST = SoupStrainer('div', class_='cb-col-67 cb-col cb-left cb-top-zero')
+MATCH_SQUADS = SoupStrainer(is_match_squads_el)
+PLAYER_PROFILE = SoupStrainer(is_player_profile_el)
+SERIES_MATCHES_LIST = SoupStrainer(is_series_matches_el)
+
+def parse_html(html_content, only=None, parser=None):
+    """
+    Parses a page with the fastest installed parser (lxml, else html.parser).
+    `only` is a SoupStrainer limiting the tree to the elements it matches.
+    """
+    with get_metrics().timer('parse', format='html'):
+        return BeautifulSoup(html_content, parser or HTML_PARSER, parse_only=only)
+
+def get_scorecard_innings(html_content):
+    """
+    Parses a scorecard page once and returns {innings_id: innings div}.
+    """
+    soup = parse_html(html_content, only=SCORECARD_INNINGS)
+    innings_els = {}
+    for innings_el in soup.find_all('div', id=SCORECARD_INNINGS.attrs['id']):
+        innings_els[int(innings_el['id'].split('_')[1])] = innings_el
+
+    return innings_els
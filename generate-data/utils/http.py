@@ -0,0 +1,157 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import port_by_scheme
+from urllib3.util.retry import Retry
+from utils.metrics import get_endpoint_type, get_metrics
+from utils.ratelimit import get_rate_limiter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_PER_HOST = 10
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_JITTER = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+class FetchStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes_fetched = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, size=0, retries=0, error=False):
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            self.bytes_fetched += size
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error:
+                self.errors += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'errors': self.errors,
+                'bytesFetched': self.bytes_fetched,
+                'totalLatency': round(self.total_latency, 3),
+                'avgLatency': round(self.total_latency / self.requests, 3) if self.requests else 0,
+                'maxLatency': round(self.max_latency, 3),
+            }
+
+class RateLimitedRetry(Retry):
+    """
+    Retry that takes a token from the shared rate limiter before every retry,
+    after its backoff, so a 429/5xx storm is paced like first attempts are.
+    The first attempt's token is taken by the caller (fetch_content).
+    """
+
+    limiter_host = None
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response=response, error=error, _pool=_pool, _stacktrace=_stacktrace)
+        if _pool is not None:
+            # the limiter keys hosts on the url's netloc, which leaves out default ports
+            default_port = port_by_scheme.get(_pool.scheme)
+            retry.limiter_host = _pool.host if _pool.port in (None, default_port) else f"{_pool.host}:{_pool.port}"
+
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        get_metrics().observe('rate_limit_wait', get_rate_limiter().acquire(f"//{self.limiter_host or ''}"))
+
+class HttpClient:
+    """
+    Shared keep-alive session for every upstream fetch.
+
+    Connections are pooled per host (`pool_size` hosts, `max_per_host` connections
+    each) and 429/5xx responses are retried with exponential backoff plus jitter,
+    honouring Retry-After when the upstream sends it. Every retry also waits for
+    a rate limiter token.
+    """
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        max_per_host=DEFAULT_MAX_PER_HOST,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        backoff_jitter=DEFAULT_BACKOFF_JITTER,
+    ):
+        self.timeout = timeout
+        self.stats = FetchStats()
+
+        retry = RateLimitedRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_per_host, max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, timeout=None):
+        metrics = get_metrics()
+        endpoint = get_endpoint_type(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url=url, headers=headers, timeout=timeout or self.timeout)
+        except requests.RequestException as e:
+            latency = time.perf_counter() - start
+            self.stats.record(latency, error=True)
+            metrics.observe('request', latency, endpoint=endpoint)
+            metrics.increment('requests', endpoint=endpoint, status=type(e).__name__)
+            raise
+
+        latency = time.perf_counter() - start
+        retries = response.raw.retries.history if response.raw and response.raw.retries else ()
+        self.stats.record(
+            latency,
+            size=len(response.content),
+            retries=len(retries),
+            error=response.status_code >= 400,
+        )
+        metrics.observe('request', latency, endpoint=endpoint)
+        metrics.increment('requests', endpoint=endpoint, status=response.status_code)
+        metrics.increment('response_bytes', len(response.content), endpoint=endpoint)
+        if retries:
+            metrics.increment('retries', len(retries), endpoint=endpoint)
+
+        return response
+
+    def close(self):
+        self.session.close()
+
+http_client = HttpClient()
+
+def configure_http(**kwargs):
+    global http_client
+    http_client.close()
+    http_client = HttpClient(**kwargs)
+
+    return http_client
+
+def get_http_client():
+    return http_client
@@ -0,0 +1,122 @@
+import gzip
+import io
+import json
+import os
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPACT_SEPARATORS = (',', ':')
+GZIP_LEVEL = 6
+
+# compression -> suffix added after .json
+COMPRESSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+def get_compression(full_path):
+    for compression, suffix in COMPRESSIONS.items():
+        if full_path.endswith(suffix):
+            return compression
+
+    return None
+
+def open_file(full_path, mode, compression=None):
+    """
+    Opens `full_path` in text mode, through gzip or zstd when `compression` is set.
+    """
+    if compression == 'gzip':
+        return gzip.open(full_path, mode + 't', compresslevel=GZIP_LEVEL, encoding='utf-8')
+
+    if compression == 'zstd':
+        if not zstandard:
+            raise RuntimeError('zstd compression needs the zstandard package')
+
+        if 'w' in mode:
+            stream = zstandard.ZstdCompressor().stream_writer(open(full_path, 'wb'), closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(full_path, 'rb'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    return open(full_path, mode, encoding='utf-8')
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array to disk one item at a time, so a long innings is never
+    serialized as a whole.
+
+    Compact output puts each item on its own line between '[' and ']'; that is
+    still plain JSON, and lets readers parse the file a line at a time. Without
+    `compact` the output is byte for byte what json.dump(items, indent=2) gives.
+    The file is written next to the target and renamed over it on close.
+    """
+
+    def __init__(self, full_path, compact=False, compression=None):
+        self.full_path = full_path
+        self.compact = compact
+        self.compression = compression
+        self.count = 0
+        self._fd = None
+        self._tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.full_path), exist_ok=True)
+        self._fd = open_file(self._tmp_path, 'w', self.compression)
+        self._fd.write('[')
+
+        return self
+
+    def write(self, item):
+        if self.compact:
+            content = json.dumps(item, separators=COMPACT_SEPARATORS)
+        else:
+            content = json.dumps(item, indent=2).replace('\n', '\n  ')
+
+        self._fd.write(('\n' if self.count == 0 else ',\n') + ('' if self.compact else '  ') + content)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._fd.write('\n]' if self.count else ']')
+            if not self.compression:
+                self._fd.flush()
+                os.fsync(self._fd.fileno())
+            self._fd.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.full_path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+def write_json_array(full_path, items, compact=False, compression=None):
+    with JsonArrayWriter(full_path, compact=compact, compression=compression) as writer:
+        for item in items:
+            writer.write(item)
+
+    return writer.count
+
+def iter_json_array(full_path):
+    """
+    Yields the items of a JSON array file. Files in the compact one-item-per-line
+    layout are parsed a line at a time; anything else is loaded whole.
+    """
+    with open_file(full_path, 'r', get_compression(full_path)) as fd:
+        first_line = fd.readline().rstrip('\n')
+        if first_line != '[':
+            yield from json.loads(first_line + fd.read())
+            return
+
+        for line in fd:
+            line = line.rstrip('\n')
+            if line == ']':
+                return
+
+            if line[:1].isspace():
+                yield from json.loads('[' + line + fd.read())
+                return
+
+            yield json.loads(line[:-1] if line.endswith(',') else line)
@@ -0,0 +1,68 @@
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from utils.metrics import get_metrics
+
+LOG_FORMATS = ('text', 'json')
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(stage)s] %(message)s'
+
+# attributes every LogRecord has; anything else came in through `extra=`
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'stage'}
+
+class StageFilter(logging.Filter):
+    """
+    Tags each record with the stage running on its thread and counts
+    warnings and errors per stage in the run metrics.
+    """
+
+    def filter(self, record):
+        metrics = get_metrics()
+        record.stage = metrics.current_stage() or '-'
+        if record.levelno >= logging.WARNING:
+            metrics.increment('log_messages', level=record.levelname.lower(), stage=record.stage)
+
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, stage, message, whatever
+    was passed as `extra=` and the traceback, if any.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'stage': getattr(record, 'stage', '-'),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+
+        if record.exc_info:
+            entry['error'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+def configure_logging(level='INFO', log_format='text'):
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format {log_format!r}, expected one of {', '.join(LOG_FORMATS)}")
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(StageFilter())
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    # the HTTP stack logs every retry and new connection at INFO/DEBUG
+    logging.getLogger('urllib3').setLevel(max(root.level, logging.WARNING))
+
+    return root
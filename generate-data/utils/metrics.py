@@ -0,0 +1,267 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+PROMETHEUS_PREFIX = 'scrape'
+
+# url fragment -> endpoint type, first match wins
+ENDPOINT_TYPES = (
+    ('/full-commentary/', 'commentary'),
+    ('/live-cricket-scorecard/', 'scorecard'),
+    ('/cricket-match-squads/', 'squads'),
+    ('/profiles/', 'player'),
+    ('/cricket-venues/', 'venue'),
+    ('/cricket-team/', 'team'),
+    ('/cricket-series/', 'series'),
+)
+
+# timers that make up the "where did the time go" breakdown of a run report
+BREAKDOWN_TIMERS = {
+    'network': 'request',
+    'rateLimitWait': 'rate_limit_wait',
+    'parse': 'parse',
+    'disk': 'storage',
+}
+
+def get_endpoint_type(url):
+    for fragment, endpoint_type in ENDPOINT_TYPES:
+        if fragment in url:
+            return endpoint_type
+
+    return 'other'
+
+def get_label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def format_prometheus_labels(labels):
+    if not labels:
+        return ''
+
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+class Metrics:
+    """
+    Counters and timers for one run, keyed on a name plus labels, e.g.
+    increment('requests', endpoint='commentary', status=200).
+
+    Timers keep a count, a total and a max per key. `stage()` times a block as
+    the 'stage' timer and tracks the stages open on each thread, so log lines
+    can say which stage wrote them. Stages nest: a get_* stage's time includes
+    the transform stages it calls.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._counters = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, get_label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, get_label_key(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stage_stack()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment('stage_errors', stage=name)
+            raise
+        finally:
+            self.observe('stage', time.perf_counter() - start, stage=name)
+            stack.pop()
+
+    def _stage_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def current_stage(self):
+        stack = self._stage_stack()
+        return stack[-1] if stack else None
+
+    def state(self):
+        """
+        Raw counters and timers, picklable, for merging a worker process's
+        metrics into the parent's with `merge`.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'timers': {key: list(timer) for key, timer in self._timers.items()},
+            }
+
+    def merge(self, state):
+        with self._lock:
+            for key, value in state['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+            for key, (count, total, longest) in state['timers'].items():
+                timer = self._timers.get(key)
+                if timer is None:
+                    self._timers[key] = [count, total, longest]
+                else:
+                    timer[0] += count
+                    timer[1] += total
+                    timer[2] = max(timer[2], longest)
+
+    def get_total(self, name):
+        with self._lock:
+            return sum(timer[1] for (timer_name, _), timer in self._timers.items() if timer_name == name)
+
+    def report(self):
+        """
+        The run report: wall time, the network / rate limit / parse / disk
+        breakdown (cumulative over threads, so it can exceed the wall time),
+        per-stage timings and every counter and timer with its labels.
+        """
+        state = self.state()
+        finished_at = time.time()
+
+        stages = {}
+        timers = {}
+        for (name, labels), (count, total, longest) in sorted(state['timers'].items(), key=lambda item: str(item[0])):
+            entry = {'count': count, 'totalSeconds': round(total, 6), 'maxSeconds': round(longest, 6)}
+            if name == 'stage':
+                stages[dict(labels)['stage']] = entry
+            else:
+                timers.setdefault(name, []).append({**dict(labels), **entry})
+
+        counters = {}
+        for (name, labels), value in sorted(state['counters'].items(), key=lambda item: str(item[0])):
+            counters.setdefault(name, []).append({**dict(labels), 'value': value})
+
+        return {
+            'startedAt': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'finishedAt': datetime.fromtimestamp(finished_at, timezone.utc).isoformat(),
+            'wallSeconds': round(finished_at - self.started_at, 3),
+            'breakdown': {key: round(self.get_total(name), 3) for key, name in BREAKDOWN_TIMERS.items()},
+            'stages': stages,
+            'timers': timers,
+            'counters': counters,
+        }
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition format: counters as <prefix>_<name>_total,
+        timers as <prefix>_<name>_seconds summaries (count and sum).
+        """
+        state = self.state()
+        lines = []
+
+        counter_names = sorted({name for name, _ in state['counters']})
+        for name in counter_names:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(state['counters'].items(), key=lambda item: str(item[0])):
+                if counter_name == name:
+                    lines.append(f"{metric}{format_prometheus_labels(labels)} {value}")
+
+        timer_names = sorted({name for name, _ in state['timers']})
+        for name in timer_names:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for (timer_name, labels), (count, total, _) in sorted(state['timers'].items(), key=lambda item: str(item[0])):
+                if timer_name == name:
+                    lines.append(f"{metric}_count{format_prometheus_labels(labels)} {count}")
+                    lines.append(f"{metric}_sum{format_prometheus_labels(labels)} {total:.6f}")
+
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_wall_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_wall_seconds {time.time() - self.started_at:.3f}")
+
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+report_paths = {'report': None, 'prometheus': None}
+_atexit_registered = False
+
+def get_metrics():
+    return metrics
+
+def configure_metrics(report_path=None, prometheus_path=None):
+    """
+    Sets where the run report (JSON) and the Prometheus text export are written
+    when the process exits; either may be None.
+    """
+    global _atexit_registered
+    report_paths['report'] = report_path
+    report_paths['prometheus'] = prometheus_path
+
+    if not _atexit_registered:
+        atexit.register(write_metrics_reports)
+        _atexit_registered = True
+
+    return metrics
+
+def write_metrics_reports():
+    for key, content in (('report', lambda: json.dumps(metrics.report(), indent=2)), ('prometheus', metrics.to_prometheus)):
+        full_path = report_paths[key]
+        if not full_path:
+            continue
+
+        if os.path.dirname(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w') as fd:
+            fd.write(content())
+
+@contextmanager
+def capture_metrics():
+    """
+    Swaps in a fresh Metrics for the block, e.g. in a worker process, and
+    yields it so its state can be shipped back and merged.
+    """
+    global metrics
+    previous = metrics
+    metrics = Metrics()
+    try:
+        yield metrics
+    finally:
+        metrics = previous
+
+def timed_stage(name=None):
+    """
+    Decorator: runs the function as a stage named `name` (default: its name).
+    """
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().stage(stage_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,80 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+NON_NAME_CHARS = re.compile(r"[^a-z ]+")
+WHITESPACE = re.compile(r"\s+")
+
+class AmbiguousNameError(LookupError):
+    pass
+
+@lru_cache(maxsize=4096)
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    name = name.replace('(sub)', ' ').replace('(c)', ' ').replace('(wk)', ' ')
+    name = NON_NAME_CHARS.sub(' ', name.replace("'", ''))
+
+    return WHITESPACE.sub(' ', name).strip()
+
+class SquadNameIndex:
+    """
+    Resolves the names used in scorecard dismissals to squad player ids.
+
+    Every player is indexed under several forms, most specific first: the full
+    name and known aliases, initials + surname ('r jadeja', 'rd jadeja'), the
+    surname ('jadeja', 'du plessis') and finally the first name. A lookup returns
+    from the most specific form that matches; if that form is shared by several
+    players it raises AmbiguousNameError rather than guessing.
+    """
+
+    def __init__(self, players, aliases=None):
+        self._tiers = [{}, {}, {}, {}]
+
+        for player in players:
+            player_id = int(player['id'])
+            tokens = normalize_name(player['name']).split(' ')
+
+            self._add(0, ' '.join(tokens), player_id)
+            if len(tokens) > 1:
+                first_names, surname = tokens[:-1], tokens[-1]
+                self._add(1, f"{first_names[0][0]} {surname}", player_id)
+                self._add(1, f"{''.join(token[0] for token in first_names)} {surname}", player_id)
+
+                for i in range(1, len(tokens)):
+                    self._add(2, ' '.join(tokens[i:]), player_id)
+
+                self._add(3, tokens[0], player_id)
+
+        for alias, player_id in (aliases or {}).items():
+            self._add(0, normalize_name(alias), int(player_id))
+
+    def _add(self, tier, key, player_id):
+        if key:
+            self._tiers[tier].setdefault(key, set()).add(player_id)
+
+    def lookup(self, name, among=None):
+        """
+        `among`, a set of player ids, breaks ties: when the most specific form
+        that matches is shared by several players, only those in `among` are
+        kept (all of them if none is).
+        """
+        key = normalize_name(name)
+        player_ids = None
+        for tier in self._tiers:
+            player_ids = tier.get(key)
+            if player_ids:
+                break
+        else:
+            # fall back to the query's own surname, e.g. 'MS Dhoni' -> 'dhoni'
+            player_ids = self._tiers[2].get(key.rpartition(' ')[2])
+
+        if not player_ids:
+            raise LookupError(f'No match found for {name}')
+
+        if len(player_ids) > 1 and among is not None:
+            player_ids = (player_ids & among) or player_ids
+
+        if len(player_ids) > 1:
+            raise AmbiguousNameError(f"{name!r} matches players {sorted(player_ids)}")
+
+        return next(iter(player_ids))
@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+PLAYERS_FILE_PATH = 'players/index.json'
+# player id -> {'fetchedAt': ms}, kept apart so players/index.json stays what the seeders expect
+PLAYERS_META_FILE_PATH = 'players/meta.json'
+DEFAULT_FLUSH_EVERY = 50
+DEFAULT_MAX_AGE = None
+DEFAULT_PLAYER_WORKERS = 4
+
+class PlayerRegistry:
+    """
+    In-memory view of players/index.json.
+
+    The file is read once on first use. New or updated players are kept in a
+    dirty set and written back every `flush_every` updates or on `flush()`.
+    A flush hands only the dirty entries to the storage backend, which merges
+    them with whatever other writers have stored in the meantime.
+    """
+
+    def __init__(self, file_path=PLAYERS_FILE_PATH, meta_file_path=PLAYERS_META_FILE_PATH, flush_every=DEFAULT_FLUSH_EVERY):
+        self.file_path = file_path
+        self.meta_file_path = meta_file_path
+        self.flush_every = flush_every
+        self._players = None
+        self._meta = None
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._players is None:
+            try:
+                self._players = get_storage().read(self.file_path)
+            except FileNotFoundError:
+                self._players = {}
+
+            try:
+                self._meta = get_storage().read(self.meta_file_path)
+            except FileNotFoundError:
+                self._meta = {}
+
+        return self._players
+
+    def __contains__(self, player_id):
+        with self._lock:
+            return str(player_id) in self._load()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def get(self, player_id, default=None):
+        with self._lock:
+            return self._load().get(str(player_id), default)
+
+    def needs_fetch(self, player_id, max_age=None):
+        """
+        True when the player is unknown, or when `max_age` (seconds) is set and
+        the stored profile was fetched longer ago than that or at an unknown time.
+        """
+        with self._lock:
+            player_id = str(player_id)
+            if player_id not in self._load():
+                return True
+            if max_age is None:
+                return False
+
+            fetched_at = self._meta.get(player_id, {}).get('fetchedAt')
+            return fetched_at is None or (time.time() * 1000 - fetched_at) > max_age * 1000
+
+    def add(self, player):
+        with self._lock:
+            player_id = str(player['id'])
+            self._load()[player_id] = player
+            self._meta[player_id] = {'fetchedAt': int(time.time() * 1000)}
+            self._dirty.add(player_id)
+
+            if self.flush_every and len(self._dirty) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+
+            stored = get_storage().write_records(self.file_path, {player_id: self._players[player_id] for player_id in self._dirty})
+            stored_meta = get_storage().write_records(self.meta_file_path, {player_id: self._meta[player_id] for player_id in self._dirty})
+
+            # pick up players other writers added since we loaded
+            if stored:
+                self._players = {**self._players, **stored}
+            if stored_meta:
+                self._meta = {**self._meta, **stored_meta}
+            self._dirty.clear()
+
+class PlayerResolver:
+    """
+    Fetches player profiles in bulk. Ids are deduped, players the registry
+    already holds (and that are no older than `max_age` seconds, when set) are
+    skipped, and the rest are fetched on `workers` threads, paced by the shared
+    rate limiter. A player already being fetched for another caller is waited
+    on rather than fetched twice. Players go to `player_registry`, by default
+    the shared one.
+    """
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE, workers=DEFAULT_PLAYER_WORKERS, player_registry=None):
+        self.max_age = max_age
+        self.workers = workers
+        self.player_registry = player_registry
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='players')
+
+    def _fetch(self, player_id, fetch_player):
+        try:
+            player = fetch_player(player_id)
+            if player:
+                (self.player_registry or get_player_registry()).add(player)
+            return player
+        except Exception as e:
+            logger.error("ERROR in PlayerResolver fetching %s ==> %s", player_id, e.args)
+        finally:
+            with self._lock:
+                self._in_flight.pop(player_id, None)
+
+    def resolve(self, player_ids, fetch_player, max_age=None):
+        """
+        Makes sure every one of `player_ids` is in the registry, calling
+        `fetch_player(player_id)` for those that aren't. `max_age` (seconds)
+        also refetches the ones stored longer ago than that, on top of the
+        resolver's own max_age; the stricter of the two wins. Returns the newly
+        fetched players by id; failed fetches are logged and left out.
+        """
+        player_registry = self.player_registry or get_player_registry()
+        max_ages = [age for age in (self.max_age, max_age) if age is not None]
+        max_age = min(max_ages) if max_ages else None
+        futures = {}
+        with self._lock:
+            for player_id in dict.fromkeys(map(str, player_ids)):
+                if player_id in self._in_flight:
+                    futures[player_id] = self._in_flight[player_id]
+                elif player_registry.needs_fetch(player_id, max_age):
+                    futures[player_id] = self._in_flight[player_id] = self._executor.submit(self._fetch, player_id, fetch_player)
+
+        fetched = {}
+        for player_id, future in futures.items():
+            player = future.result()
+            if player:
+                fetched[player_id] = player
+
+        return fetched
+
+player_registry = PlayerRegistry()
+player_resolver = PlayerResolver()
+
+def get_player_registry():
+    return player_registry
+
+def configure_player_resolver(max_age=DEFAULT_MAX_AGE, workers=DEFAULT_PLAYER_WORKERS):
+    global player_resolver
+    player_resolver = PlayerResolver(max_age=max_age, workers=workers)
+
+    return player_resolver
+
+def get_player_resolver():
+    return player_resolver
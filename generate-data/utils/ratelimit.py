@@ -0,0 +1,87 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_RATE = 2.0
+DEFAULT_HOST_RATE = 1.0
+DEFAULT_BURST = 2
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second, holding at most
+    `capacity` tokens. `acquire` reserves a token up front and sleeps outside the
+    lock, so concurrent callers are served in arrival order without overshooting.
+    """
+
+    def __init__(self, rate, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            if self._tokens >= 0:
+                return 0
+
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+class RateLimiter:
+    """
+    Global request budget plus a separate budget for every host. A fetch waits
+    until both buckets grant it a token. A rate of None disables that bucket.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, host_rate=DEFAULT_HOST_RATE, burst=DEFAULT_BURST):
+        self.host_rate = host_rate
+        self.burst = burst
+        self.waited = 0.0
+        self._global = TokenBucket(rate, burst) if rate else None
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_bucket(self, host):
+        with self._lock:
+            bucket = self._hosts.get(host)
+            if not bucket:
+                bucket = TokenBucket(self.host_rate, self.burst)
+                self._hosts[host] = bucket
+
+            return bucket
+
+    def acquire(self, url):
+        waited = 0
+        if self._global:
+            waited += self._global.acquire()
+
+        if self.host_rate:
+            waited += self._host_bucket(urlparse(url).netloc).acquire()
+
+        with self._lock:
+            self.waited += waited
+
+        return waited
+
+rate_limiter = RateLimiter()
+
+def configure_rate_limit(rate=DEFAULT_RATE, host_rate=DEFAULT_HOST_RATE, burst=DEFAULT_BURST):
+    global rate_limiter
+    rate_limiter = RateLimiter(rate=rate, host_rate=host_rate, burst=burst)
+
+    return rate_limiter
+
+def get_rate_limiter():
+    return rate_limiter
@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Typed, slotted records for the commentary and matchData entries held in
+# memory. Fields are snake_case; to_json / from_json convert to and from the
+# camelCase dicts stored on disk, key for key and in the stored key order.
+# The converters pass fields positionally, which halves construction time on
+# the per-ball paths; keep them in field order.
+
+# One copy of each value that repeats from ball to ball (event tuples, overs),
+# shared by the records loaded from disk instead of one per item. Only float
+# overs are shared: 12 and 12.0 are equal keys but serialize differently.
+_shared_events = {}
+_shared_overs = {}
+
+def shared_events(events):
+    events = tuple(events)
+    return _shared_events.setdefault(events, events)
+
+def shared_overs(overs):
+    return _shared_overs.setdefault(overs, overs) if type(overs) is float else overs
+
+@dataclass(slots=True)
+class BatterState:
+    id: int
+    bat_runs: int
+    balls_played: int
+    dot_balls: int
+    bat_fours: int
+    bat_sixes: int
+    # matchData only
+    is_striker: Optional[bool] = None
+    fall_of_wicket: Optional['FallOfWicket'] = None
+
+    def to_json(self):
+        data = {
+            'id': self.id,
+            'batRuns': self.bat_runs,
+            'ballsPlayed': self.balls_played,
+            'dotBalls': self.dot_balls,
+            'batFours': self.bat_fours,
+            'batSixes': self.bat_sixes,
+        }
+        if self.fall_of_wicket is not None:
+            data['fallOfWicket'] = self.fall_of_wicket.to_json()
+        if self.is_striker is not None:
+            data['isStriker'] = self.is_striker
+
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        fall_of_wicket = data.get('fallOfWicket')
+        return cls(
+            data['id'], data['batRuns'], data['ballsPlayed'], data['dotBalls'], data['batFours'], data['batSixes'],
+            data.get('isStriker'), FallOfWicket.from_json(fall_of_wicket) if fall_of_wicket is not None else None,
+        )
+
+@dataclass(slots=True)
+class BowlerState:
+    id: int
+    bowl_overs: float
+    bowl_maidens: int
+    bowl_runs: int
+    bowl_wickets: int
+    bowl_no_balls: int
+    bowl_wides: int
+    # matchData only
+    is_striker: Optional[bool] = None
+    is_non_striker: Optional[bool] = None
+
+    def to_json(self):
+        data = {
+            'id': self.id,
+            'bowlOvers': self.bowl_overs,
+            'bowlMaidens': self.bowl_maidens,
+            'bowlRuns': self.bowl_runs,
+            'bowlWickets': self.bowl_wickets,
+            'bowlNoBalls': self.bowl_no_balls,
+            'bowlWides': self.bowl_wides,
+        }
+        if self.is_striker is not None:
+            data['isStriker'] = self.is_striker
+        if self.is_non_striker is not None:
+            data['isNonStriker'] = self.is_non_striker
+
+        return data
+
+    def to_commentary_json(self):
+        # bowlerStriker in the commentary has wides before no balls
+        return {
+            'id': self.id,
+            'bowlOvers': self.bowl_overs,
+            'bowlMaidens': self.bowl_maidens,
+            'bowlRuns': self.bowl_runs,
+            'bowlWickets': self.bowl_wickets,
+            'bowlWides': self.bowl_wides,
+            'bowlNoBalls': self.bowl_no_balls,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['id'], shared_overs(data['bowlOvers']), data['bowlMaidens'], data['bowlRuns'], data['bowlWickets'], data['bowlNoBalls'], data['bowlWides'],
+            data.get('isStriker'), data.get('isNonStriker'),
+        )
+
+@dataclass(slots=True)
+class FallOfWicket:
+    overs: float
+    team_score: int
+    team_wickets: int
+    dismissal_type: str
+    bowler_id: Optional[int] = None
+    helpers: Tuple[int, ...] = ()
+
+    def to_json(self):
+        data = {
+            'overs': self.overs,
+            'teamScore': self.team_score,
+            'teamWickets': self.team_wickets,
+            'dismissalType': self.dismissal_type,
+        }
+        if self.bowler_id is not None:
+            data['bowlerId'] = self.bowler_id
+        data['helpers'] = list(self.helpers)
+
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['overs'], data['teamScore'], data['teamWickets'], data['dismissalType'],
+            data.get('bowlerId'), tuple(data.get('helpers', ())),
+        )
+
+@dataclass(slots=True)
+class CommentaryItem:
+    timestamp: int
+    comm_text: str
+    ball_nbr: int
+    overs: float
+    events: Tuple[str, ...]
+    batsman_striker: BatterState
+    bowler_striker: BowlerState
+    bat_team_score: int
+
+    def to_json(self):
+        return {
+            'timestamp': self.timestamp,
+            'commText': self.comm_text,
+            'ballNbr': self.ball_nbr,
+            'overs': self.overs,
+            'events': list(self.events),
+            'batsmanStriker': self.batsman_striker.to_json(),
+            'bowlerStriker': self.bowler_striker.to_commentary_json(),
+            'batTeamScore': self.bat_team_score,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['timestamp'], data['commText'], data['ballNbr'], shared_overs(data['overs']), shared_events(data['events']),
+            BatterState.from_json(data['batsmanStriker']), BowlerState.from_json(data['bowlerStriker']),
+            data['batTeamScore'],
+        )
+
+@dataclass(slots=True)
+class InningsScore:
+    team_id: int
+    overs_bowled: float
+    overs: int
+    score: int
+    wickets: int
+    is_declared: bool
+    is_follow_on: bool
+    batters: List[BatterState]
+    bowlers: List[BowlerState]
+    extras: dict
+
+    def to_json(self):
+        return {
+            'teamId': self.team_id,
+            'oversBowled': self.overs_bowled,
+            'overs': self.overs,
+            'score': self.score,
+            'wickets': self.wickets,
+            'isDeclared': self.is_declared,
+            'isFollowOn': self.is_follow_on,
+            'batters': [batter.to_json() for batter in self.batters],
+            'bowlers': [bowler.to_json() for bowler in self.bowlers],
+            'extras': dict(self.extras),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['teamId'], data['oversBowled'], data['overs'], data['score'], data['wickets'], data['isDeclared'], data['isFollowOn'],
+            [BatterState.from_json(batter) for batter in data['batters']],
+            [BowlerState.from_json(bowler) for bowler in data['bowlers']],
+            dict(data['extras']),
+        )
+
+def commentary_to_json(commentary_list):
+    return [item.to_json() for item in commentary_list]
+
+def iter_commentary_json(commentary_list):
+    # commentary_to_json one item at a time, for artifacts streamed to storage
+    return (item.to_json() for item in commentary_list)
+
+def commentary_from_json(commentary_list):
+    return [CommentaryItem.from_json(item) for item in commentary_list]
@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import logging
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TYPE_CONCURRENCY = 2
+
+class DependencyFailedError(Exception):
+    pass
+
+class Task:
+    """
+    One unit of batch work: `fn(*args)` once every task in `deps` has succeeded.
+
+    `key` identifies the task across the whole batch, e.g. ('player', '1413'),
+    so shared entities are fetched once however many matches ask for them.
+    Lower `priority` runs first among ready tasks. `expand`, if set, is called
+    with the result and may return follow-up tasks, e.g. one commentary task
+    per innings once the match info is known.
+    """
+
+    __slots__ = ('key', 'task_type', 'fn', 'args', 'deps', 'priority', 'expand')
+
+    def __init__(self, key, task_type, fn, args=(), deps=(), priority=0, expand=None):
+        self.key = key
+        self.task_type = task_type
+        self.fn = fn
+        self.args = args
+        self.deps = tuple(deps)
+        self.priority = priority
+        self.expand = expand
+
+class TaskScheduler:
+    """
+    Runs a task graph on a thread pool. Ready tasks are started in priority
+    order while their type is under its concurrency limit (`concurrency` maps
+    task type -> max running, others get `default_concurrency`). A task whose
+    dependency failed is not run and fails with DependencyFailedError.
+    """
+
+    def __init__(self, concurrency=None, default_concurrency=DEFAULT_TYPE_CONCURRENCY, max_workers=None):
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.max_workers = max_workers or max(sum(self.concurrency.values()), default_concurrency * 4)
+        self.tasks = {}
+        self.results = {}
+        self.failures = {}
+        self._waiting_on = {}
+        self._dependents = {}
+        self._ready = []
+        self._sequence = itertools.count()
+
+    def add(self, task):
+        # a task already in the graph keeps its first definition
+        if task.key in self.tasks:
+            return self.tasks[task.key]
+
+        self.tasks[task.key] = task
+        failed_deps = [dep for dep in task.deps if dep in self.failures]
+        if failed_deps:
+            self._fail(task.key, DependencyFailedError(f"{task.key} depends on failed {failed_deps[0]}"))
+            return task
+
+        pending = {dep for dep in task.deps if dep not in self.results}
+        for dep in pending:
+            self._dependents.setdefault(dep, set()).add(task.key)
+
+        if pending:
+            self._waiting_on[task.key] = pending
+        else:
+            heapq.heappush(self._ready, (task.priority, next(self._sequence), task.key))
+
+        return task
+
+    def _limit(self, task_type):
+        return self.concurrency.get(task_type, self.default_concurrency)
+
+    def _complete(self, key, result):
+        # expand first: if it raises, the task fails instead of also counting as a success
+        task = self.tasks[key]
+        follow_ups = list(task.expand(result) or ()) if task.expand else ()
+        self.results[key] = result
+        for follow_up in follow_ups:
+            self.add(follow_up)
+
+        for dependent in self._dependents.pop(key, ()):
+            pending = self._waiting_on.get(dependent)
+            if pending is None:
+                continue
+
+            pending.discard(key)
+            if not pending:
+                del self._waiting_on[dependent]
+                dependent_task = self.tasks[dependent]
+                heapq.heappush(self._ready, (dependent_task.priority, next(self._sequence), dependent))
+
+    def _fail(self, key, error):
+        self.failures[key] = error
+        self._waiting_on.pop(key, None)
+        for dependent in self._dependents.pop(key, ()):
+            if dependent not in self.failures:
+                self._fail(dependent, DependencyFailedError(f"{dependent} depends on failed {key}"))
+
+    def run(self):
+        """
+        Runs until no task can make progress. Returns (results, failures), both
+        keyed on task key; tasks waiting on keys that never joined the graph
+        end up in failures.
+        """
+        running = {}
+        running_types = Counter()
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            while True:
+                deferred = []
+                while self._ready:
+                    entry = heapq.heappop(self._ready)
+                    task = self.tasks[entry[2]]
+                    if task.key in self.failures:
+                        continue
+
+                    if running_types[task.task_type] >= self._limit(task.task_type):
+                        deferred.append(entry)
+                        continue
+
+                    running[executor.submit(task.fn, *task.args)] = task.key
+                    running_types[task.task_type] += 1
+
+                for entry in deferred:
+                    heapq.heappush(self._ready, entry)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    running_types[self.tasks[key].task_type] -= 1
+                    try:
+                        self._complete(key, future.result())
+                    except Exception as e:
+                        logger.error("ERROR in task %s ==> %s", key, e.args)
+                        self._fail(key, e)
+
+        for key, pending in list(self._waiting_on.items()):
+            self._fail(key, DependencyFailedError(f"{key} waits on tasks that were never added: {sorted(map(str, pending))}"))
+
+        return self.results, self.failures
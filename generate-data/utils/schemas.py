@@ -0,0 +1,564 @@
+import argparse
+import logging
+import math
+import re
+import time
+from datetime import datetime
+from utils.metrics import get_metrics
+from utils.storage import BASE_DATA_PATH, configure_storage
+
+logger = logging.getLogger(__name__)
+
+# what a write does with an artifact that breaks its schema: skip the check,
+# log the violations and write it anyway, or refuse to write it
+VALIDATION_MODES = ('off', 'warn', 'strict')
+# violations spelled out per artifact in logs and errors, the rest are counted
+MAX_REPORTED_VIOLATIONS = 20
+
+# mirrors of server/src/helpers/constants.ts and server/src/db/mongo/constants.ts
+MATCH_FORMATS = ('test', 'odi', 't20')
+MATCH_TYPES = ('international', 'league', 'domestic')
+MATCH_STATES = ('preview', 'delay', 'toss', 'in-progress', 'innings-break', 'complete', 'abandon')
+TOSS_DECISIONS = ('bat', 'bowl')
+MATCH_OTHER_RESULT_TYPES = ('abandon', 'draw', 'tie', 'no-result')
+DISMISSAL_TYPES = (
+    'bowled', 'caught', 'lbw', 'run-out', 'stumped', 'retired', 'hit-the-ball-twice',
+    'hit-wicket', 'obstruct-field', 'handled-ball', 'timed-out',
+)
+BALL_EVENTS = (
+    'WICKET', 'MAIDEN_OVER', 'FOUR', 'SIX', 'FIFTY', 'HUNDRED', 'UDRS', 'PARTNERSHIP', 'INJURY',
+    'TEAM_FIFTY', 'TEAM_HUNDRED', 'DROPPED', 'RUNOUT_MISS', 'HIGHSCORING_OVER', 'OVER_BREAK', 'OTHER',
+)
+
+# JS Date's range, in ms either side of the epoch
+MAX_DATE_MS = 8.64e15
+
+MISSING = object()
+
+class ArtifactValidationError(Exception):
+    def __init__(self, path, violations):
+        super().__init__(format_violations(path, violations))
+        self.path = path
+        self.violations = violations
+
+# Validators are compiled once into closures: fn(value) returns None when the
+# value is valid, or a list of (path parts, message) relative to the value.
+# Valid data allocates nothing, so checking a whole artifact costs about one
+# call per field. Semantics follow zod: z.coerce.number() accepts what JS
+# Number() turns into a number, objects ignore unknown keys, optional() and
+# default() fields may be left out.
+
+class OptionalField:
+    __slots__ = ('validator',)
+
+    def __init__(self, validator):
+        self.validator = validator
+
+def optional(validator):
+    return OptionalField(validator)
+
+# for validation a zod .default() is an optional field: the server fills it in
+default = optional
+
+def to_js_number(value):
+    value_type = type(value)
+    if value_type is int or value_type is float:
+        return value
+    if value is None or value_type is bool:
+        return int(bool(value))
+    if value_type is str:
+        value = value.strip()
+        if not value:
+            return 0
+        try:
+            return float(value)
+        except ValueError:
+            return math.nan
+
+    return math.nan
+
+def coerce_number(minimum=None, exclusive=False):
+    if minimum is None:
+        bound_error = None
+    elif exclusive:
+        bound_error = f"Number must be greater than {minimum}"
+    else:
+        bound_error = f"Number must be greater than or equal to {minimum}"
+
+    def validate(value):
+        value_type = type(value)
+        number = value if value_type is int or value_type is float else to_js_number(value)
+        if number != number:
+            return [((), f"Expected number, received {value!r}")]
+        if bound_error and (number <= minimum if exclusive else number < minimum):
+            return [((), f"{bound_error}, received {value!r}")]
+
+    return validate
+
+def positive():
+    return coerce_number(0, exclusive=True)
+
+def nonnegative():
+    return coerce_number(0)
+
+def coerce_date():
+    def validate(value):
+        value_type = type(value)
+        if value_type is int or value_type is float:
+            if abs(value) <= MAX_DATE_MS:
+                return None
+        elif value is None or value_type is bool:
+            return None
+        elif value_type is str:
+            try:
+                datetime.fromisoformat(value.replace('Z', '+00:00'))
+                return None
+            except ValueError:
+                pass
+
+        return [((), f"Invalid date {value!r}")]
+
+    return validate
+
+def boolean():
+    def validate(value):
+        if type(value) is not bool:
+            return [((), f"Expected boolean, received {value!r}")]
+
+    return validate
+
+def string(min_length=0, max_length=None):
+    def validate(value):
+        if type(value) is not str:
+            return [((), f"Expected string, received {value!r}")]
+        if len(value) < min_length:
+            return [((), f"String must contain at least {min_length} character(s)")]
+        if max_length is not None and len(value) > max_length:
+            return [((), f"String must contain at most {max_length} character(s)")]
+
+    return validate
+
+def enum(values):
+    allowed = frozenset(values)
+    expected = ' | '.join(repr(value) for value in values)
+
+    def validate(value):
+        if type(value) is not str or value not in allowed:
+            return [((), f"Expected {expected}, received {value!r}")]
+
+    return validate
+
+def array(item_validator, max_length=None):
+    def validate(value):
+        if type(value) is not list:
+            return [((), f"Expected array, received {type(value).__name__}")]
+
+        errors = None
+        if max_length is not None and len(value) > max_length:
+            errors = [((), f"Array must contain at most {max_length} element(s)")]
+        for i, item in enumerate(value):
+            item_errors = item_validator(item)
+            if item_errors:
+                errors = errors or []
+                errors.extend(((i, *path), message) for path, message in item_errors)
+
+        return errors
+
+    return validate
+
+def obj(fields):
+    required = tuple((key, validator) for key, validator in fields.items() if not isinstance(validator, OptionalField))
+    optionals = tuple((key, validator.validator) for key, validator in fields.items() if isinstance(validator, OptionalField))
+
+    def validate(value):
+        if type(value) is not dict:
+            return [((), f"Expected object, received {type(value).__name__}")]
+
+        errors = None
+        for key, validator in required:
+            item = value.get(key, MISSING)
+            item_errors = [((), 'Required')] if item is MISSING else validator(item)
+            if item_errors:
+                errors = errors or []
+                errors.extend(((key, *path), message) for path, message in item_errors)
+
+        for key, validator in optionals:
+            item = value.get(key, MISSING)
+            if item is MISSING:
+                continue
+            item_errors = validator(item)
+            if item_errors:
+                errors = errors or []
+                errors.extend(((key, *path), message) for path, message in item_errors)
+
+        return errors
+
+    validate.fields = fields
+    return validate
+
+def extend(base, fields):
+    return obj({**base.fields, **fields})
+
+def omit(base, keys):
+    return obj({key: validator for key, validator in base.fields.items() if key not in keys})
+
+def discriminated_union(key, options):
+    expected = ' | '.join(repr(value) for value in options)
+
+    def validate(value):
+        if type(value) is not dict:
+            return [((), f"Expected object, received {type(value).__name__}")]
+
+        validator = options.get(value.get(key)) if type(value.get(key)) is str else None
+        if validator is None:
+            return [((key,), f"Invalid discriminator value. Expected {expected}")]
+
+        return validator(value)
+
+    return validate
+
+# server/src/types/matchData.ts
+MatchResults = discriminated_union('resultType', {
+    'win': obj({
+        'resultType': enum(('win',)),
+        'winByInnings': boolean(),
+        'winByRuns': boolean(),
+        'winningMargin': nonnegative(),
+        'winningTeamId': positive(),
+    }),
+    **{result_type: obj({'resultType': enum(MATCH_OTHER_RESULT_TYPES)}) for result_type in MATCH_OTHER_RESULT_TYPES},
+})
+
+MatchTossResults = obj({
+    'tossWinnerId': positive(),
+    'decision': enum(TOSS_DECISIONS),
+})
+
+ScorecardBatterSchema = obj({
+    'id': nonnegative(),
+    'batRuns': nonnegative(),
+    'ballsPlayed': nonnegative(),
+    'dotBalls': default(nonnegative()),
+    'batFours': default(nonnegative()),
+    'batSixes': default(nonnegative()),
+    'isStriker': optional(boolean()),
+})
+
+FallOfWicketSchema = obj({
+    'dismissalType': enum(DISMISSAL_TYPES),
+    'overs': nonnegative(),
+    'teamScore': nonnegative(),
+    'teamWickets': nonnegative(),
+    'bowlerId': optional(positive()),
+    'helpers': default(array(positive(), max_length=2)),
+})
+
+ScorecardBatter = extend(ScorecardBatterSchema, {
+    'fallOfWicket': optional(FallOfWicketSchema),
+})
+
+ScorecardBowlerSchema = obj({
+    'id': nonnegative(),
+    'bowlOvers': nonnegative(),
+    'bowlMaidens': default(nonnegative()),
+    'bowlRuns': nonnegative(),
+    'bowlWickets': default(nonnegative()),
+    'bowlWides': default(nonnegative()),
+    'bowlNoBalls': default(nonnegative()),
+    'isStriker': optional(boolean()),
+    'isNonStriker': optional(boolean()),
+})
+
+ExtraBall = obj({
+    'nos': default(nonnegative()),
+    'wides': default(nonnegative()),
+    'legByes': default(nonnegative()),
+    'byes': default(nonnegative()),
+    'penalties': default(nonnegative()),
+})
+
+ScorecardInnings = obj({
+    'teamId': positive(),
+    'overs': default(nonnegative()),
+    'oversBowled': default(nonnegative()),
+    'score': default(nonnegative()),
+    'target': optional(positive()),
+    'wickets': default(nonnegative()),
+    'isDeclared': optional(boolean()),
+    'isFollowOn': optional(boolean()),
+    'extras': ExtraBall,
+    'batters': array(ScorecardBatter),
+    'bowlers': array(ScorecardBowlerSchema),
+})
+
+MatchData = obj({
+    'matchId': positive(),
+    'innings': obj({innings_type: optional(ScorecardInnings) for innings_type in ('first', 'second', 'third', 'fourth')}),
+    'state': default(enum(MATCH_STATES)),
+    'status': default(string(max_length=200)),
+    'tossResults': optional(MatchTossResults),
+    'results': optional(MatchResults),
+})
+
+# server/src/types/commentary.ts
+CommentaryItem = obj({
+    'timestamp': coerce_number(),
+    'overs': nonnegative(),
+    'commText': string(),
+    'events': array(enum(BALL_EVENTS)),
+    'batsmanStriker': optional(omit(ScorecardBatterSchema, ('isStriker',))),
+    'bowlerStriker': optional(ScorecardBowlerSchema),
+})
+
+CommentaryData = array(CommentaryItem)
+
+# server/src/types/players.ts and matches.ts
+MatchSquadPlayer = obj({
+    'id': positive(),
+    **{flag: optional(boolean()) for flag in (
+        'isPlaying', 'isInSubs', 'isIncluded', 'isExcluded', 'isSubstitute', 'isSubstituted', 'isCaptain', 'isKeeper', 'isForeignPlayer',
+    )},
+})
+
+TeamSquad = obj({
+    'teamId': positive(),
+    'players': array(MatchSquadPlayer),
+})
+
+Match = obj({
+    'description': string(min_length=5, max_length=200),
+    'matchFormat': enum(MATCH_FORMATS),
+    'matchType': enum(MATCH_TYPES),
+    'matchNumber': nonnegative(),
+    'homeTeam': positive(),
+    'awayTeam': positive(),
+    'series': positive(),
+    'venue': positive(),
+    'startTime': coerce_date(),
+    'completeTime': coerce_date(),
+})
+
+# the extra checks server/src/db/seeds/series.ts does on info.json and squads.json
+InfoData = extend(Match, {
+    'inningsScoreList': array(obj({
+        'inningsId': positive(),
+        'batTeamId': positive(),
+    })),
+})
+
+SquadsData = obj({
+    'homeTeam': TeamSquad,
+    'awayTeam': TeamSquad,
+})
+
+# match artifact name -> the schema the seeders parse it with
+ARTIFACT_SCHEMAS = {
+    'info.json': InfoData,
+    'squads.json': SquadsData,
+    'matchData.json': MatchData,
+    'commentary': CommentaryData,
+}
+# the item schema of the array artifacts, which are validated as they are streamed
+ARTIFACT_ITEM_SCHEMAS = {
+    'commentary': CommentaryItem,
+}
+MATCH_ARTIFACT_PATTERN = re.compile(r'^series/(\d+)/matches/\d+/(?:(info\.json|squads\.json|matchData\.json)|(commentary)/\d+\.json)$')
+
+def get_artifact_name(path):
+    # 'info.json', 'squads.json', 'matchData.json' or 'commentary', None for anything else
+    match = MATCH_ARTIFACT_PATTERN.match(path)
+
+    return match and (match.group(2) or match.group(3))
+
+def format_path(parts):
+    path = ''
+    for part in parts:
+        path += f"[{part}]" if type(part) is int else f".{part}"
+
+    return path or '.'
+
+def format_violations(path, violations):
+    lines = [f"{path}: {len(violations)} violations"]
+    for parts, message in violations[:MAX_REPORTED_VIOLATIONS]:
+        lines.append(f"  {format_path(parts)}: {message}")
+    if len(violations) > MAX_REPORTED_VIOLATIONS:
+        lines.append(f"  ... and {len(violations) - MAX_REPORTED_VIOLATIONS} more")
+
+    return '\n'.join(lines)
+
+def validate_artifact(path, data):
+    """
+    Checks one artifact against the schema for its path. Returns every
+    violation as (path parts, message), an empty list when it is valid or
+    when no schema covers the path.
+    """
+    name = get_artifact_name(path)
+    if name is None:
+        return []
+
+    with get_metrics().timer('validate', artifact=name):
+        violations = ARTIFACT_SCHEMAS[name](data) or []
+
+    if violations:
+        get_metrics().increment('schema_violations', len(violations), artifact=name)
+
+    return violations
+
+def get_reference_violations(squads, match_data):
+    """
+    Cross-checks matchData against squads.json: every batter must be in the
+    batting team's squad, every bowler, dismissing bowler and fielder in the
+    other one. Catches a dismissal name resolved to the wrong player, which no
+    schema can. Both artifacts must already pass their schemas.
+    """
+    squad_ids = {
+        to_js_number(squad['teamId']): {to_js_number(player['id']) for player in squad['players']}
+        for squad in squads.values()
+    }
+    violations = []
+    for innings_key, innings in match_data['innings'].items():
+        team_id = to_js_number(innings['teamId'])
+        if team_id not in squad_ids or len(squad_ids) != 2:
+            violations.append((('innings', innings_key, 'teamId'), f"Team {innings['teamId']} has no squad in squads.json"))
+            continue
+
+        batting = squad_ids[team_id]
+        bowling = next(player_ids for squad_team_id, player_ids in squad_ids.items() if squad_team_id != team_id)
+
+        def check(player_id, player_ids, path, side):
+            if to_js_number(player_id) not in player_ids:
+                violations.append((('innings', innings_key, *path), f"Player {player_id} is not in the {side} team's squad"))
+
+        for i, batter in enumerate(innings['batters']):
+            check(batter['id'], batting, ('batters', i, 'id'), 'batting')
+            fall_of_wicket = batter.get('fallOfWicket')
+            if fall_of_wicket:
+                if 'bowlerId' in fall_of_wicket:
+                    check(fall_of_wicket['bowlerId'], bowling, ('batters', i, 'fallOfWicket', 'bowlerId'), 'bowling')
+                for j, helper in enumerate(fall_of_wicket.get('helpers', ())):
+                    check(helper, bowling, ('batters', i, 'fallOfWicket', 'helpers', j), 'bowling')
+
+        for i, bowler in enumerate(innings['bowlers']):
+            check(bowler['id'], bowling, ('bowlers', i, 'id'), 'bowling')
+
+    return violations
+
+validation_mode = 'warn'
+
+def configure_validation(mode):
+    global validation_mode
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode {mode!r}, expected one of {', '.join(VALIDATION_MODES)}")
+
+    validation_mode = mode
+
+    return validation_mode
+
+def get_validation_mode():
+    return validation_mode
+
+def check_artifact(path, data):
+    """
+    The inline check before an artifact is written: logs its violations in
+    'warn' mode, raises ArtifactValidationError with all of them in 'strict'.
+    """
+    if validation_mode == 'off':
+        return
+
+    violations = validate_artifact(path, data)
+    if not violations:
+        return
+
+    if validation_mode == 'strict':
+        raise ArtifactValidationError(path, violations)
+
+    logger.warning("%s", format_violations(path, violations))
+
+def check_artifact_items(path, items):
+    """
+    check_artifact for an array artifact streamed to storage: yields `items`
+    back, validating each on the way. 'strict' raises at the first invalid
+    item, before the write completes; 'warn' logs them all once it is done.
+    """
+    name = get_artifact_name(path)
+    validator = ARTIFACT_ITEM_SCHEMAS.get(name)
+    if validation_mode == 'off' or validator is None:
+        yield from items
+        return
+
+    violations = []
+    elapsed = 0
+    for i, item in enumerate(items):
+        start = time.perf_counter()
+        item_violations = validator(item)
+        elapsed += time.perf_counter() - start
+
+        if item_violations:
+            violations.extend(((i, *parts), message) for parts, message in item_violations)
+            if validation_mode == 'strict':
+                get_metrics().increment('schema_violations', len(violations), artifact=name)
+                raise ArtifactValidationError(path, violations)
+
+        yield item
+
+    get_metrics().observe('validate', elapsed, artifact=name)
+    if violations:
+        get_metrics().increment('schema_violations', len(violations), artifact=name)
+        logger.warning("%s", format_violations(path, violations))
+
+def check_match_references(path, squads, match_data):
+    """
+    check_artifact for the matchData -> squads cross-check, skipped while
+    either artifact breaks its schema (check_artifact reports that).
+    """
+    if validation_mode == 'off' or SquadsData(squads) or MatchData(match_data):
+        return
+
+    violations = get_reference_violations(squads, match_data)
+    if not violations:
+        return
+
+    get_metrics().increment('schema_violations', len(violations), artifact='references')
+    if validation_mode == 'strict':
+        raise ArtifactValidationError(path, violations)
+
+    logger.warning("%s", format_violations(path, violations))
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate stored match artifacts against the schemas the server seeders parse them with, and matchData players against the squads.')
+    parser.add_argument('--storage', default=f'json:{BASE_DATA_PATH}', help='where the scraped artifacts are, json:<dir> or sqlite:<file>')
+    parser.add_argument('--series', nargs='*', default=None, help='only these series ids')
+    args = parser.parse_args()
+
+    storage = configure_storage(args.storage)
+    start = time.perf_counter()
+    checked = 0
+    invalid = 0
+    violation_count = 0
+    for path in storage.list_paths():
+        match = MATCH_ARTIFACT_PATTERN.match(path)
+        if not match or (args.series and match.group(1) not in args.series):
+            continue
+
+        data = storage.read(path)
+        violations = validate_artifact(path, data)
+        if not violations and get_artifact_name(path) == 'matchData.json':
+            try:
+                squads = storage.read(path.rpartition('/')[0] + '/squads.json')
+            except FileNotFoundError:
+                squads = None
+            if squads is not None and not SquadsData(squads):
+                violations = get_reference_violations(squads, data)
+
+        checked += 1
+        if violations:
+            invalid += 1
+            violation_count += len(violations)
+            print(format_violations(path, violations))
+
+    print(f"{checked - invalid} of {checked} artifacts valid, {violation_count} violations ({time.perf_counter() - start:.2f}s)")
+    if invalid:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
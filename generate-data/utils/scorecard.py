@@ -0,0 +1,225 @@
+import argparse
+from array import array
+from utils import BALLS_IN_OVER
+from utils.columnar import COMMENTARY_PATH_PATTERN, EVENT_BITS, flatten_commentary, numpy
+from utils.records import commentary_from_json
+from utils.storage import BASE_DATA_PATH, configure_storage
+
+INNINGS_ID_MAP = {
+    1: 'first',
+    2: 'second',
+    3: 'third',
+    4: 'fourth',
+}
+
+# where matchData batting/bowling/extras come from: the scorecard page, the
+# commentary alone, or the scorecard page cross-checked against the commentary
+SCORECARD_SOURCES = ('scrape', 'commentary', 'verify')
+
+# a key per (bowler, over): bowler id * OVER_KEY_BASE + over index
+OVER_KEY_BASE = 10000
+
+BATTER_COLUMNS = {
+    'batRuns': 'batterRuns',
+    'ballsPlayed': 'batterBalls',
+    'dotBalls': 'batterDots',
+    'batFours': 'batterFours',
+    'batSixes': 'batterSixes',
+}
+BOWLER_COLUMNS = {
+    'bowlRuns': 'bowlerRuns',
+    'bowlWickets': 'bowlerWickets',
+    'bowlNoBalls': 'noBalls',
+    'bowlWides': 'wides',
+}
+EXTRAS_COLUMNS = {
+    'nos': 'noBalls',
+    'wides': 'wides',
+    'legByes': 'legByes',
+    'byes': 'byes',
+}
+
+def group_sum(keys, columns):
+    """
+    Sums each of `columns` per distinct key. Returns (keys in order of first
+    appearance, {name: sums aligned with the keys}). Uses numpy when installed.
+    """
+    if numpy is not None:
+        keys = numpy.asarray(keys)
+        if not len(keys):
+            return [], {name: [] for name in columns}
+
+        unique_keys, first_positions, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+        order = numpy.argsort(first_positions, kind='stable')
+        sums = {
+            name: numpy.bincount(inverse, weights=numpy.asarray(values), minlength=len(unique_keys))[order].astype(int).tolist()
+            for name, values in columns.items()
+        }
+        return unique_keys[order].tolist(), sums
+
+    totals = {}
+    names = list(columns)
+    for key, *values in zip(keys, *columns.values()):
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = [0] * len(names)
+        for i, value in enumerate(values):
+            row[i] += value
+
+    return list(totals), {name: [row[i] for row in totals.values()] for i, name in enumerate(names)}
+
+def get_legal_balls(columns):
+    if numpy is not None:
+        return ((numpy.asarray(columns['wides']) == 0) & (numpy.asarray(columns['noBalls']) == 0)).astype('int8')
+
+    return array('b', (wides == 0 and no_balls == 0 for wides, no_balls in zip(columns['wides'], columns['noBalls'])))
+
+def get_over_keys(columns):
+    if numpy is not None:
+        return numpy.asarray(columns['bowlerId'], dtype='int64') * OVER_KEY_BASE + (numpy.asarray(columns['ballNbr']) - 1) // BALLS_IN_OVER
+
+    return array('q', (bowler_id * OVER_KEY_BASE + (ball_nbr - 1) // BALLS_IN_OVER for bowler_id, ball_nbr in zip(columns['bowlerId'], columns['ballNbr'])))
+
+def balls_to_overs(balls):
+    return float(f"{balls // BALLS_IN_OVER}.{balls % BALLS_IN_OVER}")
+
+def reconstruct_innings(columns):
+    """
+    Rebuilds one innings' batting, bowling and extras from its ball columns
+    (utils.columnar.flatten_commentary). Players are listed in the order they
+    first appear in the commentary; batters who never faced a ball are missing.
+    """
+    batter_ids, batter_sums = group_sum(columns['batterId'], {key: columns[name] for key, name in BATTER_COLUMNS.items()})
+    batters = [
+        {'id': batter_id, **{key: sums[i] for key, sums in batter_sums.items()}}
+        for i, batter_id in enumerate(batter_ids)
+    ]
+
+    legal_balls = get_legal_balls(columns)
+    bowler_ids, bowler_sums = group_sum(columns['bowlerId'], {
+        'legalBalls': legal_balls,
+        **{key: columns[name] for key, name in BOWLER_COLUMNS.items()},
+    })
+
+    over_keys, over_sums = group_sum(get_over_keys(columns), {'runs': columns['bowlerRuns'], 'legalBalls': legal_balls})
+    maidens = {}
+    for over_key, runs, balls in zip(over_keys, over_sums['runs'], over_sums['legalBalls']):
+        if runs == 0 and balls == BALLS_IN_OVER:
+            bowler_id = over_key // OVER_KEY_BASE
+            maidens[bowler_id] = maidens.get(bowler_id, 0) + 1
+
+    bowlers = []
+    for i, bowler_id in enumerate(bowler_ids):
+        bowlers.append({
+            'id': bowler_id,
+            'bowlOvers': balls_to_overs(bowler_sums['legalBalls'][i]),
+            'bowlMaidens': maidens.get(bowler_id, 0),
+            'bowlRuns': bowler_sums['bowlRuns'][i],
+            'bowlWickets': bowler_sums['bowlWickets'][i],
+            'bowlNoBalls': bowler_sums['bowlNoBalls'][i],
+            'bowlWides': bowler_sums['bowlWides'][i],
+        })
+
+    extras = {key: int(sum(columns[name])) for key, name in EXTRAS_COLUMNS.items()}
+    extras['penalties'] = 0
+
+    wicket_bit = EVENT_BITS['WICKET']
+    return {
+        'score': int(columns['batTeamScore'][-1]) if len(columns['batTeamScore']) else 0,
+        'wickets': sum(1 for events in columns['events'] if events & wicket_bit),
+        'oversBowled': balls_to_overs(int(sum(legal_balls))),
+        'batters': batters,
+        'bowlers': bowlers,
+        'extras': extras,
+    }
+
+def compare_innings(scraped, reconstructed):
+    """
+    Lists the differences between a scraped and a reconstructed innings as
+    (field, scraped value, reconstructed value); an empty list means they agree.
+    """
+    mismatches = []
+    for field in ('score', 'wickets'):
+        if scraped[field] != reconstructed[field]:
+            mismatches.append((field, scraped[field], reconstructed[field]))
+
+    for group, fields in (('batters', BATTER_COLUMNS), ('bowlers', ('bowlOvers', 'bowlMaidens', *BOWLER_COLUMNS))):
+        reconstructed_players = {player['id']: player for player in reconstructed[group]}
+        for player in scraped[group]:
+            other = reconstructed_players.get(player['id'])
+            if other is None:
+                # a batter who never faced a ball leaves no trace in the commentary
+                if group == 'bowlers' or player['ballsPlayed'] > 0:
+                    mismatches.append((f"{group}[{player['id']}]", 'present', 'missing'))
+                continue
+
+            for field in fields:
+                if player[field] != other[field]:
+                    mismatches.append((f"{group}[{player['id']}].{field}", player[field], other[field]))
+
+    for field, value in scraped['extras'].items():
+        if value != reconstructed['extras'].get(field, 0):
+            mismatches.append((f"extras.{field}", value, reconstructed['extras'].get(field, 0)))
+
+    return mismatches
+
+def format_mismatches(match_id, innings_id, mismatches):
+    lines = [f"match {match_id} innings {innings_id}: {len(mismatches)} scorecard mismatches (scraped vs commentary)"]
+    for field, scraped_value, reconstructed_value in mismatches:
+        lines.append(f"  {field}: {scraped_value} != {reconstructed_value}")
+
+    return '\n'.join(lines)
+
+scorecard_source = 'scrape'
+
+def configure_scorecard(source):
+    global scorecard_source
+    if source not in SCORECARD_SOURCES:
+        raise ValueError(f"Unknown scorecard source {source!r}, expected one of {', '.join(SCORECARD_SOURCES)}")
+
+    scorecard_source = source
+
+    return scorecard_source
+
+def get_scorecard_source():
+    return scorecard_source
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-check stored matchData scorecards against the ones rebuilt from commentary.')
+    parser.add_argument('--storage', default=f'json:{BASE_DATA_PATH}', help='where the scraped artifacts are, json:<dir> or sqlite:<file>')
+    parser.add_argument('--series', nargs='*', default=None, help='only these series ids')
+    args = parser.parse_args()
+
+    storage = configure_storage(args.storage)
+    checked = 0
+    mismatched = 0
+    for path in storage.list_paths():
+        match = COMMENTARY_PATH_PATTERN.match(path)
+        if not match:
+            continue
+
+        series_id, match_id, innings_id = match.groups()
+        innings_key = INNINGS_ID_MAP.get(int(innings_id))
+        if not innings_key or (args.series and series_id not in args.series):
+            continue
+
+        try:
+            match_data = storage.read(f"series/{series_id}/matches/{match_id}/matchData.json")
+        except FileNotFoundError:
+            continue
+
+        scraped = match_data['innings'].get(innings_key)
+        if not scraped:
+            continue
+
+        reconstructed = reconstruct_innings(flatten_commentary(int(innings_id), commentary_from_json(storage.read(path))))
+        mismatches = compare_innings(scraped, reconstructed)
+        checked += 1
+        if mismatches:
+            mismatched += 1
+            print(format_mismatches(match_id, innings_id, mismatches))
+
+    print(f"{checked - mismatched} of {checked} innings match their commentary")
+
+if __name__ == "__main__":
+    main()
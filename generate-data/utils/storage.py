@@ -0,0 +1,347 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from utils.jsonstream import COMPACT_SEPARATORS, COMPRESSIONS, get_compression, iter_json_array, open_file, write_json_array
+from utils.metrics import get_metrics
+
+BASE_DATA_PATH = 'data/'
+
+# id -> entity maps that grow with every run; backends may store these per record
+RECORD_PATHS = {
+    'players/index.json',
+    'players/meta.json',
+    'venues/index.json',
+    'series/index.json',
+}
+
+# rows fetched per query when SqliteBackend.iter_items streams an array back
+ITEMS_PAGE_SIZE = 500
+
+def timed_io(op):
+    """
+    Decorator for backend methods: times each call as the 'storage' timer,
+    labelled with the backend and `op`.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with get_metrics().timer('storage', backend=self.name, op=op):
+                return fn(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def write_json_atomic(full_path, data, indent=2, compression=None):
+    # write next to the target and rename over it so readers never see a half-written file
+    file_dir = os.path.dirname(full_path)
+    os.makedirs(file_dir, exist_ok=True)
+    tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open_file(tmp_path, 'w', compression) as fd:
+            json.dump(data, fd, indent=indent, separators=None if indent else COMPACT_SEPARATORS)
+            if not compression:
+                fd.flush()
+                os.fsync(fd.fileno())
+        os.replace(tmp_path, full_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class JsonTreeBackend:
+    """
+    The original layout: one JSON file per artifact under `base_path`.
+    Record updates rewrite the whole file, under a lock file so concurrent writers merge.
+
+    `compact` drops the indentation, and `compression` ('gzip' or 'zstd') stores
+    artifacts as <path>.gz / <path>.zst. Reads find whichever variant is on disk,
+    so a tree can be switched between layouts file by file.
+    """
+
+    name = 'json'
+
+    def __init__(self, base_path=BASE_DATA_PATH, compact=False, compression=None):
+        if compression and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+
+        self.base_path = base_path
+        self.compact = compact
+        self.compression = compression
+
+    def _full_path(self, path):
+        return os.path.join(self.base_path, path)
+
+    def _existing_path(self, path):
+        full_path = self._full_path(path)
+        for suffix in ('', *COMPRESSIONS.values()):
+            if os.path.exists(full_path + suffix):
+                return full_path + suffix
+
+        raise FileNotFoundError(full_path)
+
+    @timed_io('read')
+    def read(self, path):
+        full_path = self._existing_path(path)
+        with open_file(full_path, 'r', get_compression(full_path)) as fd:
+            return json.load(fd)
+
+    @timed_io('write')
+    def write(self, path, data):
+        # the id -> entity maps are merged in place by write_records, so they stay plain
+        compression = None if path in RECORD_PATHS else self.compression
+        full_path = self._full_path(path) + COMPRESSIONS.get(compression, '')
+
+        if isinstance(data, list):
+            write_json_array(full_path, data, compact=self.compact, compression=compression)
+        else:
+            write_json_atomic(full_path, data, indent=None if self.compact else 2, compression=compression)
+
+        self._remove_stale(path, full_path)
+
+    @timed_io('write')
+    def write_items(self, path, items):
+        """
+        Writes a JSON array artifact from an iterable, an item at a time. If
+        `items` raises, the stored copy is left as it was.
+        """
+        full_path = self._full_path(path) + COMPRESSIONS.get(self.compression, '')
+        write_json_array(full_path, items, compact=self.compact, compression=self.compression)
+        self._remove_stale(path, full_path)
+
+    def iter_items(self, path):
+        full_path = self._existing_path(path)
+
+        return iter_json_array(full_path)
+
+    def _remove_stale(self, path, full_path):
+        # drop the copy left behind by a run with another compression setting
+        for suffix in ('', *COMPRESSIONS.values()):
+            stale_path = self._full_path(path) + suffix
+            if stale_path != full_path and os.path.exists(stale_path):
+                os.remove(stale_path)
+
+    def write_records(self, path, records):
+        full_path = self._full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path + '.lock', 'w') as lock_fd:
+            if fcntl:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            try:
+                data = self.read(path)
+            except FileNotFoundError:
+                data = {}
+
+            data.update(records)
+            self.write(path, data)
+
+        return data
+
+    def list_paths(self):
+        for root, _, files in os.walk(self.base_path):
+            for file_name in sorted(files):
+                compression = get_compression(file_name)
+                if compression:
+                    file_name = file_name[:-len(COMPRESSIONS[compression])]
+
+                if file_name.endswith('.json'):
+                    yield os.path.relpath(os.path.join(root, file_name), self.base_path).replace(os.sep, '/')
+
+    def close(self):
+        pass
+
+class SqliteBackend:
+    """
+    Single-file SQLite store. Artifacts are rows keyed on their tree path and the
+    RECORD_PATHS maps are stored one row per entity, so updating a player or
+    venue costs one row write instead of rewriting the whole map. Arrays written
+    by write_items are stored one row per item, so they are never serialized whole.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS records (path TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (path, key))')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS items (path TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (path, seq))')
+
+    @timed_io('read')
+    def read(self, path):
+        with self._lock:
+            if path in RECORD_PATHS:
+                rows = self._conn.execute('SELECT key, data FROM records WHERE path = ? ORDER BY rowid', (path,)).fetchall()
+                if rows:
+                    return {key: json.loads(data) for key, data in rows}
+            else:
+                row = self._conn.execute('SELECT data FROM documents WHERE path = ?', (path,)).fetchone()
+                if row:
+                    return json.loads(row[0])
+
+                rows = self._conn.execute('SELECT data FROM items WHERE path = ? ORDER BY seq', (path,)).fetchall()
+                if rows:
+                    return [json.loads(data) for data, in rows]
+
+        raise FileNotFoundError(path)
+
+    @timed_io('write')
+    def write(self, path, data):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                if path in RECORD_PATHS:
+                    self._conn.execute('DELETE FROM records WHERE path = ?', (path,))
+                    self._insert_records(path, data)
+                else:
+                    self._conn.execute('DELETE FROM items WHERE path = ?', (path,))
+                    self._conn.execute('INSERT OR REPLACE INTO documents (path, data) VALUES (?, ?)', (path, json.dumps(data)))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    @timed_io('write')
+    def write_items(self, path, items):
+        """
+        Writes a JSON array artifact from an iterable, a row per item. If `items`
+        raises, the stored copy is left as it was. An empty array is stored as a
+        document, since it has no rows.
+        """
+        count = 0
+
+        def rows():
+            nonlocal count
+            for count, item in enumerate(items, 1):
+                yield path, count, json.dumps(item)
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+                self._conn.execute('DELETE FROM items WHERE path = ?', (path,))
+                self._conn.executemany('INSERT INTO items (path, seq, data) VALUES (?, ?, ?)', rows())
+                if not count:
+                    self._conn.execute('INSERT INTO documents (path, data) VALUES (?, ?)', (path, '[]'))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def iter_items(self, path):
+        seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT seq, data FROM items WHERE path = ? AND seq > ? ORDER BY seq LIMIT ?',
+                    (path, seq, ITEMS_PAGE_SIZE),
+                ).fetchall()
+
+            if not rows:
+                break
+
+            for seq, data in rows:
+                yield json.loads(data)
+
+        if not seq:
+            # written by write(), or an empty array
+            yield from self.read(path)
+
+    @timed_io('write')
+    def write_records(self, path, records):
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._insert_records(path, records)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def _insert_records(self, path, records):
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO records (path, key, data) VALUES (?, ?, ?)',
+            [(path, str(key), json.dumps(value)) for key, value in records.items()],
+        )
+
+    def list_paths(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT path FROM documents UNION SELECT DISTINCT path FROM records UNION SELECT DISTINCT path FROM items ORDER BY path').fetchall()
+
+        for row in rows:
+            yield row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+BACKENDS = {
+    JsonTreeBackend.name: JsonTreeBackend,
+    SqliteBackend.name: SqliteBackend,
+}
+
+def open_storage(spec, **options):
+    """
+    Opens a backend from a `<name>:<location>` spec, e.g. `json:data/` or `sqlite:data/corpus.db`.
+    `options` (compact, compression) only apply to the json backend.
+    """
+    name, _, location = spec.partition(':')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {name!r}, expected one of {', '.join(BACKENDS)}")
+
+    kwargs = options if name == JsonTreeBackend.name else {}
+    return BACKENDS[name](location, **kwargs) if location else BACKENDS[name](**kwargs)
+
+def convert_storage(source, target):
+    count = 0
+    for path in list(source.list_paths()):
+        target.write(path, source.read(path))
+        count += 1
+
+    return count
+
+storage = JsonTreeBackend()
+
+def configure_storage(spec, **options):
+    global storage
+    storage.close()
+    storage = open_storage(spec, **options)
+
+    return storage
+
+def get_storage():
+    return storage
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy the scraped corpus between storage backends.')
+    parser.add_argument('source', help='e.g. sqlite:data/corpus.db')
+    parser.add_argument('target', help='e.g. json:../server/src/db/seeds/data/')
+    parser.add_argument('--compact', action='store_true', help='write the json target without indentation')
+    parser.add_argument('--compress', choices=COMPRESSIONS, default=None, help='compress the json target artifacts')
+    args = parser.parse_args()
+
+    source = open_storage(args.source)
+    target = open_storage(args.target, compact=args.compact, compression=args.compress)
+    count = convert_storage(source, target)
+    source.close()
+    target.close()
+
+    print(f"Copied {count} artifacts from {args.source} to {args.target}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import logging
+import pytz
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = 'Asia/Calcutta'
+# offsets observed before this are mostly local mean times, not worth indexing
+INDEX_SINCE = datetime(1970, 1, 1)
+
+def parse_offset(offset):
+    sign = 1 if offset[0] == '+' else -1
+    hours, minutes = map(int, offset[1:].split(':'))
+
+    return timedelta(hours=sign * hours, minutes=sign * minutes)
+
+def get_zone_offsets(tz):
+    """
+    Every UTC offset `tz` has observed since INDEX_SINCE, standard and DST.
+    """
+    transition_times = getattr(tz, '_utc_transition_times', None)
+    if not transition_times:
+        return {tz.utcoffset(None)}
+
+    start = max(0, bisect_right(transition_times, INDEX_SINCE) - 1)
+    return {transition_info[0] for transition_info in tz._transition_info[start:]}
+
+@lru_cache(maxsize=1)
+def get_offset_index():
+    """
+    Maps every UTC offset to the timezone names that have observed it, in
+    `pytz.all_timezones` order. Built once per process; which of them are on
+    that offset on a given day is up to get_offset_zones.
+    """
+    index = {}
+    for tz_name in pytz.all_timezones:
+        for tz_offset in get_zone_offsets(pytz.timezone(tz_name)):
+            index.setdefault(tz_offset, []).append(tz_name)
+
+    return index
+
+@lru_cache(maxsize=1024)
+def get_offset_zones(total_offset, day):
+    """
+    The timezone names on `total_offset` on `day`, DST included. Only the
+    index's candidates for that offset are checked.
+    """
+    probe = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+
+    return tuple(
+        tz_name for tz_name in get_offset_index().get(total_offset, ())
+        if probe.astimezone(pytz.timezone(tz_name)).utcoffset() == total_offset
+    )
+
+def get_timezone_from_offset(offset, at=None, preferred=None):
+    """
+    Converts a UTC offset string (e.g., '+05:30') to a timezone name (e.g., 'Asia/Kolkata').
+
+    Args:
+    offset (str): A string representing the UTC offset, e.g., '+05:30'.
+    at (datetime | date): When the offset applies, so DST offsets resolve for that day. Defaults to now.
+    preferred (set): Timezone names to pick first when several share the offset.
+
+    Returns:
+    str: A timezone name corresponding to the UTC offset, or 'Asia/Calcutta' if not found.
+    """
+    try:
+        total_offset = parse_offset(offset)
+
+        if at is None:
+            at = datetime.now(timezone.utc)
+        day = at.date() if isinstance(at, datetime) else at
+
+        candidates = get_offset_zones(total_offset, day)
+        if preferred:
+            for tz_name in candidates:
+                if tz_name in preferred:
+                    return tz_name
+
+        if candidates:
+            return candidates[0]
+
+    except Exception as e:
+        logger.error("ERROR in get_timezone_from_offset ==> %s", e.args)
+    
+    return DEFAULT_TIMEZONE
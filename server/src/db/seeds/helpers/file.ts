@@ -1,4 +1,27 @@
+import { createReadStream } from "node:fs";
 import * as fs from "node:fs/promises";
+import { createInterface } from "node:readline";
+import { Readable } from "node:stream";
+import { promisify } from "node:util";
+import { createGunzip, gunzip } from "node:zlib";
+
+const gunzipAsync = promisify(gunzip);
+
+// generate-data can store artifacts gzipped as <path>.gz
+const GZIP_EXTENSION = ".gz";
+
+const resolveFilePath = async (filePath: string): Promise<string> => {
+  try {
+    await fs.access(filePath);
+  } catch {
+    try {
+      await fs.access(filePath + GZIP_EXTENSION);
+      return filePath + GZIP_EXTENSION;
+    } catch {}
+  }
+
+  return filePath;
+};
 
 export const readDirectory = async (path: string): Promise<string[] | null> => {
   try {
@@ -16,7 +39,14 @@ export const readFileData = async (
   filePath: string
 ): Promise<string | null> => {
   try {
-    const contents = await fs.readFile(filePath, { encoding: "utf8" });
+    const resolvedPath = await resolveFilePath(filePath);
+    if (resolvedPath.endsWith(GZIP_EXTENSION)) {
+      const contents = await gunzipAsync(await fs.readFile(resolvedPath));
+
+      return contents.toString("utf8");
+    }
+
+    const contents = await fs.readFile(resolvedPath, { encoding: "utf8" });
 
     return contents;
   } catch (err) {
@@ -26,6 +56,60 @@ export const readFileData = async (
   }
 };
 
+// Reads a JSON array file item by item. Files in the compact layout written by
+// generate-data (one item per line between "[" and "]") are parsed a line at a
+// time; any other layout is parsed whole once the file has been read.
+export const readJsonArray = async <T>(
+  filePath: string,
+  onItem: (item: T) => void
+): Promise<boolean> => {
+  try {
+    const resolvedPath = await resolveFilePath(filePath);
+    const fileStream = createReadStream(resolvedPath);
+    let input: Readable = fileStream;
+    if (resolvedPath.endsWith(GZIP_EXTENSION)) {
+      input = fileStream.pipe(createGunzip());
+    }
+
+    const lines = createInterface({ input, crlfDelay: Infinity });
+    const wholeFileLines: string[] = [];
+
+    await new Promise<void>((resolve, reject) => {
+      fileStream.on("error", reject);
+      lines.on("error", reject);
+      lines.on("line", (line) => {
+        try {
+          if (wholeFileLines.length) {
+            wholeFileLines.push(line);
+          } else if (/^\s/.test(line)) {
+            // indented layout: items span several lines
+            wholeFileLines.push("[", line);
+          } else if (line.startsWith("[") && line !== "[") {
+            wholeFileLines.push(line);
+          } else if (line !== "[" && line !== "]") {
+            onItem(JSON.parse(line.endsWith(",") ? line.slice(0, -1) : line));
+          }
+        } catch (err) {
+          lines.close();
+          reject(err);
+        }
+      });
+      lines.on("close", resolve);
+    });
+
+    if (wholeFileLines.length) {
+      const items: T[] = JSON.parse(wholeFileLines.join("\n"));
+      items.forEach(onItem);
+    }
+
+    return true;
+  } catch (err) {
+    console.error("ERROR in readJsonArray ", err);
+
+    return false;
+  }
+};
+
 export const writeFileData = async (filePath: string, data: string) => {
   try {
     await fs.writeFile(filePath, data);
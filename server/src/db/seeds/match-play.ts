@@ -15,7 +15,12 @@ import {
 } from "../../types";
 import { getIdsMap } from "./helpers";
 import { BASE_DATA_PATH } from "./helpers/constants";
-import { readDirectory, readFileData, writeFileData } from "./helpers/file";
+import {
+  readDirectory,
+  readFileData,
+  readJsonArray,
+  writeFileData,
+} from "./helpers/file";
 import { IdsMap } from "./helpers/types";
 
 // can these types be moved
@@ -150,14 +155,17 @@ const generateInningsPayloads = async (
     const payloadData: Payload[] = [];
     const commentaryPath = `${baseMatchPath}commentary/${inningsId}.json`;
 
-    const commentaryDataContents = await readFileData(commentaryPath);
+    const commentaryData: CommentaryData = [];
+    const found = await readJsonArray<CommentaryData[number]>(
+      commentaryPath,
+      (commentary) => commentaryData.push(commentary)
+    );
 
-    if (!commentaryDataContents) {
+    if (!found) {
       console.log("No commentary data found");
       return;
     }
 
-    const commentaryData: CommentaryData = JSON.parse(commentaryDataContents);
     CommentaryData.parse(commentaryData);
 
     if (!innings) {
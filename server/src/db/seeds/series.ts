@@ -15,7 +15,12 @@ import { db } from "../postgres";
 import * as tables from "../postgres/schema";
 import { getIdsMap } from "./helpers";
 import { BASE_DATA_PATH } from "./helpers/constants";
-import { readDirectory, readFileData, writeFileData } from "./helpers/file";
+import {
+  readDirectory,
+  readFileData,
+  readJsonArray,
+  writeFileData,
+} from "./helpers/file";
 import { IdsMap } from "./helpers/types";
 
 // validation schema
@@ -54,14 +59,16 @@ const getMatchCommentary = async (
   try {
     const path = `${BASE_PATH}${seriesId}/matches/${matchId}/commentary/${inningsId}.json`;
 
-    const contents = await readFileData(path);
+    const commentary: CommentaryItem[] = [];
+    const found = await readJsonArray<CommentaryItem>(path, (item) =>
+      commentary.push(item)
+    );
 
-    if (!contents)
+    if (!found)
       throw new Error(
         `No commentary found for match ${matchId} and innings ${inningsId}...`
       );
 
-    const commentary = JSON.parse(contents);
     // validate
     CommentaryData.parse(commentary);
 